@@ -0,0 +1,78 @@
+"""Compare SupersequenceSolver with PipelineMatrixSolver on random groups.
+
+Usage: python -m benchmarks.alignment
+"""
+import time
+
+import numpy as np
+
+import ppao
+from ppao import settings
+from ppao.custom_types import Frequency
+
+# rows, pipeline size, number of operations
+CASES = (
+    (4, 4, 4),
+    (8, 5, 5),
+    (16, 5, 6),
+    (32, 5, 6),
+)
+GROUPS = 5
+# the shift solver of big groups is stopped by a deadline
+DEADLINE = 5.0
+
+
+def make_group(rng, rows, size, operations):
+    settings_ = settings.Settings(
+        group_size_limit=rows,
+        pipeline_size_limit=size,
+        solver_engine="branch_and_bound",
+    )
+    pipelines = rng.integers(
+        1, operations + 1, size=(rows, size), dtype=settings_.default_dtype
+    )
+    values, counts = np.unique(pipelines, return_counts=True)
+    source_matrix = ppao.SourceMatrix(
+        from_array=pipelines,
+        frequency=Frequency(
+            total=int(pipelines.size),
+            most_common={int(values[np.argmax(counts)])},
+        ),
+        settings_=settings_,
+    )
+    return source_matrix, settings_
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    print("rows size ops | shift calls  time | supersequence calls  time")
+    for rows, size, operations in CASES:
+        totals = np.zeros(4)
+        for _ in range(GROUPS):
+            source_matrix, settings_ = make_group(rng, rows, size, operations)
+            start = time.perf_counter()
+            solution = ppao.PipelineMatrixSolver(
+                source_matrix=source_matrix, settings_=settings_
+            ).solve(deadline=time.monotonic() + DEADLINE)
+            shift_time = time.perf_counter() - start
+            start = time.perf_counter()
+            alignment = ppao.SupersequenceSolver(
+                source_matrix=source_matrix, settings_=settings_
+            ).solve()
+            alignment_time = time.perf_counter() - start
+            totals += (
+                sum(1 for unit in solution if unit.operation),
+                shift_time,
+                alignment.result,
+                alignment_time,
+            )
+        calls, shift_time, alignment_calls, alignment_time = totals / GROUPS
+        print(
+            f"{rows:4} {size:4} {operations:3} | {calls:11.1f} "
+            f"{shift_time:5.3f} | {alignment_calls:19.1f} "
+            f"{alignment_time:5.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""Timings and peak memory of ppao hot paths.
+
+Every case is a backlog of random pipelines. The stages of planning are
+timed separately on the first group of the backlog and end to end on the
+whole backlog: every benchmark is repeated, the best and the median times
+are kept. Peak memory is measured by tracemalloc in one more run, so it
+does not slow the timed runs down.
+
+Usage:
+    python -m benchmarks.suite [--output FILE] [--baseline FILE]
+        [--threshold RATIO] [--quick]
+
+Results are written as JSON. With --baseline, the best times are compared
+with the results of an earlier run and the exit status is 1 if any of them
+is slower by more than the threshold.
+"""
+import argparse
+import dataclasses
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import ppao
+from ppao import constants, settings
+from ppao.solver import HorizontalOptimizer
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class Case:
+    """Benchmark parameters.
+
+    Attributes:
+        rows: group size limit.
+        size: pipeline size limit.
+        operations: number of distinct operations.
+        backlog: number of pipelines added to the grouper.
+        solver_engine: solver engine of the case.
+    """
+
+    rows: int
+    size: int
+    operations: int
+    backlog: int
+    solver_engine: str = "exhaustive"
+
+    @property
+    def name(self) -> str:
+        return (
+            f"rows={self.rows} size={self.size} ops={self.operations} "
+            f"backlog={self.backlog} engine={self.solver_engine}"
+        )
+
+
+CASES = (
+    Case(rows=4, size=4, operations=6, backlog=2000),
+    Case(
+        rows=8,
+        size=5,
+        operations=6,
+        backlog=512,
+        solver_engine="branch_and_bound",
+    ),
+    Case(
+        rows=32,
+        size=5,
+        operations=8,
+        backlog=1024,
+        solver_engine="local_search",
+    ),
+    Case(
+        rows=128,
+        size=16,
+        operations=8,
+        backlog=4096,
+        solver_engine="local_search",
+    ),
+)
+QUICK_CASES = (Case(rows=4, size=4, operations=6, backlog=200),)
+REPEATS = 5
+QUICK_REPEATS = 2
+# max number of combinations of the first group scored by count_results,
+# get_all_combinations is timed only if the group has no more of them
+COMBINATIONS_LIMIT = 1 << 16
+# allowed slowdown of the best time against the baseline
+THRESHOLD = 0.2
+
+
+def make_backlog(case: Case, rng: np.random.Generator) -> np.ndarray:
+    """Pipelines of random lengths, padded by zeros."""
+    settings_ = make_settings(case)
+    pipelines = rng.integers(
+        1,
+        case.operations + 1,
+        size=(case.backlog, case.size),
+        dtype=settings_.default_dtype,
+    )
+    lengths = rng.integers(1, case.size + 1, size=case.backlog)
+    pipelines[np.arange(case.size) >= lengths[:, None]] = 0
+    return pipelines
+
+
+def make_settings(case: Case) -> settings.Settings:
+    return settings.Settings(
+        group_size_limit=case.rows,
+        pipeline_size_limit=case.size,
+        common_ops_percent_bound=0.3,
+        solver_engine=case.solver_engine,
+    )
+
+
+def measure(function: Callable[[], object], repeats: int) -> Dict[str, float]:
+    """
+    :return: the best and the median time in seconds and peak memory in
+    bytes.
+    """
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "peak_memory": peak_memory,
+    }
+
+
+def pop_all(grouper: ppao.Grouper) -> List[ppao.SourceMatrix]:
+    groups = []
+    while (source_matrix := grouper.pop()) is not None:
+        groups.append(source_matrix)
+    return groups
+
+
+def get_benchmarks(
+    case: Case, backlog: np.ndarray
+) -> List[Tuple[str, Callable[[], object]]]:
+    settings_ = make_settings(case)
+    grouper = ppao.Grouper(settings_=settings_)
+    grouper.add(backlog)
+    group = grouper.pop()
+    possible_shifts = ppao.PipelineMatrixSolver.get_possible_shifts(group)
+    chunk_size = group.get_chunk_size(
+        possible_shifts, settings_.combinations_memory_limit
+    )
+    combinations = next(
+        group.iter_combinations(
+            possible_shifts, min(chunk_size, COMBINATIONS_LIMIT)
+        )
+    )
+    total = math.prod(len(shifts) for shifts in possible_shifts)
+    shifts = combinations[0]
+    sequence, mapping = group.make_horizontal_sequence(shifts=shifts)
+
+    def grouper_add() -> None:
+        ppao.Grouper(settings_=settings_).add(backlog)
+
+    def grouper_pop() -> List[ppao.SourceMatrix]:
+        grouper = ppao.Grouper(settings_=settings_)
+        grouper.add(backlog)
+        return pop_all(grouper)
+
+    def horizontal_optimize() -> object:
+        return HorizontalOptimizer(
+            source_sequence=sequence, settings_=settings_
+        ).optimize(mapping=mapping)
+
+    def solve() -> List[object]:
+        grouper = ppao.Grouper(settings_=settings_)
+        grouper.add(backlog)
+        return [
+            ppao.PipelineMatrixSolver(
+                source_matrix=source_matrix, settings_=settings_
+            ).solve()
+            for source_matrix in pop_all(grouper)
+        ]
+
+    benchmarks = [
+        ("grouper_add", grouper_add),
+        ("grouper_pop", grouper_pop),
+        (
+            "get_possible_shifts",
+            lambda: ppao.PipelineMatrixSolver.get_possible_shifts(group),
+        ),
+    ]
+    if total <= COMBINATIONS_LIMIT:
+        benchmarks.append(
+            (
+                "get_all_combinations",
+                lambda: group.get_all_combinations(possible_shifts),
+            )
+        )
+    benchmarks += [
+        ("count_results", lambda: group.count_results(combinations)),
+        (
+            "count_result",
+            lambda: group.count_result(shifts, {"result": np.inf}),
+        ),
+        (
+            "make_horizontal_sequence",
+            lambda: group.make_horizontal_sequence(shifts=shifts),
+        ),
+        ("horizontal_optimize", horizontal_optimize),
+        (
+            "solve_group",
+            lambda: ppao.PipelineMatrixSolver(
+                source_matrix=group, settings_=settings_
+            ).solve(),
+        ),
+        ("solve", solve),
+    ]
+    # the exact alignment search is too slow for heuristic-sized groups
+    if case.solver_engine not in constants.HEURISTIC_SOLVER_ENGINES:
+        benchmarks.append(
+            (
+                "supersequence_solve_group",
+                lambda: ppao.SupersequenceSolver(
+                    source_matrix=group, settings_=settings_
+                ).solve(),
+            )
+        )
+    return benchmarks
+
+
+def run(cases: Tuple[Case, ...], repeats: int) -> Dict[str, object]:
+    rng = np.random.default_rng(0)
+    results = []
+    for case in cases:
+        backlog = make_backlog(case, rng)
+        for name, function in get_benchmarks(case, backlog):
+            results.append(
+                {
+                    "case": case.name,
+                    "benchmark": name,
+                    **measure(function, repeats),
+                }
+            )
+            print(
+                f"{case.name:60} {name:26} {results[-1]['min']:10.6f} s "
+                f"{results[-1]['peak_memory'] / 1024:10.1f} KiB"
+            )
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "repeats": repeats,
+        "results": results,
+    }
+
+
+def compare(
+    report: Dict[str, object], baseline: Dict[str, object], threshold: float
+) -> bool:
+    """Print best times relative to the baseline.
+
+    :return: whether no benchmark is slower than the threshold allows.
+    """
+    base = {
+        (result["case"], result["benchmark"]): result
+        for result in baseline["results"]
+    }
+    passed = True
+    for result in report["results"]:
+        base_result = base.get((result["case"], result["benchmark"]))
+        if base_result is None:
+            continue
+        ratio = result["min"] / base_result["min"]
+        memory_ratio = result["peak_memory"] / max(
+            base_result["peak_memory"], 1
+        )
+        slower = ratio > 1 + threshold
+        passed = passed and not slower
+        print(
+            f"{result['case']:60} {result['benchmark']:26} "
+            f"time x{ratio:5.2f} memory x{memory_ratio:5.2f}"
+            + (" SLOWER" if slower else "")
+        )
+    return passed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--output", help="JSON file of the results")
+    parser.add_argument("--baseline", help="JSON file of earlier results")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--quick", action="store_true", help="one small case")
+    args = parser.parse_args(argv)
+    report = run(
+        QUICK_CASES if args.quick else CASES,
+        QUICK_REPEATS if args.quick else REPEATS,
+    )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if not compare(report, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
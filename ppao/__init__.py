@@ -4,7 +4,17 @@
 
     More information: https://github.com/borontov/ppao
 """
-from ppao.custom_types import ExecutionUnit, Solution
-from ppao.grouper import Grouper
+from ppao.alignment import SupersequenceSolver
+from ppao.batcher import Batcher, Placement
+from ppao.cache import PlanCache
+from ppao.custom_types import (
+    CompactSolution,
+    ExecutionUnit,
+    Solution,
+    SolveStats,
+)
+from ppao.executor import SolutionExecutor
+from ppao.grouper import Grouper, GrouperStats
 from ppao.matrix import SourceMatrix
-from ppao.solver import PipelineMatrixSolver
+from ppao.solver import PipelineMatrixSolver, solve_many
+from ppao.store import PlanStore
@@ -0,0 +1,285 @@
+"""Alignment of pipelines with idle gaps inside rows."""
+import heapq
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ppao import constants, settings
+from ppao.custom_types import (
+    CompactSolution,
+    ExecutionUnit,
+    Solution,
+    SolveStats,
+)
+from ppao.matrix import SourceMatrix
+
+# positions of the next operation of every pipeline
+_State = Tuple[int, ...]
+
+
+class SupersequenceSolver:
+    """Solves a group as a shortest common supersequence of its pipelines.
+
+    PipelineMatrixSolver shifts whole rows, here a pipeline may also idle
+    between two of its own operations. Every step of the supersequence is
+    one ExecutionUnit: an operation and all pipelines whose next operation
+    it is, a pipeline takes its whole run of the operation like in the
+    units of HorizontalOptimizer. Advancing pipelines as far as possible
+    never makes the supersequence longer, so a step is defined by its
+    operation. Zeros are padding and are skipped.
+
+    The shortest supersequence is searched by A* over the positions of
+    pipelines. Every operation needs at least as many steps as it has
+    remaining runs in one pipeline, the sum of them is the heuristic. If
+    more than constants.ALIGNMENT_STATES_LIMIT states are expanded or the
+    deadline passes, a beam search of constants.ALIGNMENT_BEAM_WIDTH
+    states per step finishes the search and the solution is not proven
+    optimal. Rows are not shifted, so stats of its solutions have no
+    possible shifts and combinations, the time of the whole search is
+    their search phase.
+
+    Attributes:
+        source_matrix: pipelines matrix array.
+        settings: ppao settings.
+        expanded_states: number of states expanded by the last solve()
+            call.
+    """
+
+    __slots__ = (
+        "source_matrix",
+        "settings",
+        "expanded_states",
+        "_rows",
+        "_run_ends",
+        "_remaining",
+    )
+
+    def __init__(
+        self,
+        source_matrix: SourceMatrix,
+        settings_: settings.Settings = settings.DEFAULT_SETTINGS,
+    ) -> None:
+        self.source_matrix = source_matrix
+        self.settings = settings_
+        self.expanded_states = 0
+        self._rows = tuple(
+            tuple(int(operation) for operation in row if operation)
+            for row in np.asarray(source_matrix)
+        )
+        operations = sorted({x for row in self._rows for x in row})
+        columns = {operation: key for key, operation in enumerate(operations)}
+        # position after the run of the same operation of every item
+        self._run_ends = tuple(
+            tuple(
+                next(
+                    (
+                        end
+                        for end in range(position, len(row))
+                        if row[end] != row[position]
+                    ),
+                    len(row),
+                )
+                for position in range(len(row))
+            )
+            for row in self._rows
+        )
+        # remaining runs of every operation from every position of a row
+        self._remaining = np.zeros(
+            (
+                len(self._rows),
+                max(map(len, self._rows), default=0) + 1,
+                len(operations),
+            ),
+            dtype=np.intp,
+        )
+        for row_index, row in enumerate(self._rows):
+            for position in range(len(row) - 1, -1, -1):
+                self._remaining[row_index, position] = self._remaining[
+                    row_index, position + 1
+                ]
+                if position + 1 == len(row) or (
+                    row[position + 1] != row[position]
+                ):
+                    self._remaining[
+                        row_index, position, columns[row[position]]
+                    ] += 1
+
+    def _get_lower_bound(self, state: _State) -> int:
+        return int(
+            self._remaining[np.arange(len(state)), state].max(axis=0).sum()
+        )
+
+    def _iterate_steps(self, state: _State) -> List[Tuple[int, _State]]:
+        """
+        :return: operations of the next step in ascending order and the
+        states after them.
+        """
+        pipelines: Dict[int, List[int]] = dict()
+        for row_index, position in enumerate(state):
+            if position < len(self._rows[row_index]):
+                pipelines.setdefault(
+                    self._rows[row_index][position], []
+                ).append(row_index)
+        steps = []
+        for operation in sorted(pipelines):
+            next_state = list(state)
+            for row_index in pipelines[operation]:
+                next_state[row_index] = self._run_ends[row_index][
+                    state[row_index]
+                ]
+            steps.append((operation, tuple(next_state)))
+        return steps
+
+    def solve(
+        self, deadline: Optional[float] = None
+    ) -> Union[Solution, CompactSolution]:
+        """
+        :param deadline: time.monotonic() value to switch to the beam
+            search at.
+        :return: the problem solution, result is the number of execution
+            units and shifts are the steps of the first operations.
+        """
+        started = time.perf_counter()
+        start: _State = (0,) * len(self._rows)
+        goal: _State = tuple(map(len, self._rows))
+        self.expanded_states = 0
+        parents: Dict[_State, Tuple[Optional[_State], int]] = {
+            start: (None, 0)
+        }
+        optimal = self._search(start, goal, parents, deadline)
+        if not optimal:
+            parents = {start: (None, 0)}
+            self._beam_search(start, goal, parents)
+        path = []
+        state = goal
+        while state != start:
+            previous, operation = parents[state]
+            path.append((operation, previous, state))
+            state = previous
+        path.reverse()
+        return self._make_solution(
+            path, optimal, time.perf_counter() - started
+        )
+
+    def _search(
+        self,
+        start: _State,
+        goal: _State,
+        parents: Dict[_State, Tuple[Optional[_State], int]],
+        deadline: Optional[float],
+    ) -> bool:
+        """A* search, the heuristic is consistent, so the first expanded
+        goal is optimal.
+
+        :return: whether the goal is reached.
+        """
+        steps = {start: 0}
+        queue = [(self._get_lower_bound(start), 0, start)]
+        closed = set()
+        while queue:
+            _, negative_steps, state = heapq.heappop(queue)
+            if state == goal:
+                return True
+            if state in closed:
+                continue
+            closed.add(state)
+            self.expanded_states += 1
+            if self.expanded_states > constants.ALIGNMENT_STATES_LIMIT or (
+                deadline is not None and time.monotonic() >= deadline
+            ):
+                return False
+            for operation, next_state in self._iterate_steps(state):
+                next_steps = 1 - negative_steps
+                if next_steps < steps.get(next_state, next_steps + 1):
+                    steps[next_state] = next_steps
+                    parents[next_state] = (state, operation)
+                    heapq.heappush(
+                        queue,
+                        (
+                            next_steps + self._get_lower_bound(next_state),
+                            -next_steps,
+                            next_state,
+                        ),
+                    )
+        return False
+
+    def _beam_search(
+        self,
+        start: _State,
+        goal: _State,
+        parents: Dict[_State, Tuple[Optional[_State], int]],
+    ) -> None:
+        """Keep the states with the smallest lower bounds at every step,
+        the most advanced first. Every step advances a pipeline, so the
+        goal is always reached."""
+        layer = [start]
+        while goal not in parents:
+            next_layer = []
+            for state in layer:
+                for operation, next_state in self._iterate_steps(state):
+                    if next_state not in parents:
+                        parents[next_state] = (state, operation)
+                        next_layer.append(next_state)
+            layer = sorted(
+                next_layer,
+                key=lambda state: (
+                    self._get_lower_bound(state),
+                    -sum(state),
+                    state,
+                ),
+            )[: constants.ALIGNMENT_BEAM_WIDTH]
+
+    def _make_solution(
+        self,
+        path: List[Tuple[int, _State, _State]],
+        optimal: bool,
+        search_time: float,
+    ) -> Union[Solution, CompactSolution]:
+        shifts = np.zeros(len(self._rows), dtype=np.int64)
+        execution_units = []
+        for step, (operation, previous, state) in enumerate(path):
+            advanced = np.array(state) - np.array(previous)
+            pipelines = np.flatnonzero(advanced)
+            shifts[pipelines[np.array(previous)[pipelines] == 0]] = step
+            execution_units.append(
+                ExecutionUnit.trusted(
+                    operation=operation,
+                    pipelines=np.repeat(pipelines, advanced[pipelines]).astype(
+                        self.settings.default_dtype
+                    ),
+                    validate=self.settings.debug_validation,
+                )
+            )
+        lower_bound = self._get_lower_bound((0,) * len(self._rows))
+        optimal = optimal or len(path) <= lower_bound
+        gap = 0 if optimal else len(path) - lower_bound
+        stats = SolveStats(
+            possible_shifts=(),
+            combinations=0,
+            scored_combinations=0,
+            skipped_combinations=0,
+            total_operations=int(np.count_nonzero(self.source_matrix)),
+            execution_units=len(execution_units),
+            handler_calls=len(execution_units),
+            timings={"search": search_time},
+        )
+        if self.settings.compact_solutions:
+            return CompactSolution.from_execution_units(
+                execution_units,
+                shifts=shifts,
+                result=len(path),
+                dtype=self.settings.default_dtype,
+                optimal=optimal,
+                gap=gap,
+                stats=stats,
+            )
+        return Solution.trusted(
+            execution_units=execution_units,
+            shifts=shifts,
+            result=len(path),
+            optimal=optimal,
+            gap=gap,
+            stats=stats,
+            validate=self.settings.debug_validation,
+        )
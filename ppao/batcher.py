@@ -0,0 +1,195 @@
+"""Asyncio micro-batching of single pipelines."""
+import asyncio
+import collections
+import concurrent.futures
+import dataclasses
+from typing import Deque, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+import numpy as np
+
+from ppao import exceptions, settings
+from ppao.custom_types import CompactSolution, Frequency, Solution
+from ppao.grouper import Grouper
+from ppao.matrix import SourceMatrix
+from ppao.solver import _solve_groups
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class Placement:
+    """Place of a submitted pipeline in the solution of its group.
+
+    Attributes:
+        solution: solution of the group.
+        pipeline: pipeline id of the submitted pipeline in the solution.
+    """
+
+    solution: Union[Solution, CompactSolution]
+    pipeline: int
+
+
+class Batcher:
+    """Collects pipelines submitted one by one into groups and solves them.
+
+    A group is popped from the Grouper as soon as group_size_limit
+    pipelines are waiting. The rest is flushed max_wait seconds after the
+    oldest waiting pipeline was submitted, pipelines which the Grouper
+    can't group are solved in groups of their own then. Groups are solved
+    in the executor, off the event loop. Equal pipelines are
+    interchangeable, so they get their places in the submission order.
+
+    Attributes:
+        settings: ppao settings.
+        max_wait: max seconds a pipeline waits for a group.
+        executor: executor solving groups, the default executor of the
+            event loop if None.
+    """
+
+    __slots__ = (
+        "settings",
+        "max_wait",
+        "executor",
+        "_grouper",
+        "_waiters",
+        "_waiting_number",
+        "_timer",
+        "_tasks",
+    )
+
+    def __init__(
+        self,
+        settings_: settings.Settings = settings.DEFAULT_SETTINGS,
+        max_wait: float = 0.005,
+        executor: Optional[concurrent.futures.Executor] = None,
+    ) -> None:
+        if not isinstance(max_wait, (int, float)) or max_wait < 0:
+            raise exceptions.MaxWaitValidationError()
+        self.settings = settings_
+        self.max_wait = max_wait
+        self.executor = executor
+        self._grouper = Grouper(settings_=settings_)
+        # futures of waiting pipelines in the submission order
+        self._waiters: Dict[
+            Tuple[int, ...], Deque[asyncio.Future]
+        ] = collections.defaultdict(collections.deque)
+        self._waiting_number = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, pipeline: Sequence[int]) -> Placement:
+        """Add a pipeline and wait for the solution of its group.
+
+        :param pipeline: operations of the pipeline.
+        :return: place of the pipeline in the solution.
+        """
+        loop = asyncio.get_running_loop()
+        self._grouper.add([pipeline])
+        future = loop.create_future()
+        key = tuple(
+            np.asarray(pipeline, dtype=self.settings.default_dtype).tolist()
+        )
+        self._waiters[key].append(future)
+        self._waiting_number += 1
+        if self._waiting_number >= self.settings.group_size_limit:
+            self._pop_full_groups()
+        if self._waiting_number and self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._pop_all)
+        return await future
+
+    async def flush(self) -> None:
+        """Solve all waiting pipelines and wait for their solutions."""
+        self._pop_all()
+        if self._tasks:
+            await asyncio.wait(self._tasks)
+
+    def _pop_full_groups(self) -> None:
+        while self._waiting_number >= self.settings.group_size_limit:
+            source_matrix = self._grouper.pop()
+            if source_matrix is None:
+                return
+            self._dispatch(source_matrix)
+        if not self._waiting_number and self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _pop_all(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        for source_matrix in self._grouper.pop_many():
+            self._dispatch(source_matrix)
+        if not self._waiting_number:
+            return
+        remaining = self._grouper.pipelines
+        self._grouper = Grouper(settings_=self.settings)
+        for start in range(
+            0, remaining.shape[0], self.settings.group_size_limit
+        ):
+            self._dispatch(
+                self._make_group(
+                    remaining[start : start + self.settings.group_size_limit]
+                )
+            )
+
+    def _make_group(self, pipelines: np.ndarray) -> SourceMatrix:
+        """Make a group of pipelines which the Grouper can't group."""
+        operations = pipelines[pipelines != 0]
+        frequencies = collections.Counter(operations.tolist())
+        # an absent operation gives zero shifts to all pipelines
+        most_common = {
+            operation
+            for operation, _ in frequencies.most_common(
+                self.settings.common_ops_bound
+            )
+        } or {1}
+        return SourceMatrix.trusted(
+            from_array=pipelines,
+            frequency=Frequency.trusted(
+                total=max(operations.size, 1),
+                most_common=most_common,
+                validate=self.settings.debug_validation,
+            ),
+            settings_=self.settings,
+        )
+
+    def _dispatch(self, source_matrix: SourceMatrix) -> None:
+        pipelines = np.asarray(source_matrix)
+        futures = []
+        for row in map(tuple, pipelines.tolist()):
+            waiters = self._waiters[row]
+            futures.append(waiters.popleft())
+            if not waiters:
+                del self._waiters[row]
+        self._waiting_number -= len(futures)
+        task = asyncio.get_running_loop().create_task(
+            self._solve(
+                (
+                    pipelines,
+                    int(source_matrix.total_operations),
+                    tuple(source_matrix.most_common.tolist()),
+                ),
+                futures,
+            )
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _solve(
+        self,
+        group: Tuple[np.ndarray, int, Tuple[int, ...]],
+        futures: List[asyncio.Future],
+    ) -> None:
+        try:
+            ((_, result),) = await asyncio.get_running_loop().run_in_executor(
+                self.executor, _solve_groups, [(0, group)], self.settings
+            )
+        except Exception as error:
+            result = error
+        for pipeline, future in enumerate(futures):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(
+                    Placement(solution=result, pipeline=pipeline)
+                )
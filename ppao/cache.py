@@ -0,0 +1,397 @@
+"""Caching of solutions for equivalent groups."""
+import collections
+import dataclasses
+import itertools
+from typing import Callable, Generator, Hashable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ppao import constants, exceptions, settings
+from ppao.custom_types import (
+    CompactSolution,
+    ExecutionUnit,
+    Frequency,
+    Solution,
+)
+from ppao.matrix import SourceMatrix
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class CanonicalMatrix:
+    """SourceMatrix with canonical operation labels and sorted rows.
+
+    Groups which differ only in the row order or in concrete operation ids
+    have the same canonical matrix. Operations are split into classes by
+    their positions in the rows (colour refinement) and the order of
+    classes gives labels. Ties are broken by individualizing operations,
+    the smallest of the matrices found this way is canonical. Only
+    constants.CANONICAL_ORDERS_LIMIT of them are compared, so highly
+    symmetric groups may miss an equivalent entry. Operations used by one
+    row only are never individualized, they are labeled by the first
+    appearance in the sorted rows instead. Zero is never relabeled.
+
+    Attributes:
+        key: hashable representation of the canonical matrix.
+        source_matrix: canonical SourceMatrix.
+        rows: original row index of every canonical row.
+        operations: original operation id of every canonical label.
+    """
+
+    key: Hashable
+    source_matrix: SourceMatrix
+    rows: np.ndarray
+    operations: np.ndarray
+
+    @classmethod
+    def from_source_matrix(
+        cls,
+        source_matrix: SourceMatrix,
+        settings_: settings.Settings = settings.DEFAULT_SETTINGS,
+    ) -> "CanonicalMatrix":
+        matrix = np.asarray(source_matrix)
+        most_common_operations = set(source_matrix.most_common.tolist())
+        operations = np.unique(np.concatenate(((0,), matrix.ravel())))
+        indexes = np.searchsorted(operations, matrix)
+        rows_numbers = np.zeros(operations.size, dtype=np.intp)
+        for row in indexes:
+            rows_numbers[np.unique(row)] += 1
+        private = rows_numbers == 1
+        private[0] = False
+        candidates = cls._iterate_candidates(
+            indexes,
+            private,
+            keys=[
+                (bool(x), bool(is_private), x in most_common_operations)
+                for x, is_private in zip(
+                    operations.tolist(), private, strict=True
+                )
+            ],
+        )
+        _, labels, rows, order = min(
+            itertools.islice(candidates, constants.CANONICAL_ORDERS_LIMIT),
+            key=lambda candidate: candidate[0],
+        )
+        operations = operations[list(order)]
+        # the most common operations which are absent in the group all
+        # give zero shifts, so they share one label after the last one
+        label_of = {x: key for key, x in enumerate(operations.tolist())}
+        most_common = frozenset(
+            label_of.get(x, len(operations)) for x in most_common_operations
+        )
+        canonical_matrix = SourceMatrix.trusted(
+            from_array=labels.astype(settings_.default_dtype),
+            frequency=Frequency.trusted(
+                total=source_matrix.total_operations,
+                most_common=set(most_common),
+                validate=settings_.debug_validation,
+            ),
+            settings_=settings_,
+        )
+        key = (
+            labels.shape,
+            labels.astype(np.uint32).tobytes(),
+            tuple(sorted(most_common)),
+            settings_,
+        )
+        return cls(
+            key=key,
+            source_matrix=canonical_matrix,
+            rows=rows,
+            operations=operations,
+        )
+
+    @staticmethod
+    def _get_colors(indexes: np.ndarray, initial: List[Hashable]) -> List[int]:
+        """Refine operation classes until they stop splitting.
+
+        :param indexes: matrix of operation indexes.
+        :param initial: initial class keys of operations.
+        :return: class of every operation.
+        """
+        occurrences: List[List[Tuple[int, int]]] = [[] for _ in initial]
+        for row_index, row in enumerate(indexes.tolist()):
+            for item_index, operation in enumerate(row):
+                occurrences[operation].append((row_index, item_index))
+        keys = initial
+        while True:
+            ranks = {key: rank for rank, key in enumerate(sorted(set(keys)))}
+            colors = [ranks[key] for key in keys]
+            row_keys = [
+                tuple(colors[operation] for operation in row)
+                for row in indexes.tolist()
+            ]
+            row_ranks = {
+                key: rank for rank, key in enumerate(sorted(set(row_keys)))
+            }
+            keys = [
+                (
+                    color,
+                    tuple(
+                        sorted(
+                            (row_ranks[row_keys[row_index]], item_index)
+                            for row_index, item_index in occurrences[key]
+                        )
+                    ),
+                )
+                for key, color in enumerate(colors)
+            ]
+            if len(set(keys)) == len(ranks):
+                return colors
+
+    @classmethod
+    def _iterate_candidates(
+        cls,
+        indexes: np.ndarray,
+        private: np.ndarray,
+        keys: List[Hashable],
+    ) -> Generator[
+        Tuple[bytes, np.ndarray, np.ndarray, Tuple[int, ...]], None, None
+    ]:
+        """Individualize operations of the smallest class one by one and
+        refine the classes again until every class has one operation.
+
+        If a branch gives the same matrix as the first leaf of the first
+        branch, both branches are symmetric and the rest is skipped.
+
+        :param indexes: matrix of operation indexes.
+        :param private: mask of operations used by one row only.
+        :param keys: initial class keys of operations.
+        :return: generator of relabeled matrices with sorted rows, their
+        row order and operation order.
+        """
+        colors = cls._get_colors(indexes, keys)
+        classes = collections.defaultdict(list)
+        for operation, color in enumerate(colors):
+            classes[color].append(operation)
+        ties = min(
+            (
+                operations
+                for operations in classes.values()
+                if not private[operations[0]]
+            ),
+            key=lambda operations: (len(operations) < 2, len(operations)),
+        )
+        if len(ties) < 2:
+            yield cls._get_leaf(indexes, private, colors)
+            return
+        first_leaf = None
+        for tie_index, tie in enumerate(ties):
+            for candidate in cls._iterate_candidates(
+                indexes,
+                private,
+                [
+                    (color, operation != tie)
+                    for operation, color in enumerate(colors)
+                ],
+            ):
+                yield candidate
+                if first_leaf is None:
+                    first_leaf = candidate[0]
+                elif tie_index and candidate[0] == first_leaf:
+                    break
+
+    @staticmethod
+    def _get_leaf(
+        indexes: np.ndarray, private: np.ndarray, colors: List[int]
+    ) -> Tuple[bytes, np.ndarray, np.ndarray, Tuple[int, ...]]:
+        """Relabel the matrix by the discrete classes of shared operations.
+
+        Private operations of one class are interchangeable, so rows are
+        sorted by their classes and private operations are labeled by the
+        first appearance in the sorted rows.
+        """
+        shared = tuple(
+            sorted(np.flatnonzero(~private).tolist(), key=colors.__getitem__)
+        )
+        labels = np.array(colors, dtype=np.intp) + len(colors)
+        labels[list(shared)] = np.arange(len(shared))
+        rows = np.lexsort(labels[indexes].T[::-1])
+        sorted_indexes = indexes[rows].ravel()
+        order = shared + tuple(
+            dict.fromkeys(sorted_indexes[private[sorted_indexes]].tolist())
+        )
+        labels[list(order)] = np.arange(len(order))
+        matrix_labels = labels[indexes[rows]]
+        return matrix_labels.tobytes(), matrix_labels, rows, order
+
+    def to_original(
+        self,
+        solution: Union[Solution, CompactSolution],
+        rows: Optional[np.ndarray] = None,
+    ) -> Union[Solution, CompactSolution]:
+        """Map a solution of the canonical matrix to the original one.
+
+        Possible shifts depend on the row order, so an optimal solution
+        found for another row order is optimal for this one only if it
+        reaches the lower bound.
+
+        :param solution: solution of the canonical matrix.
+        :param rows: rows of the canonical matrix the solution was found
+            for, the same rows as this one by default.
+        :return: solution with original pipeline indexes and operation ids.
+        """
+        optimal, gap = solution.optimal, solution.gap
+        if rows is not None and not self.has_row_order(rows):
+            lower_bound = self.source_matrix.get_lower_bound()
+            optimal = solution.result <= lower_bound
+            gap = 0 if optimal else solution.result - lower_bound
+        return self._remap(
+            solution, self.rows, self.operations.__getitem__, optimal, gap
+        )
+
+    def has_row_order(self, rows: np.ndarray) -> bool:
+        """
+        :param rows: original row index of every canonical row of an
+            equivalent matrix.
+        :return: the equivalent matrix has the same rows in the same order
+        up to operation labels.
+        """
+        matrix = np.asarray(self.source_matrix)
+        return bool(
+            (matrix[np.argsort(rows)] == matrix[np.argsort(self.rows)]).all()
+        )
+
+    def to_canonical(
+        self, solution: Union[Solution, CompactSolution]
+    ) -> Union[Solution, CompactSolution]:
+        """Map a solution of the original matrix to the canonical one.
+
+        :param solution: solution of the original matrix.
+        :return: solution with canonical pipeline indexes and labels.
+        """
+        order = np.argsort(self.operations)
+        return self._remap(
+            solution,
+            np.argsort(self.rows),
+            lambda operations: order[
+                np.searchsorted(self.operations, operations, sorter=order)
+            ],
+            solution.optimal,
+            solution.gap,
+        )
+
+    def _remap(
+        self,
+        solution: Union[Solution, CompactSolution],
+        rows: np.ndarray,
+        relabel: Callable[[np.ndarray], np.ndarray],
+        optimal: bool,
+        gap: int,
+    ) -> Union[Solution, CompactSolution]:
+        """
+        :param solution: solution to map.
+        :param rows: new index of every pipeline.
+        :param relabel: new ids of operations.
+        :param optimal: the mapped solution is proven optimal.
+        :param gap: gap of the mapped solution.
+        :return: solution with new pipeline indexes and operation ids.
+        """
+        dtype = self.source_matrix.settings.default_dtype
+        validate = self.source_matrix.settings.debug_validation
+        shifts = np.empty_like(solution.shifts)
+        shifts[rows] = solution.shifts
+        if isinstance(solution, CompactSolution):
+            return CompactSolution.trusted(
+                operations=relabel(solution.operations).astype(dtype),
+                offsets=solution.offsets,
+                pipelines=rows[solution.pipelines].astype(dtype),
+                shifts=shifts,
+                result=solution.result,
+                optimal=optimal,
+                gap=gap,
+                stats=solution.stats,
+                validate=validate,
+            )
+        return Solution.trusted(
+            execution_units=tuple(
+                ExecutionUnit.trusted(
+                    operation=int(relabel(execution_unit.operation)),
+                    pipelines=rows[execution_unit.pipelines].astype(dtype),
+                    validate=validate,
+                )
+                for execution_unit in solution
+            ),
+            shifts=shifts,
+            result=solution.result,
+            optimal=optimal,
+            gap=gap,
+            stats=solution.stats,
+            validate=validate,
+        )
+
+
+class PlanCache:
+    """LRU cache of solutions keyed by CanonicalMatrix.
+
+    A miss solves the caller's matrix, so its solution is the same as
+    without a cache, and caches it mapped to the canonical matrix. A hit
+    remaps the cached solution to the caller's pipeline indexes and
+    operation ids. Possible shifts depend on the row order, so a hit for
+    a group whose rows come in another order gets a valid plan which may
+    differ from the solution of a solver without a cache, its result
+    included. Such a hit is optimal only if its result reaches the lower
+    bound, otherwise its gap is the distance to the bound. Solutions
+    which are not proven optimal are not cached. A cached solution keeps
+    the SolveStats of the solve which made it.
+
+    Attributes:
+        maxsize: max number of cached solutions.
+        hits: number of solutions found in the cache.
+        misses: number of solutions computed by the solver.
+    """
+
+    __slots__ = (
+        "maxsize",
+        "hits",
+        "misses",
+        "_solutions",
+    )
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        if not isinstance(maxsize, int) or maxsize < 1:
+            raise exceptions.PlanCacheSizeValidationError()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._solutions: collections.OrderedDict = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._solutions)
+
+    def clear(self) -> None:
+        """Remove all cached solutions and reset the counters."""
+        self._solutions.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def solve(
+        self,
+        source_matrix: SourceMatrix,
+        settings_: settings.Settings,
+        solve: Callable[[SourceMatrix], Union[Solution, CompactSolution]],
+    ) -> Union[Solution, CompactSolution]:
+        """Get the solution from the cache or solve and cache it.
+
+        :param source_matrix: matrix to solve.
+        :param settings_: ppao settings.
+        :param solve: function solving a SourceMatrix.
+        :return: solution of the source matrix.
+        """
+        canonical_matrix = CanonicalMatrix.from_source_matrix(
+            source_matrix, settings_
+        )
+        cached = self._solutions.get(canonical_matrix.key)
+        if cached is None:
+            self.misses += 1
+            solution = solve(source_matrix)
+            if solution.optimal:
+                self._solutions[canonical_matrix.key] = (
+                    canonical_matrix.to_canonical(solution),
+                    canonical_matrix.rows,
+                )
+                if len(self._solutions) > self.maxsize:
+                    self._solutions.popitem(last=False)
+            return solution
+        self.hits += 1
+        self._solutions.move_to_end(canonical_matrix.key)
+        return canonical_matrix.to_original(*cached)
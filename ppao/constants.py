@@ -1,5 +1,5 @@
 """Reusable constants."""
-from typing import Sequence
+from typing import Sequence, Tuple
 
 # The only acceptable dtypes of ppao matrix.
 ACCEPTABLE_DEFAULT_DTYPE: Sequence[str] = (
@@ -22,3 +22,94 @@ ACCEPTABLE_DEFAULT_SHIFT_ARRAY_DTYPE: Sequence[str] = (
     "int8",
     "int16",
 )
+
+# The only acceptable shift search engines.
+ACCEPTABLE_SOLVER_ENGINES: Sequence[str] = (
+    "exhaustive",
+    "branch_and_bound",
+    "local_search",
+)
+
+# Engines which don't guarantee the optimal result. They scale to the
+# bigger group and pipeline size limits below.
+HEURISTIC_SOLVER_ENGINES: Sequence[str] = ("local_search",)
+
+# Max group_size_limit and pipeline_size_limit of the exact engines.
+EXACT_GROUP_SIZE_LIMIT: int = 32
+EXACT_PIPELINE_SIZE_LIMIT: int = 5
+
+# Max group_size_limit and pipeline_size_limit of the heuristic engines.
+# Shifts fit into int8, Settings checks that pipeline ids fit into
+# default_dtype.
+HEURISTIC_GROUP_SIZE_LIMIT: int = 1024
+HEURISTIC_PIPELINE_SIZE_LIMIT: int = 64
+
+# Max number of passes of the local search engine.
+LOCAL_SEARCH_PASSES_LIMIT: int = 16
+
+# Max number of operation orders compared to find a canonical matrix.
+CANONICAL_ORDERS_LIMIT: int = 256
+
+# Min number of shift combinations scored by several processes if
+# Settings.scoring_workers > 1, smaller groups are scored serially.
+PARALLEL_SCORING_MIN_COMBINATIONS: int = 1 << 16
+
+# Number of combination shards per scoring process, several shards per
+# process balance the work left after deduplication.
+SCORING_SHARDS_PER_WORKER: int = 4
+
+# Max number of combinations scored between deadline checks of the
+# exhaustive engine.
+DEADLINE_CHUNK_SIZE: int = 4096
+
+# Number of branches between deadline checks of the branch and bound
+# engine.
+DEADLINE_CHECK_INTERVAL: int = 1024
+
+# Max number of states expanded by the exact search of
+# SupersequenceSolver, the beam search finishes bigger searches.
+ALIGNMENT_STATES_LIMIT: int = 100_000
+
+# Number of states kept at every step of the SupersequenceSolver beam
+# search.
+ALIGNMENT_BEAM_WIDTH: int = 64
+
+# Version of the solver output. Bump it when solutions change, plans
+# persisted by an older version are dropped by PlanStore.
+SOLVER_VERSION: int = 2
+
+# Version of the PlanStore file layout.
+PLAN_STORE_FORMAT_VERSION: int = 4
+
+# Settings which change solutions, the rest does not split PlanStore
+# keys.
+PLAN_KEY_SETTINGS: Tuple[str, ...] = (
+    "common_ops_percent_bound",
+    "common_ops_bound",
+    "group_size_limit",
+    "pipeline_size_limit",
+    "default_dtype",
+    "default_shift_array_dtype",
+    "default_array_type_code",
+    "solver_engine",
+)
+
+# Version of the binary layout of ppao.wire buffers.
+WIRE_FORMAT_VERSION: int = 1
+
+# Names of the PlanStore files.
+PLAN_STORE_INDEX_FILE: str = "index"
+PLAN_STORE_DATA_FILE: str = "data"
+
+# Initial number of Grouper backlog slots.
+GROUPER_INITIAL_CAPACITY: int = 64
+
+# Phases of PipelineMatrixSolver timed by SolveStats: possible shifts,
+# shift search, horizontal sequence and horizontal optimization.
+SOLVE_PHASES: Tuple[str, ...] = ("shifts", "search", "sequence", "optimize")
+
+# Percentiles of wait times reported by Grouper.stats().
+GROUPER_WAIT_PERCENTILES: Tuple[float, ...] = (50, 90, 99)
+
+# Default number of the most frequent operations in Grouper.stats().
+GROUPER_STATS_TOP_OPERATIONS: int = 10
@@ -1,7 +1,19 @@
 """Classes for data validation."""
 import collections
+import collections.abc
 import dataclasses
-from typing import Any, Sequence, Set
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+    overload,
+)
 
 import numpy as np
 
@@ -30,6 +42,21 @@ class ExecutionUnit:
         if self.pipelines.size == 0:
             raise exceptions.CustomTypeEmptyArrayError()
 
+    @classmethod
+    def trusted(
+        cls, operation: int, pipelines: np.ndarray, validate: bool = False
+    ) -> "ExecutionUnit":
+        """Create an execution unit of data made by ppao itself.
+
+        :param validate: validate it anyway.
+        """
+        if validate:
+            return cls(operation=operation, pipelines=pipelines)
+        execution_unit = object.__new__(cls)
+        execution_unit.operation = operation
+        execution_unit.pipelines = pipelines
+        return execution_unit
+
 
 @dataclasses.dataclass(slots=True, frozen=True)
 class Frequency:
@@ -57,6 +84,67 @@ class Frequency:
         if not self.most_common:
             raise exceptions.MostCommonIsEmptyError()
 
+    @classmethod
+    def trusted(
+        cls, total: int, most_common: Set[int], validate: bool = False
+    ) -> "Frequency":
+        """Create a frequency of data made by ppao itself.
+
+        :param validate: validate it anyway.
+        """
+        if validate:
+            return cls(total=total, most_common=most_common)
+        frequency = object.__new__(cls)
+        object.__setattr__(frequency, "total", total)
+        object.__setattr__(frequency, "most_common", most_common)
+        return frequency
+
+
+@dataclasses.dataclass(slots=True, frozen=True)
+class SolveStats:
+    """Size of the search of a solution and what it saved.
+
+    Attributes:
+        possible_shifts: number of possible shifts of every matrix row.
+        combinations: size of the Cartesian product of possible shifts.
+        scored_combinations: number of complete shift combinations whose
+            result has been counted by the search engine. Local search
+            counts the greedy combination and every one-row move it
+            tries, so a combination met again in a later pass is counted
+            again.
+        skipped_combinations: number of combinations skipped as
+            equivalent.
+        total_operations: number of operations of the matrix, that is
+            the number of handler calls without optimization.
+        execution_units: number of execution units of the solution.
+        handler_calls: number of execution units of nonzero operations.
+        timings: seconds spent in every phase of the solve.
+    """
+
+    possible_shifts: Tuple[int, ...]
+    combinations: int
+    scored_combinations: int
+    skipped_combinations: int
+    total_operations: int
+    execution_units: int
+    handler_calls: int
+    timings: Dict[str, float]
+
+    @property
+    def pruned_combinations(self) -> int:
+        """Combinations which have been neither scored nor skipped."""
+        return max(
+            self.combinations
+            - self.scored_combinations
+            - self.skipped_combinations,
+            0,
+        )
+
+    @property
+    def saved_calls(self) -> int:
+        """Handler calls saved by the solution."""
+        return self.total_operations - self.handler_calls
+
 
 class Solution(collections.UserList):
     """List of ExecutionUnit elements.
@@ -66,11 +154,19 @@ class Solution(collections.UserList):
     Attributes:
         shifts: an array of shifts of the solution matrix.
         result: number of ExecutionUnit elements.
+        optimal: the result is proven to be the best one.
+        gap: upper bound of the difference between the result and the best
+            result, 0 if the result is optimal.
+        stats: statistics of the solve, None if the solution is not made
+            by a solver.
     """
 
     __slots__ = (
         "shifts",
         "result",
+        "optimal",
+        "gap",
+        "stats",
     )
 
     def __init__(
@@ -79,18 +175,61 @@ class Solution(collections.UserList):
         shifts: np.ndarray,
         result: int,
         *args: Any,
+        optimal: bool = True,
+        gap: int = 0,
+        stats: Optional[SolveStats] = None,
         **kwargs: Any,
     ) -> None:
         super().__init__(*args, **kwargs)
         self.shifts = shifts
         self.result = result
+        self.optimal = optimal
+        self.gap = gap
+        self.stats = stats
         self._validation()
         self.extend(execution_units)
 
+    @classmethod
+    def trusted(
+        cls,
+        execution_units: Sequence[ExecutionUnit],
+        shifts: np.ndarray,
+        result: int,
+        optimal: bool = True,
+        gap: int = 0,
+        stats: Optional[SolveStats] = None,
+        validate: bool = False,
+    ) -> "Solution":
+        """Create a solution of data made by ppao itself.
+
+        :param validate: validate it anyway.
+        """
+        if validate:
+            return cls(
+                execution_units=execution_units,
+                shifts=shifts,
+                result=result,
+                optimal=optimal,
+                gap=gap,
+                stats=stats,
+            )
+        solution = object.__new__(cls)
+        solution.data = list(execution_units)
+        solution.shifts = shifts
+        solution.result = result
+        solution.optimal = optimal
+        solution.gap = gap
+        solution.stats = stats
+        return solution
+
     def _validation(self) -> None:
         """Attribute validation."""
-        if (not isinstance(self.shifts, np.ndarray)) or (
-            not isinstance(self.result, int)
+        if (
+            (not isinstance(self.shifts, np.ndarray))
+            or (not isinstance(self.result, int))
+            or (not isinstance(self.optimal, bool))
+            or (not isinstance(self.gap, int))
+            or (not isinstance(self.stats, (SolveStats, type(None))))
         ):
             raise exceptions.CustomTypeAttributeTypeValidationError()
         if self.shifts.size == 0:
@@ -117,3 +256,214 @@ class Solution(collections.UserList):
         for value in values:
             self.check(value)
             self.data.append(value)
+
+
+class CompactSolution(collections.abc.Sequence):
+    """Solution kept in three flat arrays instead of ExecutionUnit objects.
+
+    ExecutionUnit views of the arrays are created on access, pipelines of
+    a unit are a slice of the pipelines array.
+
+    Attributes:
+        operations: operation id of every execution unit.
+        offsets: start of the pipelines of every execution unit in the
+            pipelines array, and the size of the array at the end.
+        pipelines: pipeline ids of all execution units.
+        shifts: an array of shifts of the solution matrix.
+        result: number of ExecutionUnit elements.
+        optimal: the result is proven to be the best one.
+        gap: upper bound of the difference between the result and the best
+            result, 0 if the result is optimal.
+        stats: statistics of the solve, None if the solution is not made
+            by a solver.
+    """
+
+    __slots__ = (
+        "operations",
+        "offsets",
+        "pipelines",
+        "shifts",
+        "result",
+        "optimal",
+        "gap",
+        "stats",
+    )
+
+    def __init__(
+        self,
+        operations: np.ndarray,
+        offsets: np.ndarray,
+        pipelines: np.ndarray,
+        shifts: np.ndarray,
+        result: int,
+        optimal: bool = True,
+        gap: int = 0,
+        stats: Optional[SolveStats] = None,
+    ) -> None:
+        self.operations = operations
+        self.offsets = offsets
+        self.pipelines = pipelines
+        self.shifts = shifts
+        self.result = result
+        self.optimal = optimal
+        self.gap = gap
+        self.stats = stats
+        self._validation()
+
+    def _validation(self) -> None:
+        """Attribute validation."""
+        if (
+            not all(
+                isinstance(array_, np.ndarray)
+                for array_ in (
+                    self.operations,
+                    self.offsets,
+                    self.pipelines,
+                    self.shifts,
+                )
+            )
+            or (not isinstance(self.result, int))
+            or (not isinstance(self.optimal, bool))
+            or (not isinstance(self.gap, int))
+            or (not isinstance(self.stats, (SolveStats, type(None))))
+            or self.offsets.shape != (self.operations.size + 1,)
+            or self.offsets[0] != 0
+            or self.offsets[-1] != self.pipelines.size
+        ):
+            raise exceptions.CustomTypeAttributeTypeValidationError()
+        if self.shifts.size == 0 or (np.diff(self.offsets) <= 0).any():
+            raise exceptions.CustomTypeEmptyArrayError()
+
+    @classmethod
+    def trusted(
+        cls,
+        operations: np.ndarray,
+        offsets: np.ndarray,
+        pipelines: np.ndarray,
+        shifts: np.ndarray,
+        result: int,
+        optimal: bool = True,
+        gap: int = 0,
+        stats: Optional[SolveStats] = None,
+        validate: bool = False,
+    ) -> "CompactSolution":
+        """Create a solution of data made by ppao itself.
+
+        :param validate: validate it anyway.
+        """
+        if validate:
+            return cls(
+                operations=operations,
+                offsets=offsets,
+                pipelines=pipelines,
+                shifts=shifts,
+                result=result,
+                optimal=optimal,
+                gap=gap,
+                stats=stats,
+            )
+        solution = object.__new__(cls)
+        solution.operations = operations
+        solution.offsets = offsets
+        solution.pipelines = pipelines
+        solution.shifts = shifts
+        solution.result = result
+        solution.optimal = optimal
+        solution.gap = gap
+        solution.stats = stats
+        return solution
+
+    @classmethod
+    def from_execution_units(
+        cls,
+        execution_units: Sequence[ExecutionUnit],
+        shifts: np.ndarray,
+        result: int,
+        dtype: str,
+        optimal: bool = True,
+        gap: int = 0,
+        stats: Optional[SolveStats] = None,
+    ) -> "CompactSolution":
+        """
+        :param dtype: dtype of operations and pipelines arrays.
+        """
+        offsets = np.zeros(len(execution_units) + 1, dtype=np.int64)
+        np.cumsum(
+            [unit.pipelines.size for unit in execution_units],
+            out=offsets[1:],
+        )
+        return cls(
+            operations=np.array(
+                [unit.operation for unit in execution_units], dtype=dtype
+            ),
+            offsets=offsets,
+            pipelines=np.concatenate(
+                [np.empty(0, dtype=dtype)]
+                + [unit.pipelines for unit in execution_units]
+            ).astype(dtype, copy=False),
+            shifts=shifts,
+            result=result,
+            optimal=optimal,
+            gap=gap,
+            stats=stats,
+        )
+
+    @classmethod
+    def from_solution(
+        cls, solution: "Solution", dtype: str
+    ) -> "CompactSolution":
+        return cls.from_execution_units(
+            solution,
+            shifts=solution.shifts,
+            result=solution.result,
+            dtype=dtype,
+            optimal=solution.optimal,
+            gap=solution.gap,
+            stats=solution.stats,
+        )
+
+    def to_solution(self) -> Solution:
+        return Solution.trusted(
+            execution_units=list(self),
+            shifts=self.shifts,
+            result=self.result,
+            optimal=self.optimal,
+            gap=self.gap,
+            stats=self.stats,
+        )
+
+    def __len__(self) -> int:
+        return self.operations.size
+
+    @overload
+    def __getitem__(self, index_: int) -> ExecutionUnit:
+        ...
+
+    @overload
+    def __getitem__(self, index_: slice) -> List[ExecutionUnit]:
+        ...
+
+    def __getitem__(
+        self, index_: Union[int, slice]
+    ) -> Union[ExecutionUnit, List[ExecutionUnit]]:
+        if isinstance(index_, slice):
+            return [self[key] for key in range(len(self))[index_]]
+        key = range(len(self))[index_]
+        return ExecutionUnit.trusted(
+            operation=int(self.operations[key]),
+            pipelines=self.pipelines[
+                self.offsets[key] : self.offsets[key + 1]
+            ],
+        )
+
+    def __iter__(self) -> Iterator[ExecutionUnit]:
+        operations = self.operations.tolist()
+        offsets = self.offsets.tolist()
+        for key, operation in enumerate(operations):
+            yield ExecutionUnit.trusted(
+                operation=operation,
+                pipelines=self.pipelines[offsets[key] : offsets[key + 1]],
+            )
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({list(self)!r})"
@@ -0,0 +1,473 @@
+"""Search engines of the best shift combination."""
+import concurrent.futures
+import math
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ppao import constants, settings, tracing
+from ppao.custom_types import Frequency
+from ppao.matrix import SourceMatrix
+
+# the best result of a range of combinations, its index in
+# get_all_combinations and shifts, the number of scored combinations and
+# whether the range is complete
+_Shard = Tuple[Optional[int], Optional[int], Optional[np.ndarray], int, bool]
+
+
+class BaseEngine:
+    """The base class of shift search engines.
+
+    Attributes:
+        source_matrix: pipelines matrix array.
+        possible_shifts: possible shifts of every matrix row.
+        settings: ppao settings.
+        deadline: time.monotonic() value to stop the search at, the best
+            shifts found by then are returned.
+        skipped_combinations: number of combinations skipped as equivalent.
+        scored_combinations: number of complete combinations whose result
+            has been counted, incrementally by the cells engines.
+        optimal: the last search is complete or its result is proven
+            optimal by the lower bound.
+    """
+
+    __slots__ = (
+        "source_matrix",
+        "possible_shifts",
+        "settings",
+        "deadline",
+        "skipped_combinations",
+        "scored_combinations",
+        "optimal",
+    )
+
+    def __init__(
+        self,
+        source_matrix: SourceMatrix,
+        possible_shifts: Sequence[Tuple[int, ...]],
+        settings_: settings.Settings = settings.DEFAULT_SETTINGS,
+        deadline: Optional[float] = None,
+    ) -> None:
+        self.source_matrix = source_matrix
+        self.possible_shifts = tuple(possible_shifts)
+        self.settings = settings_
+        self.deadline = deadline
+        self.skipped_combinations = 0
+        self.scored_combinations = 0
+        self.optimal = True
+
+    def search(self) -> Tuple[np.ndarray, int]:
+        """
+        :return: the best shifts and their result.
+        """
+        raise NotImplementedError
+
+    def _is_expired(self) -> bool:
+        return self.deadline is not None and time.monotonic() >= self.deadline
+
+
+class ExhaustiveEngine(BaseEngine):
+    """Scores the whole Cartesian product of possible shifts.
+
+    Combinations are enumerated and scored block by block, a block fits
+    into settings.combinations_memory_limit. If
+    settings.deduplicate_combinations is enabled, only canonical
+    combinations are enumerated, translation-equivalent and row-symmetric
+    ones are skipped without being generated.
+
+    If settings.scoring_workers > 1 and there are at least
+    constants.PARALLEL_SCORING_MIN_COMBINATIONS combinations, contiguous
+    shards of the enumeration are scored in a process pool. The best
+    result with the smallest enumeration index wins, so the answer is the
+    same as the serial one. The memory budget applies to every worker.
+
+    With a deadline, the local search result is taken first and blocks
+    are limited to constants.DEADLINE_CHUNK_SIZE combinations, the
+    deadline is checked between blocks. An incomplete search is optimal
+    only if its result reaches the lower bound.
+    """
+
+    __slots__ = ("_pieces",)
+
+    def __init__(
+        self,
+        source_matrix: SourceMatrix,
+        possible_shifts: Sequence[Tuple[int, ...]],
+        settings_: settings.Settings = settings.DEFAULT_SETTINGS,
+        deadline: Optional[float] = None,
+    ) -> None:
+        super().__init__(source_matrix, possible_shifts, settings_, deadline)
+        # canonical pieces, None if no combination is skipped
+        self._pieces = None
+        if self.settings.deduplicate_combinations:
+            pieces = self.source_matrix.get_canonical_pieces(
+                self.possible_shifts
+            )
+            if self.source_matrix.count_canonical_combinations(
+                pieces
+            ) < math.prod(map(len, self.possible_shifts)):
+                self._pieces = pieces
+
+    def search(self) -> Tuple[np.ndarray, int]:
+        incumbent = None
+        if self.deadline is not None:
+            local_search = LocalSearchEngine(
+                self.source_matrix,
+                self.possible_shifts,
+                self.settings,
+                self.deadline,
+            )
+            incumbent = local_search.search()
+            self.scored_combinations += local_search.scored_combinations
+        total = int(np.prod([len(shifts) for shifts in self.possible_shifts]))
+        if self._pieces is not None:
+            enumerated = self.source_matrix.count_canonical_combinations(
+                self._pieces
+            )
+            self.skipped_combinations += total - enumerated
+            total = enumerated
+        workers = self.settings.scoring_workers
+        if (
+            workers > 1
+            and total >= constants.PARALLEL_SCORING_MIN_COMBINATIONS
+        ):
+            shards = self._search_shards(total, workers)
+        else:
+            shards = [self.search_range(0, total)]
+        self.scored_combinations += sum(shard[3] for shard in shards)
+        self.optimal = all(shard[4] for shard in shards)
+        found = [shard for shard in shards if shard[0] is not None]
+        if found:
+            best_result, _, best_shifts, _, _ = min(
+                found, key=lambda shard: (shard[0], shard[1])
+            )
+            if self.optimal or incumbent[1] > best_result:
+                incumbent = best_shifts, best_result
+        if not self.optimal:
+            self.optimal = incumbent[1] <= self.source_matrix.get_lower_bound()
+        return incumbent
+
+    def _search_shards(self, total: int, workers: int) -> List[_Shard]:
+        bounds = np.linspace(
+            0,
+            total,
+            min(total, workers * constants.SCORING_SHARDS_PER_WORKER) + 1,
+        ).astype(np.int64)
+        matrix = np.asarray(self.source_matrix)
+        most_common = tuple(self.source_matrix.most_common.tolist())
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            futures = [
+                executor.submit(
+                    _search_shard,
+                    matrix,
+                    self.source_matrix.total_operations,
+                    most_common,
+                    self.settings,
+                    self.possible_shifts,
+                    self.deadline,
+                    int(start),
+                    int(stop),
+                )
+                for start, stop in zip(bounds[:-1], bounds[1:], strict=True)
+            ]
+            return [future.result() for future in futures]
+
+    def search_range(self, start: int, stop: int) -> _Shard:
+        """Score the combinations of one range of the enumeration.
+
+        :param start: index of the first combination.
+        :param stop: index after the last combination.
+        :return: the best result of the range, its index in
+        get_all_combinations and shifts, the number of scored combinations
+        and whether the range is complete. The result is None if no
+        combination is scored.
+        """
+        best_result, best_index, best_shifts = None, None, None
+        scored = 0
+        chunk_size = self.source_matrix.get_chunk_size(
+            self.possible_shifts, self.settings.combinations_memory_limit
+        )
+        if self.deadline is not None:
+            chunk_size = min(chunk_size, constants.DEADLINE_CHUNK_SIZE)
+        offset = start
+        if self._pieces is not None:
+            blocks = self.source_matrix.iter_canonical_combinations(
+                self._pieces, chunk_size, start, stop
+            )
+        else:
+            blocks = self.source_matrix.iter_combinations(
+                self.possible_shifts, chunk_size, start, stop
+            )
+        while True:
+            with tracing.span("search.enumerate") as span:
+                combinations = next(blocks, None)
+                if combinations is not None:
+                    span.set(combinations=combinations.shape[0])
+            if combinations is None:
+                break
+            if self._is_expired():
+                return best_result, best_index, best_shifts, scored, False
+            with tracing.span(
+                "search.score", combinations=combinations.shape[0]
+            ):
+                results = self.source_matrix.count_results(combinations)
+            scored += results.size
+            chunk_result = int(results.min())
+            if best_result is not None and chunk_result > best_result:
+                offset += combinations.shape[0]
+                continue
+            candidates = np.flatnonzero(results == chunk_result)
+            if self._pieces is not None:
+                # a canonical combination stands for its equivalence
+                # class, the first one of the class wins ties
+                shifts, indexes = self.source_matrix.get_first_equivalents(
+                    combinations[candidates], self.possible_shifts
+                )
+            else:
+                shifts, indexes = combinations[candidates], offset + candidates
+            offset += combinations.shape[0]
+            chunk_best = int(np.argmin(indexes))
+            if best_result is None or (
+                chunk_result,
+                int(indexes[chunk_best]),
+            ) < (best_result, best_index):
+                best_result = chunk_result
+                best_index = int(indexes[chunk_best])
+                best_shifts = shifts[chunk_best].copy()
+        return best_result, best_index, best_shifts, scored, True
+
+
+def _search_shard(
+    matrix: np.ndarray,
+    total_operations: int,
+    most_common: Tuple[int, ...],
+    settings_: settings.Settings,
+    possible_shifts: Sequence[Tuple[int, ...]],
+    deadline: Optional[float],
+    start: int,
+    stop: int,
+) -> _Shard:
+    """Score a shard of ExhaustiveEngine combinations in a worker process.
+
+    SourceMatrix attributes are lost by pickling, so it is rebuilt here.
+    """
+    source_matrix = SourceMatrix.trusted(
+        from_array=matrix,
+        frequency=Frequency.trusted(
+            total=total_operations,
+            most_common=set(most_common),
+            validate=settings_.debug_validation,
+        ),
+        settings_=settings_,
+    )
+    return ExhaustiveEngine(
+        source_matrix, possible_shifts, settings_, deadline
+    ).search_range(start, stop)
+
+
+class CellsEngine(BaseEngine):
+    """The base class of engines which place rows one by one.
+
+    Placed operations are counted per (column, operation) cell, so the
+    result of an assignment is the number of occupied cells.
+    """
+
+    __slots__ = (
+        "_rows",
+        "_order",
+        "_cells",
+    )
+
+    def __init__(
+        self,
+        source_matrix: SourceMatrix,
+        possible_shifts: Sequence[Tuple[int, ...]],
+        settings_: settings.Settings = settings.DEFAULT_SETTINGS,
+        deadline: Optional[float] = None,
+    ) -> None:
+        super().__init__(source_matrix, possible_shifts, settings_, deadline)
+        self._rows = tuple(
+            tuple(int(operation) for operation in row)
+            for row in np.asarray(source_matrix)
+        )
+        self._order = source_matrix.get_rows_order(len(self._rows))
+        self._cells: Dict[Tuple[int, int], int] = dict()
+
+    def _place(self, row_index: int, shift: int) -> int:
+        added = 0
+        for item_index, operation in enumerate(self._rows[row_index]):
+            key = (shift + item_index, operation)
+            count = self._cells.get(key, 0)
+            if not count:
+                added += 1
+            self._cells[key] = count + 1
+        return added
+
+    def _remove(self, row_index: int, shift: int) -> None:
+        for item_index, operation in enumerate(self._rows[row_index]):
+            key = (shift + item_index, operation)
+            count = self._cells[key] - 1
+            if count:
+                self._cells[key] = count
+            else:
+                del self._cells[key]
+
+    def _get_added(self, row_index: int, shift: int) -> int:
+        """Number of cells placing the row would occupy."""
+        return sum(
+            (shift + item_index, operation) not in self._cells
+            for item_index, operation in enumerate(self._rows[row_index])
+        )
+
+    def _place_greedily(self) -> Tuple[List[int], int]:
+        """Place every row with the shift adding the fewest cells.
+
+        :return: shifts of rows and their result, rows stay placed.
+        """
+        result = 0
+        shifts = [0] * len(self._rows)
+        for row_index in self._order:
+            best_added, best_shift = None, None
+            for shift in self.possible_shifts[row_index]:
+                added = self._get_added(row_index, shift)
+                if best_added is None or added < best_added:
+                    best_added, best_shift = added, shift
+            result += self._place(row_index, best_shift)
+            shifts[row_index] = best_shift
+        self.scored_combinations += 1
+        return shifts, result
+
+
+class BranchAndBoundEngine(CellsEngine):
+    """Assigns shifts row by row and prunes hopeless partial assignments.
+
+    Adding a row never decreases the number of distinct operations per
+    column, so the result of a partial assignment is its lower bound.
+    Rows are visited in the order of get_all_combinations, therefore the
+    first optimal combination is the same as in the exhaustive search.
+    The deadline is checked every constants.DEADLINE_CHECK_INTERVAL
+    branches, the greedy assignment is returned if nothing better is
+    found by then.
+    """
+
+    __slots__ = (
+        "_assignment",
+        "_best_result",
+        "_best_shifts",
+        "_branches",
+    )
+
+    def __init__(
+        self,
+        source_matrix: SourceMatrix,
+        possible_shifts: Sequence[Tuple[int, ...]],
+        settings_: settings.Settings = settings.DEFAULT_SETTINGS,
+        deadline: Optional[float] = None,
+    ) -> None:
+        super().__init__(source_matrix, possible_shifts, settings_, deadline)
+        self._assignment: List[int] = [0] * len(self._rows)
+        self._best_result = 0
+        self._best_shifts = None
+        self._branches = 0
+
+    def _get_greedy_result(self) -> Tuple[List[int], int]:
+        """The result of a greedy assignment is the initial upper bound."""
+        shifts, result = self._place_greedily()
+        for row_index, shift in enumerate(shifts):
+            self._remove(row_index, shift)
+        return shifts, result
+
+    def _branch(self, depth: int, result: int) -> None:
+        self._branches += 1
+        if (
+            not self._branches % constants.DEADLINE_CHECK_INTERVAL
+            and self._is_expired()
+        ):
+            self.optimal = False
+        if not self.optimal:
+            return
+        if depth == len(self._order):
+            self.scored_combinations += 1
+            self._best_result = result
+            self._best_shifts = tuple(self._assignment)
+            return
+        row_index = self._order[depth]
+        for shift in self.possible_shifts[row_index]:
+            added = self._place(row_index, shift)
+            if result + added < self._best_result:
+                self._assignment[row_index] = shift
+                self._branch(depth + 1, result + added)
+            self._remove(row_index, shift)
+            if not self.optimal:
+                break
+
+    def search(self) -> Tuple[np.ndarray, int]:
+        greedy_shifts, greedy_result = self._get_greedy_result()
+        # Anything worse than the greedy assignment can be pruned, but equal
+        # results are still searched to keep the exhaustive tie-breaking.
+        self._best_result = greedy_result + 1
+        self.optimal = True
+        self._branch(depth=0, result=0)
+        if self._best_shifts is None:
+            self._best_shifts, self._best_result = greedy_shifts, greedy_result
+        shifts = np.array(
+            self._best_shifts, dtype=self.settings.default_shift_array_dtype
+        )
+        return shifts, self._best_result
+
+
+class LocalSearchEngine(CellsEngine):
+    """Improves the greedy assignment by moving one row at a time.
+
+    Every pass takes the rows out one by one and puts each of them back
+    with the shift adding the fewest cells. A row moves only if it
+    strictly improves the result, the search stops when a pass moves
+    nothing or after constants.LOCAL_SEARCH_PASSES_LIMIT passes. A pass
+    is O(rows * shifts * pipeline_size_limit), so the engine is not bound
+    by the group and pipeline size limits of the exact engines, but the
+    result is optimal only if it reaches the lower bound. The deadline is
+    checked before every row.
+    """
+
+    __slots__ = ()
+
+    def search(self) -> Tuple[np.ndarray, int]:
+        shifts, result = self._place_greedily()
+        for _ in range(constants.LOCAL_SEARCH_PASSES_LIMIT):
+            moved = False
+            for row_index in self._order:
+                if self._is_expired():
+                    break
+                current = shifts[row_index]
+                self._remove(row_index, current)
+                best_shift = current
+                best_added = self._get_added(row_index, current)
+                removed = best_added
+                # every other shift of the row is a neighbour combination
+                self.scored_combinations += (
+                    len(self.possible_shifts[row_index]) - 1
+                )
+                for shift in self.possible_shifts[row_index]:
+                    added = self._get_added(row_index, shift)
+                    if added < best_added:
+                        best_added, best_shift = added, shift
+                self._place(row_index, best_shift)
+                if best_shift != current:
+                    shifts[row_index] = best_shift
+                    result += best_added - removed
+                    moved = True
+            if not moved:
+                break
+        self.optimal = result <= self.source_matrix.get_lower_bound()
+        return (
+            np.array(shifts, dtype=self.settings.default_shift_array_dtype),
+            result,
+        )
+
+
+ENGINES = {
+    "exhaustive": ExhaustiveEngine,
+    "branch_and_bound": BranchAndBoundEngine,
+    "local_search": LocalSearchEngine,
+}
@@ -36,16 +36,66 @@ class CommonOpsBoundValidationError(SettingValidationError):
         super().__init__(super().msg_prefix + msg, *args)
 
 
+class CombinationsMemoryLimitValidationError(SettingValidationError):
+    """Raises if combinations_memory_limit does not match constraints."""
+
+    def __init__(
+        self,
+        msg: str = "combinations_memory_limit must obey this condition: "
+        "1 <= combinations_memory_limit",
+        *args,
+    ) -> None:
+        super().__init__(super().msg_prefix + msg, *args)
+
+
+class ScoringWorkersValidationError(SettingValidationError):
+    """Raises if scoring_workers does not match constraints."""
+
+    def __init__(
+        self,
+        msg: str = "scoring_workers must obey this condition: "
+        "1 <= scoring_workers",
+        *args,
+    ) -> None:
+        super().__init__(super().msg_prefix + msg, *args)
+
+
+class PipelineMaxWaitValidationError(SettingValidationError):
+    """Raises if pipeline_max_wait does not match constraints."""
+
+    def __init__(
+        self,
+        msg: str = "pipeline_max_wait must obey this condition: "
+        "0 <= pipeline_max_wait",
+        *args,
+    ) -> None:
+        super().__init__(super().msg_prefix + msg, *args)
+
+
 class GroupSizeLimitValidationError(SettingValidationError):
     """Error that occurs when group_size_limit does not match constraints."""
 
     def __init__(
         self,
+        limit: int = 32,
         msg: str = "group_size_limit must obey this condition: "
-        "2 <= group_size_limit <= 32",
+        "2 <= group_size_limit <= ",
         *args,
     ) -> None:
-        super().__init__(super().msg_prefix + msg, *args)
+        super().__init__(super().msg_prefix + msg + str(limit), *args)
+
+
+class GroupSizeLimitDtypeValidationError(SettingValidationError):
+    """Raises if pipeline ids of a group don't fit into default_dtype."""
+
+    def __init__(
+        self,
+        limit: int = 256,
+        msg: str = "pipeline ids must fit into default_dtype: "
+        "group_size_limit <= ",
+        *args,
+    ) -> None:
+        super().__init__(super().msg_prefix + msg + str(limit), *args)
 
 
 class PipelineSizeLimitValidationError(SettingValidationError):
@@ -53,11 +103,12 @@ class PipelineSizeLimitValidationError(SettingValidationError):
 
     def __init__(
         self,
+        limit: int = 5,
         msg: str = "pipeline_size_limit must obey this condition: "
-        "2 <= pipeline_size_limit <= 5",
+        "2 <= pipeline_size_limit <= ",
         *args,
     ) -> None:
-        super().__init__(super().msg_prefix + msg, *args)
+        super().__init__(super().msg_prefix + msg + str(limit), *args)
 
 
 class TypeValidationError(SettingValidationError):
@@ -102,6 +153,19 @@ class DefaultArrayTypeCodeValidationError(SettingValidationError):
         super().__init__(super().msg_prefix + msg, *args)
 
 
+class SolverEngineValidationError(SettingValidationError):
+    """Error that occurs when the solver_engine is not
+    represented in constants.ACCEPTABLE_SOLVER_ENGINES."""
+
+    def __init__(
+        self,
+        msg: str = "solver_engine must be in"
+        " constants.ACCEPTABLE_SOLVER_ENGINES",
+        *args,
+    ) -> None:
+        super().__init__(super().msg_prefix + msg, *args)
+
+
 class GrouperError(Exception):
     """The base exception for Grouper errors.
 
@@ -148,6 +212,17 @@ class CreateArrayError(GrouperError):
         super().__init__(super().msg_prefix + msg, *args)
 
 
+class DeadlinesShapeError(GrouperError):
+    """Error that occurs when deadlines don't match the added pipelines."""
+
+    def __init__(
+        self,
+        msg: str = "deadlines must be numbers, one for every pipeline.",
+        *args,
+    ) -> None:
+        super().__init__(super().msg_prefix + msg, *args)
+
+
 class IndexValidationError(Exception):
     """A data does not correspond to the properties of the indexes."""
 
@@ -221,6 +296,36 @@ class MostCommonIsEmptyError(PipelineMatrixSolverError):
         super().__init__(super().msg_prefix + msg, *args)
 
 
+class GroupSolveError(PipelineMatrixSolverError):
+    """Error that occurs when a group of solve_many() can't be solved.
+
+    The exception raised by the solver is the __cause__ of this one.
+
+    Attributes:
+        index: index of the group in the solve_many() input.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        msg: str = "can't solve the group with index ",
+        *args,
+    ) -> None:
+        self.index = index
+        super().__init__(super().msg_prefix + msg + str(index), *args)
+
+
+class ChunksizeValidationError(PipelineMatrixSolverError):
+    """Error that occurs when chunksize of solve_many() is incorrect."""
+
+    def __init__(
+        self,
+        msg: str = "chunksize must be an integer and 1 <= chunksize",
+        *args,
+    ) -> None:
+        super().__init__(super().msg_prefix + msg, *args)
+
+
 class CustomTypeValidationError(Exception):
     """The base exception for custom type validation errors.
 
@@ -251,3 +356,138 @@ class CustomTypeEmptyArrayError(CustomTypeValidationError):
         *args,
     ) -> None:
         super().__init__(super().msg_prefix + msg, *args)
+
+
+class PlanCacheError(Exception):
+    """The base exception for PlanCache errors.
+
+    Attributes:
+        msg_prefix: a prefix of exception messages.
+    """
+
+    msg_prefix: str = "PlanCache error: "
+
+
+class PlanCacheSizeValidationError(PlanCacheError):
+    """Error that occurs when maxsize of the cache is incorrect."""
+
+    def __init__(
+        self,
+        msg: str = "maxsize must be an integer and 1 <= maxsize",
+        *args,
+    ) -> None:
+        super().__init__(super().msg_prefix + msg, *args)
+
+
+class PlanStoreError(Exception):
+    """The base exception for PlanStore errors.
+
+    Attributes:
+        msg_prefix: a prefix of exception messages.
+    """
+
+    msg_prefix: str = "PlanStore error: "
+
+
+class PlanStoreCapacityValidationError(PlanStoreError):
+    """Error that occurs when capacity of the store is incorrect."""
+
+    def __init__(
+        self,
+        msg: str = "capacity must be an integer and 1 <= capacity",
+        *args,
+    ) -> None:
+        super().__init__(super().msg_prefix + msg, *args)
+
+
+class BatcherError(Exception):
+    """The base exception for Batcher errors.
+
+    Attributes:
+        msg_prefix: a prefix of exception messages.
+    """
+
+    msg_prefix: str = "Batcher error: "
+
+
+class MaxWaitValidationError(BatcherError):
+    """Error that occurs when max_wait of the batcher is incorrect."""
+
+    def __init__(
+        self,
+        msg: str = "max_wait must be a number and 0 <= max_wait",
+        *args,
+    ) -> None:
+        super().__init__(super().msg_prefix + msg, *args)
+
+
+class WireError(Exception):
+    """The base exception for wire format errors.
+
+    Attributes:
+        msg_prefix: a prefix of exception messages.
+    """
+
+    msg_prefix: str = "Wire format error: "
+
+
+class WireFormatError(WireError):
+    """Error that occurs when a buffer is not a supported wire buffer."""
+
+    def __init__(
+        self,
+        msg: str = "the buffer is not a ppao buffer of the supported "
+        "format version",
+        *args,
+    ) -> None:
+        super().__init__(super().msg_prefix + msg, *args)
+
+
+class WireBufferSizeError(WireError):
+    """Error that occurs when an output buffer is too small."""
+
+    def __init__(
+        self,
+        size: int,
+        msg: str = "the output buffer must have at least this size: ",
+        *args,
+    ) -> None:
+        super().__init__(super().msg_prefix + msg + str(size), *args)
+
+
+class ExecutorError(Exception):
+    """The base exception for SolutionExecutor errors.
+
+    Attributes:
+        msg_prefix: a prefix of exception messages.
+    """
+
+    msg_prefix: str = "SolutionExecutor error: "
+
+
+class HandlerNotFoundError(ExecutorError):
+    """Error that occurs when an operation of a solution has no handler."""
+
+    def __init__(
+        self, operation: int, msg: str = "no handler of operation ", *args
+    ) -> None:
+        super().__init__(super().msg_prefix + msg + str(operation), *args)
+
+
+class UnitExecutionError(ExecutorError):
+    """Error that occurs when a handler of SolutionExecutor raises.
+
+    The exception raised by the handler is the __cause__ of this one.
+
+    Attributes:
+        index: index of the execution unit in the solution.
+    """
+
+    def __init__(
+        self,
+        index: int,
+        msg: str = "handler failed on the unit with index ",
+        *args,
+    ) -> None:
+        self.index = index
+        super().__init__(super().msg_prefix + msg + str(index), *args)
@@ -0,0 +1,163 @@
+"""Parallel execution of solutions."""
+import concurrent.futures
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+import numpy as np
+
+from ppao import exceptions, tracing
+from ppao.custom_types import CompactSolution, ExecutionUnit, Solution
+
+
+def get_dependencies(
+    execution_units: Sequence[ExecutionUnit],
+) -> List[Tuple[int, ...]]:
+    """Dependency DAG of execution units of a solution.
+
+    A unit depends on the previous unit of every pipeline it takes, so
+    executing units after their dependencies keeps the order of
+    operations of every pipeline. Units of operation 0 are padding, they
+    have no dependencies and nothing depends on them.
+
+    :param execution_units: solution or its execution units.
+    :return: indexes of the units every unit depends on, in ascending
+    order.
+    """
+    last_units: Dict[int, int] = dict()
+    dependencies = []
+    for index_, execution_unit in enumerate(execution_units):
+        if not execution_unit.operation:
+            dependencies.append(())
+            continue
+        pipelines = np.unique(execution_unit.pipelines).tolist()
+        dependencies.append(
+            tuple(
+                sorted(
+                    {
+                        last_units[pipeline]
+                        for pipeline in pipelines
+                        if pipeline in last_units
+                    }
+                )
+            )
+        )
+        for pipeline in pipelines:
+            last_units[pipeline] = index_
+    return dependencies
+
+
+class SolutionExecutor:
+    """Runs execution units of a solution as soon as their dependencies
+    are done.
+
+    Units which take disjoint pipelines overlap, so I/O-bound handlers
+    finish well before the serial sum of their times. A handler is called
+    once per unit with the pipeline ids of the unit, the same ones in the
+    order of the unit. Units of operation 0 are padding and are not run.
+
+    Attributes:
+        handlers: handler of every operation.
+        executor: executor running the handlers, a ThreadPoolExecutor with
+            max_workers threads is used for every run if None. Handlers
+            must be picklable for a ProcessPoolExecutor.
+        max_workers: number of threads of the default executor.
+    """
+
+    __slots__ = (
+        "handlers",
+        "executor",
+        "max_workers",
+    )
+
+    def __init__(
+        self,
+        handlers: Mapping[int, Callable[[np.ndarray], Any]],
+        executor: Optional[concurrent.futures.Executor] = None,
+        max_workers: Optional[int] = None,
+    ) -> None:
+        self.handlers = handlers
+        self.executor = executor
+        self.max_workers = max_workers
+
+    def run(self, solution: Union[Solution, CompactSolution]) -> List[Any]:
+        """
+        :param solution: solution to run.
+        :return: results of the handlers in the order of the units, None
+        for units of operation 0. A missing handler raises
+        HandlerNotFoundError before anything is run. If a handler raises,
+        no more units are started and UnitExecutionError with the index
+        of the unit is raised when the running ones are done.
+        """
+        execution_units = list(solution)
+        for execution_unit in execution_units:
+            if (
+                execution_unit.operation
+                and execution_unit.operation not in self.handlers
+            ):
+                raise exceptions.HandlerNotFoundError(execution_unit.operation)
+        with tracing.span("execute", units=len(execution_units)):
+            dependencies = get_dependencies(execution_units)
+            executor = self.executor
+            if executor is None:
+                executor = concurrent.futures.ThreadPoolExecutor(
+                    self.max_workers
+                )
+            try:
+                return self._run(execution_units, dependencies, executor)
+            finally:
+                if self.executor is None:
+                    executor.shutdown()
+
+    def _run(
+        self,
+        execution_units: List[ExecutionUnit],
+        dependencies: List[Tuple[int, ...]],
+        executor: concurrent.futures.Executor,
+    ) -> List[Any]:
+        results: List[Any] = [None] * len(execution_units)
+        waiting = [len(units) for units in dependencies]
+        dependents: List[List[int]] = [[] for _ in execution_units]
+        for index_, units in enumerate(dependencies):
+            for unit in units:
+                dependents[unit].append(index_)
+        running: Dict[concurrent.futures.Future, int] = dict()
+
+        def submit(index_: int) -> None:
+            execution_unit = execution_units[index_]
+            if execution_unit.operation:
+                future = executor.submit(
+                    self.handlers[execution_unit.operation],
+                    execution_unit.pipelines,
+                )
+                running[future] = index_
+
+        for index_, count in enumerate(waiting):
+            if not count:
+                submit(index_)
+        while running:
+            done, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                index_ = running.pop(future)
+                error = future.exception()
+                if error is not None:
+                    for other in running:
+                        other.cancel()
+                    concurrent.futures.wait(running)
+                    raise exceptions.UnitExecutionError(index_) from error
+                results[index_] = future.result()
+                for dependent in dependents[index_]:
+                    waiting[dependent] -= 1
+                    if not waiting[dependent]:
+                        submit(dependent)
+        return results
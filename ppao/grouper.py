@@ -1,20 +1,183 @@
-from collections import Counter, defaultdict
-from contextlib import suppress
-from typing import DefaultDict, List, Optional, Sequence, Set, Tuple, Union
+import dataclasses
+import math
+import time
+from typing import Dict, List, Optional, Sequence, Set, Tuple, Union
 
 import numpy as np
 
-from ppao import exceptions, settings
+from ppao import constants, exceptions, settings, tracing
 from ppao.custom_types import Frequency
 from ppao.matrix import SourceMatrix
 
 
+@dataclasses.dataclass(slots=True, frozen=True)
+class GrouperStats:
+    """Snapshot of the Grouper backlog and counters.
+
+    Attributes:
+        backlog: number of pipelines in the grouper.
+        added: number of pipelines added since the grouper was created.
+        popped: number of pipelines popped in groups.
+        groups: number of popped groups.
+        overdue_groups: number of popped groups made for overdue
+            pipelines.
+        pop_hits: number of pop() and pop_many() calls which returned
+            groups.
+        pop_misses: number of pop() and pop_many() calls which returned
+            nothing.
+        ungroupable: number of pipelines left by the last pop which could
+            not make a group, 0 if pipelines have been added since.
+        max_wait: seconds the oldest pipeline of the backlog has waited.
+        wait_percentiles: seconds waited by pipelines of the backlog, by
+            percentile of constants.GROUPER_WAIT_PERCENTILES.
+        top_operations: the most frequent operations of the backlog and
+            their counts, the most frequent first.
+    """
+
+    backlog: int
+    added: int
+    popped: int
+    groups: int
+    overdue_groups: int
+    pop_hits: int
+    pop_misses: int
+    ungroupable: int
+    max_wait: float
+    wait_percentiles: Dict[float, float]
+    top_operations: Tuple[Tuple[int, int], ...]
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of pops which returned groups, 0 if nothing was popped."""
+        pops = self.pop_hits + self.pop_misses
+        return self.pop_hits / pops if pops else 0.0
+
+
+class _Arrivals:
+    """Arrival times of the backlog by add() call.
+
+    Pipelines of one add() call arrive at once, so they share a batch.
+    Alive pipelines of every batch are counted in a Fenwick tree, so the
+    arrival of the k-th oldest pipeline is found and a pipeline is
+    removed in O(log batches). Full batch lists drop the empty batches
+    and are doubled until they are at most half full.
+
+    Attributes:
+        times: time.monotonic() of every batch.
+        counts: number of alive pipelines of every batch.
+    """
+
+    __slots__ = ("times", "counts", "_tree", "_size")
+
+    def __init__(self) -> None:
+        self.times = [0.0] * constants.GROUPER_INITIAL_CAPACITY
+        self.counts = [0] * constants.GROUPER_INITIAL_CAPACITY
+        self._tree = [0] * (constants.GROUPER_INITIAL_CAPACITY + 1)
+        self._size = 0
+
+    def append(
+        self, time_: float, number: int
+    ) -> Tuple[int, Optional[np.ndarray]]:
+        """Add a batch of pipelines which arrive at time_.
+
+        :return: the batch and the new index of every old batch if the
+        batches are compacted, None otherwise.
+        """
+        batches = None
+        if self._size == len(self.times):
+            batches = self._compact()
+        batch = self._size
+        self.times[batch] = time_
+        self._update(batch, number)
+        self._size += 1
+        return batch, batches
+
+    def remove(self, batches: np.ndarray) -> None:
+        """Remove one pipeline of every batch of batches."""
+        for batch in batches.tolist():
+            self._update(batch, -1)
+
+    def get_time(self, rank: int) -> float:
+        """
+        :param rank: 1 for the oldest alive pipeline, 2 for the next one.
+        :return: time.monotonic() of arrival of the pipeline.
+        """
+        capacity = len(self.times)
+        position = 0
+        step = 1 << (capacity.bit_length() - 1)
+        while step:
+            if (
+                position + step <= capacity
+                and self._tree[position + step] < rank
+            ):
+                position += step
+                rank -= self._tree[position]
+            step >>= 1
+        return self.times[position]
+
+    def _update(self, batch: int, number: int) -> None:
+        self.counts[batch] += number
+        position = batch + 1
+        tree = self._tree
+        while position < len(tree):
+            tree[position] += number
+            position += position & -position
+
+    def _compact(self) -> np.ndarray:
+        """
+        :return: new index of every batch, alive batches keep their order.
+        """
+        alive = [batch for batch in range(self._size) if self.counts[batch]]
+        capacity = len(self.times)
+        while len(alive) + 1 > capacity // 2:
+            capacity *= 2
+        empty = capacity - len(alive)
+        self.times = [self.times[x] for x in alive] + [0.0] * empty
+        self.counts = [self.counts[x] for x in alive] + [0] * empty
+        # a tree node holds the sum of the batches of its lowest bit
+        prefix = np.concatenate(((0,), np.cumsum(self.counts)))
+        positions = np.arange(capacity + 1)
+        self._tree = (
+            prefix - prefix[positions - (positions & -positions)]
+        ).tolist()
+        self._size = len(alive)
+        batches = np.zeros(capacity, dtype=np.intp)
+        batches[alive] = np.arange(len(alive))
+        return batches
+
+
 class Grouper:
     """Preprocessing input data to create correct groups for the solver.
 
+    Pipelines are kept in the slots of a buffer. A popped pipeline frees
+    its slot, and the buffer is compacted or doubled only when it is full,
+    so add() and pop() are amortized O(k) in the number of pipelines they
+    touch. Slot ids do not change between compactions.
+
+    Operation frequencies are kept in a dense (slots x operations) count
+    matrix, and pop() scores all pipelines with one matrix-vector product.
+    Pipelines with equal counts of the most common operations have equal
+    acceptance scores, so if the most common operations of consecutive
+    groups are the same, pipelines are bucketed by these counts and only
+    the buckets are scored until add() is called or the operations change.
+
+    The add() call of every pipeline is kept in its slot, and the
+    backlog is counted by add() call with its time.monotonic(), so
+    stats() finds wait times of any percentile in O(log) of the add()
+    calls of the backlog.
+
+    A pipeline is overdue after settings.pipeline_max_wait seconds in the
+    grouper or after its own deadline. Overdue pipelines outweigh any
+    acceptance score: pop() takes them first, the most overdue first, and
+    fills the rest of their group with the best scored pipelines. If
+    there are no most common operations, overdue pipelines are popped in
+    groups of their own, even of one pipeline. The earliest due time of
+    the backlog is kept, so pop() scans for overdue pipelines only when
+    it has come.
+
     Attributes:
         settings: ppao settings.
-        pipelines: remaining pipelines after add() and pop() calls.
+        pipelines: copy of remaining pipelines after add() and pop() calls.
     """
 
     def __init__(
@@ -22,136 +185,564 @@ class Grouper:
         settings_: settings.Settings = settings.DEFAULT_SETTINGS,
     ) -> None:
         self.settings = settings_
-        self.pipelines = np.empty(
+        self._buffer = np.empty(
             dtype=self.settings.default_dtype,
-            shape=(0, self.settings.pipeline_size_limit),
+            shape=(
+                constants.GROUPER_INITIAL_CAPACITY,
+                self.settings.pipeline_size_limit,
+            ),
         )
-        self._counters: DefaultDict[int, Counter] = defaultdict(Counter)
-        self._total_counter = Counter()
-
-    def _clear(self, most_common_scores: List[Tuple[int, int]]) -> None:
-        self._total_counter.clear()
-        keys_to_delete = tuple(
-            row_index for row_index, _ in most_common_scores
+        self._alive = np.zeros(
+            constants.GROUPER_INITIAL_CAPACITY, dtype=np.bool_
         )
-        for key in keys_to_delete:
-            del self._counters[key]
-        self.pipelines = np.delete(
-            arr=self.pipelines, obj=keys_to_delete, axis=0
+        # add() call of every slot
+        self._batches = np.zeros(
+            constants.GROUPER_INITIAL_CAPACITY, dtype=np.intp
         )
+        self._arrivals = _Arrivals()
+        # time.monotonic() value at which every slot becomes overdue and
+        # a lower bound of the earliest one of the backlog
+        self._due = np.zeros(
+            constants.GROUPER_INITIAL_CAPACITY, dtype=np.float64
+        )
+        self._next_due = math.inf
+        self._size = 0
+        self._alive_number = 0
+        # operation id of every count matrix column and vice versa
+        self._operations: List[int] = []
+        self._columns: Dict[int, int] = dict()
+        self._counts = np.zeros(
+            shape=(
+                constants.GROUPER_INITIAL_CAPACITY,
+                constants.GROUPER_INITIAL_CAPACITY,
+            ),
+            dtype=np.uint8,
+        )
+        self._totals = np.zeros(
+            constants.GROUPER_INITIAL_CAPACITY, dtype=np.int64
+        )
+        # most common columns, bucket counts, bucket slots, taken slots
+        self._buckets: Optional[
+            Tuple[np.ndarray, np.ndarray, List[np.ndarray], np.ndarray]
+        ] = None
+        self._scored_columns: Optional[np.ndarray] = None
+        self._nothing_to_pop = False
+        self._added = 0
+        self._popped = 0
+        self._groups = 0
+        self._overdue_groups = 0
+        self._pop_hits = 0
+        self._pop_misses = 0
 
-    def _count_frequency(self) -> bool:
-        if not self.pipelines.size:
-            return False
-        for row_index, pipeline in enumerate(self.pipelines):
-            operation_frequency_counter: Counter = Counter()
-            for operation_index, row_operation_frequency in zip(
-                *np.unique(ar=pipeline, return_counts=True), strict=True
-            ):
-                if operation_index != 0:
-                    operation_frequency_counter[
-                        operation_index
-                    ] += row_operation_frequency
-            self._counters[row_index] = operation_frequency_counter
-            self._total_counter += operation_frequency_counter
-        with suppress(KeyError):
-            # ignore operation indexes equal to zero
-            del self._total_counter[0]
-        if not self._total_counter:
-            return False
-        return True
+    @property
+    def pipelines(self) -> np.ndarray:
+        """Pipelines of the used slots in the order of addition."""
+        return self._buffer[: self._size][self._alive[: self._size]]
 
-    def pop(self) -> Optional[SourceMatrix]:
-        """Get a group and remove it from grouper."""
-        if not self._count_frequency():
+    def _clear(self, slots: np.ndarray) -> None:
+        removed = self._counts[slots].sum(axis=0, dtype=np.int64)
+        self._totals -= removed
+        self._counts[slots] = 0
+        # an operation which leaves the backlog gets a new column when it
+        # comes back
+        for column in np.flatnonzero(
+            removed.astype(np.bool_) & (self._totals == 0)
+        ).tolist():
+            del self._columns[self._operations[column]]
+        self._arrivals.remove(self._batches[slots])
+        self._alive[slots] = False
+        self._alive_number -= slots.size
+        if not self._alive_number:
+            self._size = 0
+
+    def _reserve(self, rows_number: int) -> None:
+        """Make room for rows_number pipelines after the last used slot.
+
+        A full buffer is compacted, and it is doubled until it is at most
+        half full, so the next compaction is at least as far away as the
+        number of pipelines copied by this one.
+        """
+        capacity = self._buffer.shape[0]
+        if self._size + rows_number <= capacity:
             return
-        if self.pipelines.shape[0] < 2:
+        while self._alive_number + rows_number > capacity // 2:
+            capacity *= 2
+        slots = np.flatnonzero(self._alive[: self._size])
+        buffer = np.empty(
+            dtype=self._buffer.dtype,
+            shape=(capacity, self._buffer.shape[1]),
+        )
+        buffer[: slots.size] = self._buffer[slots]
+        counts = np.zeros(
+            shape=(capacity, self._counts.shape[1]), dtype=self._counts.dtype
+        )
+        counts[: slots.size] = self._counts[slots]
+        self._buffer, self._counts = buffer, counts
+        batches = np.zeros(capacity, dtype=self._batches.dtype)
+        batches[: slots.size] = self._batches[slots]
+        due = np.zeros(capacity, dtype=self._due.dtype)
+        due[: slots.size] = self._due[slots]
+        self._batches, self._due = batches, due
+        self._alive = np.zeros(capacity, dtype=np.bool_)
+        self._alive[: slots.size] = True
+        self._size = slots.size
+
+    def _reserve_columns(self, columns_number: int) -> None:
+        """Make room for columns_number new operations.
+
+        Columns of operations which are not in the backlog anymore are
+        dropped first, the order of other columns is kept.
+        """
+        capacity = self._totals.size
+        if len(self._operations) + columns_number <= capacity:
             return
-        if len(self._total_counter) == 1:
-            most_common_operations = set(x for x in self._total_counter.keys())
-        else:
-            most_common_operations = self._get_most_common_operations()
-        biggest_scores = self._get_biggest_acceptance_scores(
-            most_common_operations
+        columns = np.flatnonzero(self._totals[: len(self._operations)])
+        while columns.size + columns_number > capacity // 2:
+            capacity *= 2
+        counts = np.zeros(
+            shape=(self._counts.shape[0], capacity), dtype=self._counts.dtype
         )
-        if not biggest_scores:
+        counts[:, : columns.size] = self._counts[:, columns]
+        totals = np.zeros(capacity, dtype=self._totals.dtype)
+        totals[: columns.size] = self._totals[columns]
+        self._counts, self._totals = counts, totals
+        self._operations = [self._operations[x] for x in columns.tolist()]
+        self._columns = {
+            operation: column
+            for column, operation in enumerate(self._operations)
+        }
+
+    def _count_frequency(self, pipelines: np.ndarray, first_slot: int) -> None:
+        """Count operations of the added pipelines. Zero is not counted."""
+        rows = np.repeat(
+            np.arange(first_slot, first_slot + pipelines.shape[0]),
+            pipelines.shape[1],
+        )
+        operations = pipelines.ravel()
+        nonzero = operations != 0
+        rows, operations = rows[nonzero], operations[nonzero]
+        if not operations.size:
             return
-        group = [self.pipelines[row_key] for row_key, score in biggest_scores]
-        if group:
-            pipelines = np.array(group, dtype=self.settings.default_dtype)
-            frequency = Frequency(
-                total=int(self._total_counter.total()),
-                most_common=most_common_operations,
-            )
-            self._clear(biggest_scores)
-            return SourceMatrix(  # pytype: disable=bad-return-type
-                from_array=pipelines,
-                frequency=frequency,
-                settings_=self.settings,
-            )
+        unique_operations, inverse = np.unique(operations, return_inverse=True)
+        # new operations get columns row by row, in ascending order in a row
+        order = np.lexsort((operations, rows))
+        _, first_indexes = np.unique(operations[order], return_index=True)
+        new_operations = [
+            operation
+            for operation in operations[order][np.sort(first_indexes)].tolist()
+            if operation not in self._columns
+        ]
+        self._reserve_columns(len(new_operations))
+        for operation in new_operations:
+            self._columns[operation] = len(self._operations)
+            self._operations.append(operation)
+        columns = np.array(
+            [self._columns[x] for x in unique_operations.tolist()],
+            dtype=np.intp,
+        )[inverse]
+        np.add.at(self._counts, (rows, columns), 1)
+        self._totals += np.bincount(columns, minlength=self._totals.size)
+
+    def pop(self) -> Optional[SourceMatrix]:
+        """Get a group and remove it from grouper."""
+        groups = self.pop_many(max_groups=1)
+        if groups:
+            return groups[0]
+
+    def pop_many(self, max_groups: Optional[int] = None) -> List[SourceMatrix]:
+        """Get groups and remove them from grouper.
 
-    def _get_biggest_acceptance_scores(
-        self, most_common_operations: Set[int]
-    ) -> Optional[List[Tuple[int, int]]]:
-        scores: Counter = Counter()
-        for row_index in range(len(self.pipelines)):
-            for common_operation in most_common_operations:
-                scores[row_index] += (
-                    self._counters[row_index].get(common_operation, 0)
-                    * self._total_counter[common_operation]
+        Groups are the same as of repeated pop() calls.
+
+        :param max_groups: max number of groups, all of them if None.
+        :return: list of groups, the remaining pipelines stay in grouper.
+        """
+        with tracing.span("grouper.pop", backlog=self._alive_number) as span:
+            groups = self._pop_many(max_groups)
+            span.set(groups=len(groups))
+        if groups:
+            self._pop_hits += 1
+            self._groups += len(groups)
+        else:
+            self._pop_misses += 1
+        return groups
+
+    def _pop_many(self, max_groups: Optional[int]) -> List[SourceMatrix]:
+        groups: List[SourceMatrix] = []
+        now = time.monotonic()
+        if now >= self._next_due:
+            groups = self._pop_overdue(now, max_groups)
+        if self._nothing_to_pop:
+            return groups
+        while max_groups is None or len(groups) < max_groups:
+            columns = self._get_group_columns()
+            if self._alive_number < 2 or not columns.size:
+                self._nothing_to_pop = True
+                break
+            if self._buckets is not None and np.array_equal(
+                columns, self._buckets[0]
+            ):
+                slots = self._take_biggest_scores(
+                    *self._buckets[1:], self._totals[columns]
                 )
-        biggest_scores = scores.most_common(self.settings.group_size_limit)
-        if not biggest_scores:
-            return None
-        return biggest_scores
-
-    def _get_most_common_operations(self) -> Set[int]:
-        most_common_operations: Set[int] = set()
-        operation_frequency_sum = 0
-        for (
-            common_operation,
-            operation_frequency,
-        ) in self._total_counter.most_common(self.settings.group_size_limit):
-            operation_frequency_sum += operation_frequency
-            most_common_operations.add(common_operation)
-            if self._stop_condition(
-                operation_frequency_sum, most_common_operations
+            elif self._scored_columns is not None and np.array_equal(
+                columns, self._scored_columns
             ):
+                # the most common operations are stable, bucketing pays off
+                signatures, queues = self._get_buckets(columns)
+                self._buckets = (
+                    columns,
+                    signatures,
+                    queues,
+                    np.zeros(len(queues), dtype=np.intp),
+                )
+                slots = self._take_biggest_scores(
+                    *self._buckets[1:], self._totals[columns]
+                )
+            else:
+                self._buckets = None
+                self._scored_columns = columns
+                slots = self._get_biggest_scores_slots(columns)
+            groups.append(
+                self._make_group(slots, self._get_operations(columns))
+            )
+        return groups
+
+    def _pop_overdue(
+        self, now: float, max_groups: Optional[int]
+    ) -> List[SourceMatrix]:
+        """Pop groups of overdue pipelines and update the earliest due
+        time of the backlog."""
+        groups: List[SourceMatrix] = []
+        while max_groups is None or len(groups) < max_groups:
+            slots = np.flatnonzero(self._alive[: self._size])
+            due = self._due[slots]
+            overdue = due <= now
+            if not overdue.any():
+                self._next_due = float(due.min()) if due.size else math.inf
                 break
-        if (
-            not self._total_counter
-            or operation_frequency_sum / self._total_counter.total()
-            < self.settings.common_ops_percent_bound
-        ):
-            return set()
-        return most_common_operations
+            groups.append(self._make_overdue_group(slots, overdue))
+        if groups:
+            self._overdue_groups += len(groups)
+            self._buckets = None
+            self._scored_columns = None
+            self._nothing_to_pop = False
+        return groups
+
+    def _make_overdue_group(
+        self, slots: np.ndarray, overdue: np.ndarray
+    ) -> SourceMatrix:
+        """
+        :param slots: used slots.
+        :param overdue: mask of overdue slots.
+        """
+        limit = self.settings.group_size_limit
+        taken = slots[overdue]
+        taken = taken[np.argsort(self._due[taken], kind="stable")][:limit]
+        columns = self._get_group_columns()
+        if columns.size:
+            rest = slots[~overdue]
+            scores = (
+                self._counts[np.ix_(rest, columns)].astype(np.int64)
+                @ self._totals[columns]
+            )
+            order = np.lexsort((rest, -scores))
+            fill = rest[order][scores[order] > 0][: limit - taken.size]
+            return self._make_group(
+                np.concatenate((taken, fill)), self._get_operations(columns)
+            )
+        counts = self._counts[taken].sum(axis=0, dtype=np.int64)
+        columns = np.flatnonzero(counts)
+        columns = columns[np.argsort(-counts[columns], kind="stable")]
+        # an absent operation gives zero shifts to all pipelines
+        return self._make_group(
+            taken,
+            self._get_operations(columns[: self.settings.common_ops_bound])
+            or {1},
+        )
 
-    def _stop_condition(
+    def _get_biggest_scores_slots(
+        self, most_common_columns: np.ndarray
+    ) -> np.ndarray:
+        """Score all pipelines by the most common operations.
+
+        :return: slots of up to group_size_limit pipelines with the biggest
+        scores, the biggest first, ties are broken by the slot order.
+        """
+        slots = np.flatnonzero(self._alive[: self._size])
+        scores = (
+            self._counts[np.ix_(slots, most_common_columns)].astype(np.int64)
+            @ self._totals[most_common_columns]
+        )
+        limit = self.settings.group_size_limit
+        if scores.size > limit:
+            threshold = scores[
+                np.argpartition(scores, scores.size - limit)[
+                    scores.size - limit
+                ]
+            ]
+            bigger = np.flatnonzero(scores > threshold)
+            equal = np.flatnonzero(scores == threshold)
+            indexes = np.concatenate((bigger, equal[: limit - bigger.size]))
+        else:
+            indexes = np.arange(scores.size)
+        return slots[indexes[np.lexsort((indexes, -scores[indexes]))]]
+
+    def _get_buckets(
+        self, most_common_columns: np.ndarray
+    ) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """Bucket pipelines by the counts of the most common operations,
+        pipelines of one bucket always have equal acceptance scores.
+
+        :return: counts of every bucket and slots of its pipelines in
+        ascending order.
+        """
+        slots = np.flatnonzero(self._alive[: self._size])
+        counts = self._counts[np.ix_(slots, most_common_columns)]
+        # a pipeline has at most pipeline_size_limit of every operation
+        base = self.settings.pipeline_size_limit + 1
+        if most_common_columns.size * np.log2(base) < 63:
+            codes = counts.astype(np.int64) @ (
+                base ** np.arange(most_common_columns.size, dtype=np.int64)
+            )
+        else:
+            _, codes = np.unique(counts, axis=0, return_inverse=True)
+            codes = codes.ravel()
+        order = np.argsort(codes, kind="stable")
+        starts = np.flatnonzero(np.diff(codes[order], prepend=-1))
+        queues = np.split(slots[order], starts[1:])
+        return counts[order[starts]].astype(np.int64), queues
+
+    def _take_biggest_scores(
         self,
-        operation_frequency_sum: int,
-        most_common_operations: Set[int],
-    ) -> bool:
-        if (
-            operation_frequency_sum / self._total_counter.total()
-            >= self.settings.common_ops_percent_bound
-        ):
-            return True
-        if len(most_common_operations) >= self.settings.common_ops_bound:
-            return True
-        return False
+        signatures: np.ndarray,
+        queues: List[np.ndarray],
+        heads: np.ndarray,
+        frequencies: np.ndarray,
+    ) -> np.ndarray:
+        """Take up to group_size_limit pipelines with the biggest
+        acceptance scores out of the buckets, ties are broken by the slot
+        order.
+
+        :param signatures: counts of the most common operations of buckets.
+        :param queues: slots of buckets in ascending order.
+        :param heads: number of taken slots of every bucket, it is updated.
+        :param frequencies: frequencies of the most common operations.
+        :return: slots of taken pipelines, the biggest scores first.
+        """
+        sizes = np.fromiter(map(len, queues), dtype=np.intp, count=len(queues))
+        buckets = np.flatnonzero(sizes > heads)
+        scores = signatures[buckets] @ frequencies
+        need = self.settings.group_size_limit
+        taken = []
+        for score in np.unique(scores)[::-1].tolist():
+            level = buckets[scores == score]
+            candidates = np.concatenate(
+                [queues[x][heads[x] : heads[x] + need] for x in level.tolist()]
+            )
+            owners = np.repeat(
+                level, np.minimum(sizes[level] - heads[level], need)
+            )
+            order = np.argsort(candidates, kind="stable")[:need]
+            taken.append(candidates[order])
+            heads += np.bincount(owners[order], minlength=heads.size)
+            need -= order.size
+            if not need:
+                break
+        return np.concatenate(taken)
 
-    def add(self, pipelines: Union[Sequence, np.ndarray]) -> None:
-        """Add pipelines to the grouper."""
-        pipelines_array = self._validate_pipelines_and_create_array(pipelines)
-        self._concatenate_arrays(pipelines_array)
+    def _get_operations(self, columns: np.ndarray) -> Set[int]:
+        return {self._operations[column] for column in columns.tolist()}
 
-    def _concatenate_arrays(self, pipelines: np.ndarray) -> None:
+    def _make_group(
+        self, slots: np.ndarray, most_common: Set[int]
+    ) -> SourceMatrix:
+        frequency = Frequency.trusted(
+            total=max(int(self._totals.sum()), 1),
+            most_common=most_common,
+            validate=self.settings.debug_validation,
+        )
+        pipelines = self._buffer[slots]
+        self._clear(slots)
+        self._popped += slots.size
+        return SourceMatrix.trusted(
+            from_array=pipelines,
+            frequency=frequency,
+            settings_=self.settings,
+        )
+
+    def _get_group_columns(self) -> np.ndarray:
+        """
+        :return: columns of the most common operations of the next group.
+        """
+        columns = np.flatnonzero(self._totals)
+        if columns.size < 2:
+            return columns
+        return self._get_most_common_columns(columns)
+
+    def _get_most_common_columns(self, columns: np.ndarray) -> np.ndarray:
+        """Take the most frequent operations until they cover
+        common_ops_percent_bound of all operations or their number reaches
+        common_ops_bound.
+
+        :param columns: columns of operations in the backlog.
+        :return: columns of the most common operations, empty if they do not
+        cover common_ops_percent_bound.
+        """
+        total = int(self._totals.sum())
+        frequencies = self._totals[columns]
+        order = columns[np.argsort(-frequencies, kind="stable")][
+            : self.settings.group_size_limit
+        ]
+        percents = np.cumsum(self._totals[order]) / total
+        stop = (percents >= self.settings.common_ops_percent_bound) | (
+            np.arange(1, order.size + 1) >= self.settings.common_ops_bound
+        )
+        last = int(np.argmax(stop)) if stop.any() else order.size - 1
+        if percents[last] < self.settings.common_ops_percent_bound:
+            return order[:0]
+        return self._break_ties(columns, order[: last + 1])
+
+    def _break_ties(
+        self, columns: np.ndarray, most_common_columns: np.ndarray
+    ) -> np.ndarray:
+        """Choose the least frequent of the most common operations among
+        operations of equal frequency by their first appearance in the
+        backlog, pipeline by pipeline and ascending in a pipeline.
+
+        :param columns: columns of operations in the backlog.
+        :param most_common_columns: columns of the most common operations.
+        :return: columns of the most common operations.
+        """
+        frequency = self._totals[most_common_columns[-1]]
+        tied = columns[self._totals[columns] == frequency]
+        bigger = most_common_columns[
+            self._totals[most_common_columns] > frequency
+        ]
+        need = most_common_columns.size - bigger.size
+        if tied.size == need:
+            return most_common_columns
+        slots = np.flatnonzero(self._alive[: self._size])
+        first_slots = (self._counts[np.ix_(slots, tied)] != 0).argmax(axis=0)
+        operations = np.array([self._operations[x] for x in tied.tolist()])
+        tied = tied[np.lexsort((operations, first_slots))]
+        return np.concatenate((bigger, tied[:need]))
+
+    def stats(
+        self,
+        top_operations: int = constants.GROUPER_STATS_TOP_OPERATIONS,
+    ) -> GrouperStats:
+        """Snapshot of the backlog and counters.
+
+        Counters are O(1), every wait time is O(log) of the add() calls
+        of the backlog and top operations take one sort of the backlog
+        operations.
+
+        :param top_operations: max number of top operations.
+        """
+        now = time.monotonic()
+        backlog = self._alive_number
+        # the n-th shortest wait is the one of the n-th newest pipeline
+        wait_percentiles = dict()
+        for percentile in constants.GROUPER_WAIT_PERCENTILES:
+            rank = max(math.ceil(percentile * backlog / 100), 1)
+            wait_percentiles[percentile] = (
+                now - self._arrivals.get_time(backlog - rank + 1)
+                if backlog
+                else 0.0
+            )
+        columns = np.flatnonzero(self._totals)
+        columns = columns[np.argsort(-self._totals[columns], kind="stable")]
+        return GrouperStats(
+            backlog=self._alive_number,
+            added=self._added,
+            popped=self._popped,
+            groups=self._groups,
+            overdue_groups=self._overdue_groups,
+            pop_hits=self._pop_hits,
+            pop_misses=self._pop_misses,
+            ungroupable=self._alive_number if self._nothing_to_pop else 0,
+            max_wait=now - self._arrivals.get_time(1) if backlog else 0.0,
+            wait_percentiles=wait_percentiles,
+            top_operations=tuple(
+                (self._operations[column], int(self._totals[column]))
+                for column in columns[:top_operations].tolist()
+            ),
+        )
+
+    def add(
+        self,
+        pipelines: Union[Sequence, np.ndarray],
+        deadlines: Optional[Union[Sequence[float], np.ndarray]] = None,
+    ) -> None:
+        """Add pipelines to the grouper.
+
+        :param pipelines: pipelines to add.
+        :param deadlines: time.monotonic() value for every pipeline after
+            which it is overdue, settings.pipeline_max_wait applies anyway.
+        """
+        with tracing.span("grouper.add") as span:
+            pipelines_array = self._validate_pipelines_and_create_array(
+                pipelines
+            )
+            span.set(pipelines=pipelines_array.shape[0])
+            deadlines_array = self._validate_deadlines(
+                deadlines, pipelines_array.shape[0]
+            )
+            first_slot = self._append(pipelines_array, deadlines_array)
+            self._count_frequency(pipelines_array, first_slot)
+            self._buckets = None
+            self._scored_columns = None
+            self._nothing_to_pop = False
+
+    def _append(
+        self, pipelines: np.ndarray, deadlines: Optional[np.ndarray]
+    ) -> int:
+        """
+        :return: slot of the first appended pipeline.
+        """
+        self._reserve(pipelines.shape[0])
+        first_slot = self._size
         try:
-            self.pipelines = np.concatenate((self.pipelines, pipelines))
+            self._buffer[
+                first_slot : first_slot + pipelines.shape[0]
+            ] = pipelines
         except (ValueError, TypeError):
             raise exceptions.ArraysConcatError(  # noqa: B904
                 array_1=self.pipelines, array_2=pipelines
             )
+        added = slice(first_slot, first_slot + pipelines.shape[0])
+        self._alive[added] = True
+        now = time.monotonic()
+        batch, batches = self._arrivals.append(now, pipelines.shape[0])
+        if batches is not None:
+            self._batches[:first_slot] = batches[self._batches[:first_slot]]
+        self._batches[added] = batch
+        due = now + self.settings.pipeline_max_wait
+        self._due[added] = due
+        if deadlines is not None:
+            np.minimum(self._due[added], deadlines, out=self._due[added])
+            due = float(self._due[added].min())
+        self._next_due = min(self._next_due, due)
+        self._added += pipelines.shape[0]
+        self._size += pipelines.shape[0]
+        self._alive_number += pipelines.shape[0]
+        return first_slot
+
+    @staticmethod
+    def _validate_deadlines(
+        deadlines: Optional[Union[Sequence[float], np.ndarray]],
+        pipelines_number: int,
+    ) -> Optional[np.ndarray]:
+        if deadlines is None:
+            return None
+        try:
+            deadlines = np.asarray(deadlines, dtype=np.float64)
+        except (ValueError, TypeError):
+            raise exceptions.DeadlinesShapeError()  # noqa: B904
+        if deadlines.shape != (pipelines_number,) or np.isnan(deadlines).any():
+            raise exceptions.DeadlinesShapeError()
+        return deadlines
 
     def _validate_pipelines_and_create_array(
         self, pipelines: Union[tuple, list, np.ndarray]
@@ -177,11 +768,9 @@ class Grouper:
                 )
             )
         ):
-            raise exceptions.PipelinesShapeError(
-                length=self.pipelines.shape[1]
-            )
+            raise exceptions.PipelinesShapeError(length=self._buffer.shape[1])
         try:
-            pipelines = np.array(pipelines, dtype=self.pipelines.dtype)
+            pipelines = np.array(pipelines, dtype=self._buffer.dtype)
             return pipelines
         except (OverflowError, TypeError):
             raise exceptions.CreateArrayError()  # noqa: B904
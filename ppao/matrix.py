@@ -1,7 +1,9 @@
 from array import array
 from collections import defaultdict
 from functools import partial
-from typing import Dict, Generator, List, Set, Tuple, Union
+from itertools import combinations_with_replacement
+from math import prod
+from typing import Dict, Generator, List, Optional, Sequence, Set, Tuple, Union
 
 import numpy as np
 
@@ -38,6 +40,25 @@ class SourceMatrix(np.ndarray):
         obj = np.asarray(from_array).view(cls)
         return obj
 
+    @classmethod
+    def trusted(
+        cls,
+        from_array: np.ndarray,
+        frequency: Frequency,
+        settings_: settings.Settings = settings.DEFAULT_SETTINGS,
+    ) -> "SourceMatrix":
+        """Create a matrix of data made by ppao itself.
+
+        The input is validated only if settings_.debug_validation is set.
+        """
+        if settings_.debug_validation:
+            return cls(
+                from_array=from_array, frequency=frequency, settings_=settings_
+            )
+        obj = from_array.view(cls)
+        obj.__init__(from_array, frequency, settings_)
+        return obj
+
     @classmethod
     def _validate_input(
         cls,
@@ -83,7 +104,7 @@ class SourceMatrix(np.ndarray):
                 ("start", self.settings.default_shift_array_dtype),
                 ("end", self.settings.default_shift_array_dtype),
                 ("size", self.settings.default_shift_array_dtype),
-                ("key", self.settings.default_shift_array_dtype),
+                ("key", np.intp),
             ],
         )
 
@@ -167,6 +188,256 @@ class SourceMatrix(np.ndarray):
             dtype=self.settings.default_shift_array_dtype,
         ).T.reshape(-1, self.shape[0])
 
+    def iter_combinations(
+        self,
+        possible_shifts: Sequence[Tuple[int, ...]],
+        chunk_size: int,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> Generator[np.ndarray, None, None]:
+        """Yield blocks of get_all_combinations without materializing it.
+
+        :param possible_shifts: possible shifts of every row.
+        :param chunk_size: max number of combinations in a block.
+        :param start: index of the first combination.
+        :param stop: index after the last combination, all if None.
+        :return: generator of combination blocks in get_all_combinations
+        order.
+        """
+        shifts = tuple(
+            np.array(row_shifts, dtype=self.settings.default_shift_array_dtype)
+            for row_shifts in possible_shifts
+        )
+        fastest_first = self.get_rows_order(len(shifts))[::-1]
+        total = 1
+        for row_shifts in shifts:
+            total *= row_shifts.size
+        if stop is None or stop > total:
+            stop = total
+        for chunk_start in range(start, stop, chunk_size):
+            offsets = np.arange(
+                min(chunk_size, stop - chunk_start), dtype=np.int64
+            )
+            chunk = np.empty(
+                (offsets.size, len(shifts)),
+                dtype=self.settings.default_shift_array_dtype,
+            )
+            rest = chunk_start
+            for row_index in fastest_first:
+                size = shifts[row_index].size
+                rest, start_digit = divmod(rest, size)
+                offsets += start_digit
+                chunk[:, row_index] = shifts[row_index][offsets % size]
+                offsets //= size
+            yield chunk
+
+    def get_chunk_size(
+        self,
+        possible_shifts: Sequence[Tuple[int, ...]],
+        memory_limit: int,
+    ) -> int:
+        """
+        :param possible_shifts: possible shifts of every row.
+        :param memory_limit: memory budget in bytes.
+        :return: number of combinations count_results can score within
+        the memory budget.
+        """
+        rows, operations_in_pipeline = self.shape
+        width = (
+            operations_in_pipeline
+            + int(max(max(shifts) for shifts in possible_shifts))
+            - int(min(min(shifts) for shifts in possible_shifts))
+        )
+        # int32 tensor, its comparison masks and intp index arrays
+        combination_size = rows * (width * 6 + operations_in_pipeline * 8 + 32)
+        return max(1, memory_limit // combination_size)
+
+    @staticmethod
+    def get_rows_order(rows_number: int) -> Tuple[int, ...]:
+        """
+        :return: rows ordered from the slowest to the fastest changing
+        shift of get_all_combinations.
+        """
+        if rows_number < 2:
+            return tuple(range(rows_number))
+        return tuple(range(rows_number - 1, 1, -1)) + (0, 1)
+
+    def get_canonical_pieces(
+        self, possible_shifts: Sequence[Tuple[int, ...]]
+    ) -> List[List[Tuple[List[int], np.ndarray]]]:
+        """Split canonical combinations into Cartesian products.
+
+        Combinations which differ by a translation or by a permutation of
+        shifts between equal rows have equal results. Equal rows with the
+        same possible shifts form a factor of non-decreasing shifts, and a
+        combination is kept only if a row is at the start of a run of its
+        possible shifts, otherwise it can be translated by -1. At least
+        one combination of every equivalence class is kept, and
+        get_first_equivalents finds the first one of its class.
+
+        :param possible_shifts: possible shifts of every row.
+        :return: disjoint pieces, every piece is a list of factors: the
+        rows of the factor and their shifts of shape (*, rows). The first
+        factor which takes a run start is different in every piece.
+        """
+        equal_rows: Dict[
+            Tuple[bytes, Tuple[int, ...]], List[int]
+        ] = defaultdict(list)
+        for row_index in self.get_rows_order(len(possible_shifts)):
+            equal_rows[
+                (
+                    self[row_index].tobytes(),
+                    tuple(possible_shifts[row_index]),
+                )
+            ].append(row_index)
+        factors = []
+        for (_, shifts), rows in equal_rows.items():
+            run_starts = [shift for shift in shifts if shift - 1 not in shifts]
+            values = np.array(
+                list(combinations_with_replacement(sorted(shifts), len(rows))),
+                dtype=self.settings.default_shift_array_dtype,
+            )
+            factors.append(
+                (
+                    rows,
+                    values,
+                    (values[:, :, None] == run_starts).any(axis=(1, 2)),
+                )
+            )
+        pieces = []
+        for index_, (rows, values, has_start) in enumerate(factors):
+            piece = [
+                (previous_rows, previous_values[~previous_has_start])
+                for previous_rows, previous_values, previous_has_start in (
+                    factors[:index_]
+                )
+            ]
+            piece.append((rows, values[has_start]))
+            piece.extend(
+                (next_rows, next_values)
+                for next_rows, next_values, _ in factors[index_ + 1 :]
+            )
+            if all(factor_values.size for _, factor_values in piece):
+                pieces.append(piece)
+        return pieces
+
+    @staticmethod
+    def count_canonical_combinations(
+        pieces: List[List[Tuple[List[int], np.ndarray]]]
+    ) -> int:
+        """
+        :param pieces: pieces of get_canonical_pieces.
+        :return: number of combinations of iter_canonical_combinations.
+        """
+        return sum(
+            prod(values.shape[0] for _, values in piece) for piece in pieces
+        )
+
+    def iter_canonical_combinations(
+        self,
+        pieces: List[List[Tuple[List[int], np.ndarray]]],
+        chunk_size: int,
+        start: int = 0,
+        stop: Optional[int] = None,
+    ) -> Generator[np.ndarray, None, None]:
+        """Yield blocks of canonical combinations only.
+
+        :param pieces: pieces of get_canonical_pieces.
+        :param chunk_size: max number of combinations in a block.
+        :param start: index of the first canonical combination.
+        :param stop: index after the last canonical combination, all if
+        None.
+        :return: generator of combination blocks in the order of
+        get_canonical_pieces, use get_first_equivalents to compare them
+        in get_all_combinations order.
+        """
+        piece_start = 0
+        for piece in pieces:
+            piece_stop = piece_start + prod(
+                values.shape[0] for _, values in piece
+            )
+            last = piece_stop if stop is None else min(stop, piece_stop)
+            for chunk_start in range(
+                max(start, piece_start), last, chunk_size
+            ):
+                offsets = np.arange(
+                    chunk_start - piece_start,
+                    min(chunk_start + chunk_size, last) - piece_start,
+                    dtype=np.int64,
+                )
+                chunk = np.empty(
+                    (offsets.size, self.shape[0]),
+                    dtype=self.settings.default_shift_array_dtype,
+                )
+                for rows, values in reversed(piece):
+                    offsets, digits = np.divmod(offsets, values.shape[0])
+                    chunk[:, rows] = values[digits]
+                yield chunk
+            piece_start = piece_stop
+
+    def get_first_equivalents(
+        self,
+        combinations: np.ndarray,
+        possible_shifts: Sequence[Tuple[int, ...]],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Find the first combination of the equivalence class of every
+        combination in get_all_combinations order.
+
+        :param combinations: shift combinations of shape (*, rows).
+        :param possible_shifts: possible shifts of every row.
+        :return: the first equivalent combinations and their indexes in
+        get_all_combinations.
+        """
+        order = list(self.get_rows_order(len(possible_shifts)))
+        lowest = int(min(min(shifts) for shifts in possible_shifts))
+        highest = int(max(max(shifts) for shifts in possible_shifts))
+        # position of every shift in the possible shifts of a row, and
+        # the shift of every position
+        positions = np.full(
+            (len(order), highest - lowest + 1), -1, dtype=np.int64
+        )
+        values = np.zeros(positions.shape, dtype=combinations.dtype)
+        weights = np.ones(len(order), dtype=np.int64)
+        equal_rows: Dict[
+            Tuple[bytes, Tuple[int, ...]], List[int]
+        ] = defaultdict(list)
+        for key, row_index in enumerate(order):
+            shifts = possible_shifts[row_index]
+            positions[key, np.array(shifts) - lowest] = np.arange(len(shifts))
+            values[key, : len(shifts)] = shifts
+            weights[:key] *= len(shifts)
+            equal_rows[(self[row_index].tobytes(), tuple(shifts))].append(key)
+        groups = [keys for keys in equal_rows.values() if len(keys) > 1]
+        shifts = combinations[:, order].astype(np.int64) - lowest
+        keys = np.arange(len(order))
+        best_digits = np.zeros(shifts.shape, dtype=np.int64)
+        best_indexes = np.full(
+            combinations.shape[0], np.iinfo(np.int64).max, dtype=np.int64
+        )
+        for translation in range(lowest - highest, highest - lowest + 1):
+            translated = shifts + translation
+            inside = (
+                (translated >= 0) & (translated <= highest - lowest)
+            ).all(axis=1)
+            if not inside.any():
+                continue
+            digits = positions[
+                keys, np.clip(translated[inside], 0, highest - lowest)
+            ]
+            for group in groups:
+                digits[:, group] = np.sort(digits[:, group], axis=1)
+            indexes = np.where(
+                (digits >= 0).all(axis=1),
+                digits @ weights,
+                best_indexes[inside],
+            )
+            better = indexes < best_indexes[inside]
+            best_digits[np.flatnonzero(inside)[better]] = digits[better]
+            best_indexes[np.flatnonzero(inside)[better]] = indexes[better]
+        first = np.empty_like(combinations)
+        first[:, order] = values[keys, best_digits]
+        return first, best_indexes
+
     def count_result(self, shifts, best_result):
         horizontal_sequence = self.make_horizontal_sequence(
             shifts=shifts, for_counter=True
@@ -176,6 +447,53 @@ class SourceMatrix(np.ndarray):
             best_result["result"] = result
             best_result["shifts"] = shifts
 
+    def count_results(self, combinations: np.ndarray) -> np.ndarray:
+        """Count results of all shift combinations in one pass.
+
+        Every combination is placed into a (combinations, columns, rows)
+        tensor, free cells are filled with -1. Sorting each column lets us
+        count distinct operations by comparing neighbouring items.
+
+        :param combinations: shift combinations of shape (*, rows).
+        :return: the count_result value of every combination.
+        """
+        rows, operations_in_pipeline = self.shape
+        codes = (
+            np.unique(np.asarray(self), return_inverse=True)[1]
+            .reshape(self.shape)
+            .astype(np.int32)
+        )
+        shifts = combinations.astype(np.intp)
+        shifts -= shifts.min(axis=1, keepdims=True)
+        width = operations_in_pipeline + int(shifts.max(initial=0))
+        tensor = np.full(
+            (combinations.shape[0], width, rows), -1, dtype=np.int32
+        )
+        tensor[
+            np.arange(combinations.shape[0])[:, None, None],
+            shifts[:, :, None] + np.arange(operations_in_pipeline),
+            np.arange(rows)[:, None],
+        ] = codes
+        tensor.sort(axis=2)
+        distinct = (tensor[:, :, 0] != -1).sum(axis=1)
+        distinct += (tensor[:, :, 1:] != tensor[:, :, :-1]).sum(axis=(1, 2))
+        return distinct
+
+    def get_lower_bound(self) -> int:
+        """Items of a row are in different columns, so every operation
+        takes at least as many columns as it has items in one row.
+
+        :return: lower bound of count_results of any shift combination.
+        """
+        codes = np.unique(np.asarray(self), return_inverse=True)[1].reshape(
+            self.shape
+        )
+        counts = np.zeros(
+            (self.shape[0], int(codes.max(initial=0)) + 1), dtype=np.intp
+        )
+        np.add.at(counts, (np.arange(self.shape[0])[:, None], codes), 1)
+        return int(counts.max(axis=0).sum())
+
     def make_mapping(self):
         column_key = 0
         mapping: Dict[int, Dict[int, List[int]]] = defaultdict(
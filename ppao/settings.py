@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 
+import numpy as np
+
 from ppao import constants, exceptions
 
 
@@ -15,6 +17,20 @@ class Settings:
         default_dtype: default dtype used by ppao arrays.
         default_shift_array_dtype: default dtype of ppao shift arrays.
         default_array_type_code: default type code of ppao simple arrays.
+        solver_engine: search engine of the best shift combination. The
+            heuristic engines allow bigger group and pipeline size limits.
+        deduplicate_combinations: skip equivalent shift combinations.
+        combinations_memory_limit: memory budget (bytes) of combination
+            scoring, combinations are scored in blocks that fit into it.
+        scoring_workers: number of processes scoring the combinations of
+            one group in the exhaustive engine.
+        compact_solutions: solvers return CompactSolution instead of
+            Solution.
+        debug_validation: validate data passed between ppao components
+            like user input, it makes solving slower.
+        pipeline_max_wait: max seconds a pipeline waits in Grouper, older
+            pipelines are popped first, in groups of their own if they
+            can't be grouped.
     """
 
     common_ops_percent_bound: float = 0.5
@@ -24,6 +40,13 @@ class Settings:
     default_dtype: str = "uint16"
     default_shift_array_dtype: str = "int8"
     default_array_type_code: str = "I"
+    solver_engine: str = "exhaustive"
+    deduplicate_combinations: bool = True
+    combinations_memory_limit: int = 64 * 1024 * 1024
+    scoring_workers: int = 1
+    compact_solutions: bool = False
+    debug_validation: bool = False
+    pipeline_max_wait: float = float("inf")
 
     def __post_init__(self):
         for k, v in self.__annotations__.items():
@@ -44,17 +67,45 @@ class Settings:
         ):
             raise exceptions.DefaultArrayTypeCodeValidationError()
 
+        if self.solver_engine not in constants.ACCEPTABLE_SOLVER_ENGINES:
+            raise exceptions.SolverEngineValidationError()
+
         if not 0.01 <= self.common_ops_percent_bound <= 0.99:
             raise exceptions.PercentBoundValidationError()
 
         if self.common_ops_bound < 1:
             raise exceptions.CommonOpsBoundValidationError()
 
-        if not 2 <= self.group_size_limit <= 32:
-            raise exceptions.GroupSizeLimitValidationError()
+        if self.combinations_memory_limit < 1:
+            raise exceptions.CombinationsMemoryLimitValidationError()
+
+        if self.scoring_workers < 1:
+            raise exceptions.ScoringWorkersValidationError()
+
+        if not self.pipeline_max_wait >= 0:
+            raise exceptions.PipelineMaxWaitValidationError()
+
+        if self.solver_engine in constants.HEURISTIC_SOLVER_ENGINES:
+            group_size_limit = constants.HEURISTIC_GROUP_SIZE_LIMIT
+            pipeline_size_limit = constants.HEURISTIC_PIPELINE_SIZE_LIMIT
+        else:
+            group_size_limit = constants.EXACT_GROUP_SIZE_LIMIT
+            pipeline_size_limit = constants.EXACT_PIPELINE_SIZE_LIMIT
+
+        if not 2 <= self.group_size_limit <= group_size_limit:
+            raise exceptions.GroupSizeLimitValidationError(group_size_limit)
+
+        # pipeline ids of a group are stored in default_dtype arrays
+        dtype_group_size_limit = int(np.iinfo(self.default_dtype).max) + 1
+        if self.group_size_limit > dtype_group_size_limit:
+            raise exceptions.GroupSizeLimitDtypeValidationError(
+                dtype_group_size_limit
+            )
 
-        if not 2 <= self.pipeline_size_limit <= 5:
-            raise exceptions.PipelineSizeLimitValidationError()
+        if not 2 <= self.pipeline_size_limit <= pipeline_size_limit:
+            raise exceptions.PipelineSizeLimitValidationError(
+                pipeline_size_limit
+            )
 
 
 DEFAULT_SETTINGS = Settings()
@@ -1,13 +1,36 @@
-import copy
+import concurrent.futures
+import functools
+import itertools
+import math
+import time
 from array import array
 from collections import defaultdict
 from contextlib import suppress
-from typing import Dict, Generator, List, Optional, Set, Tuple
+from typing import (
+    Dict,
+    Generator,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import numpy as np
 
-from ppao import ExecutionUnit, Solution, exceptions, settings
+from ppao import constants, engines, exceptions, settings, tracing
+from ppao.cache import PlanCache
+from ppao.custom_types import (
+    CompactSolution,
+    ExecutionUnit,
+    Frequency,
+    Solution,
+    SolveStats,
+)
 from ppao.matrix import SourceMatrix
+from ppao.store import PlanStore
 
 
 class PipelineMatrixSolver:
@@ -15,60 +38,279 @@ class PipelineMatrixSolver:
 
     Attributes:
         source_matrix: pipelines matrix array.
+        cache: optional cache or persistent store of solutions shared
+            between solvers.
+        skipped_combinations: number of equivalent shift combinations
+            skipped by the last solve() call.
     """
 
     __slots__ = (
         "source_matrix",
         "settings",
+        "cache",
+        "skipped_combinations",
     )
 
     def __init__(
         self,
         source_matrix: SourceMatrix,
         settings_: settings.Settings = settings.DEFAULT_SETTINGS,
+        cache: Optional[Union[PlanCache, PlanStore]] = None,
     ) -> None:
         self.source_matrix = source_matrix
         self.settings = settings_
+        self.cache = cache
+        self.skipped_combinations = 0
 
-    def solve(self) -> Solution:
+    def solve(
+        self, deadline: Optional[float] = None
+    ) -> Union[Solution, CompactSolution]:
         """
+        :param deadline: time.monotonic() value to stop the search at. The
+            best solution found by then is returned, it is not always
+            optimal. Only optimal solutions are cached.
         :return: the problem solution.
         """
         if self.source_matrix.most_common.size == 0:
             raise exceptions.MostCommonIsEmptyError()
-        most_common_operations = self.source_matrix.most_common
-        possible_shifts: Dict[int, Set[int]] = defaultdict(set)
-        for common_operation in most_common_operations:
-            windows = self.source_matrix.get_windows(common_operation)
-            delta_offset = self.source_matrix.get_window_sizes_delta_sequence(
-                windows
+        self.skipped_combinations = 0
+        with tracing.span(
+            "solve",
+            rows=self.source_matrix.shape[0],
+            columns=self.source_matrix.shape[1],
+        ):
+            if self.cache is not None:
+                return self.cache.solve(
+                    source_matrix=self.source_matrix,
+                    settings_=self.settings,
+                    solve=functools.partial(self._solve, deadline=deadline),
+                )
+            return self._solve(self.source_matrix, deadline)
+
+    @staticmethod
+    def get_possible_shifts(
+        source_matrix: SourceMatrix,
+    ) -> Tuple[Tuple[int, ...], ...]:
+        """
+        :return: shifts of every row which align the most common
+        operations.
+        """
+        with tracing.span(
+            "solve.windows", operations=source_matrix.most_common.size
+        ):
+            delta_offsets = [
+                source_matrix.get_window_sizes_delta_sequence(
+                    source_matrix.get_windows(common_operation)
+                )
+                for common_operation in source_matrix.most_common
+            ]
+        with tracing.span("solve.shifts") as span:
+            possible_shifts: Dict[int, Set[int]] = defaultdict(set)
+            for delta_offset in delta_offsets:
+                for i, shifts in enumerate(
+                    source_matrix.get_possible_shifts(delta_offset)
+                ):
+                    possible_shifts[i].update(shifts)
+            span.set(
+                combinations=math.prod(map(len, possible_shifts.values()))
             )
-            for i, shifts in enumerate(
-                self.source_matrix.get_possible_shifts(delta_offset)
-            ):
-                possible_shifts[i].update(shifts)
-        all_combinations = self.source_matrix.get_all_combinations(
-            tuple(shifts) for shifts in possible_shifts.values()
-        )
-        best_result = {"result": np.inf}
-        tuple(
-            self.source_matrix.count_result(combination, best_result)
-            for combination in all_combinations
-        )
-        sequence, mapping = self.source_matrix.make_horizontal_sequence(
-            shifts=best_result["shifts"],
+        return tuple(tuple(shifts) for shifts in possible_shifts.values())
+
+    def _solve(
+        self, source_matrix: SourceMatrix, deadline: Optional[float] = None
+    ) -> Union[Solution, CompactSolution]:
+        # start and end times of constants.SOLVE_PHASES
+        marks = [time.perf_counter()]
+        possible_shifts = self.get_possible_shifts(source_matrix)
+        marks.append(time.perf_counter())
+        engine = engines.ENGINES[self.settings.solver_engine](
+            source_matrix=source_matrix,
+            possible_shifts=possible_shifts,
+            settings_=self.settings,
+            deadline=deadline,
         )
+        with tracing.span("solve.search") as span:
+            best_shifts, best_result = engine.search()
+            span.set(result=best_result, skipped=engine.skipped_combinations)
+        self.skipped_combinations = engine.skipped_combinations
+        marks.append(time.perf_counter())
+        with tracing.span("solve.sequence") as span:
+            sequence, mapping = source_matrix.make_horizontal_sequence(
+                shifts=best_shifts,
+            )
+            span.set(columns=len(sequence))
+        marks.append(time.perf_counter())
         horizontal_optimizer = HorizontalOptimizer(
             source_sequence=sequence,
+            settings_=self.settings,
         )
-        execution_units = horizontal_optimizer.optimize(mapping=mapping)
-        solution = Solution(
+        gap = 0
+        if not engine.optimal:
+            gap = best_result - source_matrix.get_lower_bound()
+        if self.settings.compact_solutions:
+            with tracing.span("solve.optimize", columns=len(sequence)) as span:
+                (
+                    operations,
+                    offsets,
+                    pipelines,
+                ) = horizontal_optimizer.optimize_compact(mapping=mapping)
+                span.set(units=operations.size)
+            marks.append(time.perf_counter())
+            return CompactSolution.trusted(
+                operations=operations,
+                offsets=offsets,
+                pipelines=pipelines,
+                shifts=best_shifts,
+                result=best_result,
+                optimal=engine.optimal,
+                gap=gap,
+                stats=self._make_stats(
+                    source_matrix,
+                    engine,
+                    operations.size,
+                    int(np.count_nonzero(operations)),
+                    marks,
+                ),
+                validate=self.settings.debug_validation,
+            )
+        with tracing.span("solve.optimize", columns=len(sequence)) as span:
+            execution_units = horizontal_optimizer.optimize(mapping=mapping)
+            span.set(units=len(execution_units))
+        marks.append(time.perf_counter())
+        solution = Solution.trusted(
             execution_units=execution_units,
-            shifts=best_result["shifts"],
-            result=best_result["result"],
+            shifts=best_shifts,
+            result=best_result,
+            optimal=engine.optimal,
+            gap=gap,
+            stats=self._make_stats(
+                source_matrix,
+                engine,
+                len(execution_units),
+                sum(bool(unit.operation) for unit in execution_units),
+                marks,
+            ),
+            validate=self.settings.debug_validation,
         )
         return solution
 
+    @staticmethod
+    def _make_stats(
+        source_matrix: SourceMatrix,
+        engine: engines.BaseEngine,
+        execution_units: int,
+        handler_calls: int,
+        marks: List[float],
+    ) -> SolveStats:
+        possible_shifts = tuple(map(len, engine.possible_shifts))
+        return SolveStats(
+            possible_shifts=possible_shifts,
+            combinations=math.prod(possible_shifts),
+            scored_combinations=engine.scored_combinations,
+            skipped_combinations=engine.skipped_combinations,
+            total_operations=int(np.count_nonzero(source_matrix)),
+            execution_units=execution_units,
+            handler_calls=handler_calls,
+            timings={
+                phase: stop - start
+                for phase, (start, stop) in zip(
+                    constants.SOLVE_PHASES,
+                    itertools.pairwise(marks),
+                    strict=True,
+                )
+            },
+        )
+
+
+# pipelines, total operations, most common operations
+_Group = Tuple[np.ndarray, int, Tuple[int, ...]]
+
+
+def _solve_groups(
+    groups: List[Tuple[int, _Group]], settings_: settings.Settings
+) -> List[Tuple[int, Union[Solution, Exception]]]:
+    """Solve groups in a worker process, errors are returned per group."""
+    results: List[Tuple[int, Union[Solution, Exception]]] = []
+    for index, (pipelines, total, most_common) in groups:
+        try:
+            source_matrix = SourceMatrix.trusted(
+                from_array=pipelines,
+                frequency=Frequency.trusted(
+                    total=total,
+                    most_common=set(most_common),
+                    validate=settings_.debug_validation,
+                ),
+                settings_=settings_,
+            )
+            results.append(
+                (
+                    index,
+                    PipelineMatrixSolver(
+                        source_matrix=source_matrix, settings_=settings_
+                    ).solve(),
+                )
+            )
+        except Exception as error:
+            results.append((index, error))
+    return results
+
+
+def solve_many(
+    matrices: Iterable[SourceMatrix],
+    settings_: settings.Settings = settings.DEFAULT_SETTINGS,
+    executor: Optional[concurrent.futures.Executor] = None,
+    max_workers: Optional[int] = None,
+    chunksize: int = 1,
+    ordered: bool = True,
+) -> Iterator[Union[Solution, Tuple[int, Solution]]]:
+    """Solve groups in parallel.
+
+    Groups are sent to workers as plain arrays, chunksize groups per task.
+
+    :param matrices: groups to solve.
+    :param settings_: ppao settings.
+    :param executor: executor of tasks, a ProcessPoolExecutor with
+        max_workers processes is used if None.
+    :param max_workers: number of processes of the default executor.
+    :param chunksize: number of groups solved by one task.
+    :param ordered: yield solutions in the order of matrices, otherwise
+        yield (index, solution) pairs as soon as they are solved.
+    :return: iterator of solutions. A group which can't be solved raises
+        GroupSolveError with its index when its solution is due.
+    """
+    if not isinstance(chunksize, int) or chunksize < 1:
+        raise exceptions.ChunksizeValidationError()
+    groups = (
+        (
+            index,
+            (
+                np.asarray(matrix),
+                int(matrix.total_operations),
+                tuple(matrix.most_common.tolist()),
+            ),
+        )
+        for index, matrix in enumerate(matrices)
+    )
+    chunks = iter(lambda: list(itertools.islice(groups, chunksize)), [])
+    own_executor = executor is None
+    if own_executor:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers)
+    try:
+        futures = [
+            executor.submit(_solve_groups, chunk, settings_)
+            for chunk in chunks
+        ]
+        if not ordered:
+            futures = concurrent.futures.as_completed(futures)
+        for future in futures:
+            for index, result in future.result():
+                if isinstance(result, Exception):
+                    raise exceptions.GroupSolveError(index) from result
+                yield result if ordered else (index, result)
+    finally:
+        if own_executor:
+            executor.shutdown(cancel_futures=True)
+
 
 class HorizontalOptimizer:
     """Final optimization of the solver solution."""
@@ -87,9 +329,10 @@ class HorizontalOptimizer:
     def _register(self, key: int, index_before: int, index_after: int) -> None:
         if index_after in self.sorted_parts[key].values():
             return
-        for index in (key, index_before, index_after):
-            if not isinstance(index, int) or index < 0:
-                raise exceptions.IndexValidationError()
+        if self.settings.debug_validation:
+            for index in (key, index_before, index_after):
+                if not isinstance(index, int) or index < 0:
+                    raise exceptions.IndexValidationError()
         self.sorted_parts[key][index_before] = index_after
         last_index = self._get_last_index(key)
         one_or_less_unsorted = len(self.sorted_parts[key]) >= last_index
@@ -143,11 +386,47 @@ class HorizontalOptimizer:
         )
         return execution_units
 
+    def optimize_compact(
+        self,
+        mapping: Dict[int, Dict[int, List[int]]],
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Optimize without creating ExecutionUnit objects.
+
+        :return: operations, offsets and pipelines arrays of a
+        CompactSolution.
+        """
+        self._sort_singles()
+        self._sort_both_sides()
+        self._sort_one_side()
+        sort_order = self._get_sort_order()
+        operations: List[int] = []
+        offsets = [0]
+        pipelines: List[int] = []
+        for operation, unit_pipelines in self._iterate_units(
+            sort_order=sort_order, mapping=mapping
+        ):
+            operations.append(operation)
+            pipelines.extend(unit_pipelines)
+            offsets.append(len(pipelines))
+        return (
+            np.array(operations, dtype=self.settings.default_dtype),
+            np.array(offsets, dtype=np.int64),
+            np.array(pipelines, dtype=self.settings.default_dtype),
+        )
+
     def _get_execution_units(
         self,
         sort_order: Generator[List[int], None, None],
         mapping: Dict[int, Dict[int, List[int]]],
     ) -> Generator[ExecutionUnit, None, None]:
+        for operation, pipelines in self._iterate_units(sort_order, mapping):
+            yield self._make_execution_unit(operation, pipelines)
+
+    def _iterate_units(
+        self,
+        sort_order: Generator[List[int], None, None],
+        mapping: Dict[int, Dict[int, List[int]]],
+    ) -> Generator[Tuple[int, List[int]], None, None]:
         last_operation = None
         pipelines = list()
         for sort_mapping, pipelines_mapping in zip(
@@ -158,25 +437,20 @@ class HorizontalOptimizer:
             for operation in sort_mapping:
                 if last_operation != operation:
                     if last_operation is not None:
-                        yield self._make_execution_unit(
-                            last_operation,
-                            pipelines,
-                        )
+                        yield last_operation, pipelines
                         pipelines = list()
                     last_operation = operation
                 pipelines.extend(pipelines_mapping[operation])
         if pipelines and last_operation is not None:
-            yield self._make_execution_unit(last_operation, pipelines)
+            yield last_operation, pipelines
 
     def _make_execution_unit(
         self, operation: int, pipelines: List[int]
     ) -> ExecutionUnit:
-        return ExecutionUnit(
+        return ExecutionUnit.trusted(
             operation=operation,
-            pipelines=np.array(
-                copy.deepcopy(pipelines),
-                dtype=self.settings.default_dtype,
-            ),
+            pipelines=np.array(pipelines, dtype=self.settings.default_dtype),
+            validate=self.settings.debug_validation,
         )
 
     def _sort_both_sides(self) -> None:
@@ -0,0 +1,351 @@
+"""Persistent storage of solutions shared between processes."""
+import fcntl
+import hashlib
+import os
+import struct
+from typing import Callable, Hashable, Optional, Tuple, Union
+
+import numpy as np
+
+from ppao import constants, exceptions, settings, wire
+from ppao.cache import CanonicalMatrix
+from ppao.custom_types import CompactSolution, Solution
+from ppao.matrix import SourceMatrix
+
+# magic, format version, solver version, capacity
+_HEADER = struct.Struct("<8sIIQ")
+_HEADER_SIZE = 64
+_MAGIC = b"PPAOPLAN"
+_SLOT_DTYPE = np.dtype(
+    [("key", "<u8", (2,)), ("offset", "<u8"), ("length", "<u8")]
+)
+# length of a field of the hashed key
+_FIELD_LENGTH = struct.Struct("<Q")
+# canonical rows of a stored record
+_ROWS_DTYPE = np.dtype("<u4")
+
+
+class PlanStore:
+    """File-backed store of solutions keyed by CanonicalMatrix.
+
+    The index is a memory-mapped open addressing hash table, so processes
+    of one host read it concurrently without locks. Writers are serialized
+    by an exclusive lock of the index file, solutions are appended to the
+    data file and published in the index afterwards. The index header
+    keeps constants.SOLVER_VERSION, a store written by another version is
+    cleared when it is opened for writing and ignored when it is opened
+    read-only. As in PlanCache, a miss solves the caller's matrix and
+    stores its solution mapped to the canonical matrix with the canonical
+    rows of the solve, and a hit in another row order is optimal only if
+    it reaches the lower bound. Solutions which are not proven optimal
+    are not stored. SolveStats are not stored, solutions loaded from the
+    store have none.
+
+    Attributes:
+        path: directory of the store files.
+        capacity: number of index slots, solutions beyond it are not stored.
+        readonly: never write to the store.
+        hits: number of solutions found in the store.
+        misses: number of solutions computed by the solver.
+    """
+
+    __slots__ = (
+        "path",
+        "capacity",
+        "readonly",
+        "hits",
+        "misses",
+        "_solver_version",
+        "_index_fd",
+        "_data_fd",
+        "_index",
+    )
+
+    def __init__(
+        self,
+        path: Union[str, os.PathLike],
+        capacity: int = 4096,
+        readonly: bool = False,
+    ) -> None:
+        if not isinstance(capacity, int) or capacity < 1:
+            raise exceptions.PlanStoreCapacityValidationError()
+        self.path = os.fspath(path)
+        self.capacity = capacity
+        self.readonly = readonly
+        self.hits = 0
+        self.misses = 0
+        self._solver_version = constants.SOLVER_VERSION
+        self._index_fd: Optional[int] = None
+        self._data_fd: Optional[int] = None
+        self._index: Optional[np.memmap] = None
+        if readonly:
+            self._open_readonly()
+        else:
+            self._open()
+
+    def _open(self) -> None:
+        os.makedirs(self.path, exist_ok=True)
+        self._index_fd = os.open(
+            os.path.join(self.path, constants.PLAN_STORE_INDEX_FILE),
+            os.O_RDWR | os.O_CREAT,
+            0o644,
+        )
+        self._data_fd = os.open(
+            os.path.join(self.path, constants.PLAN_STORE_DATA_FILE),
+            os.O_RDWR | os.O_CREAT | os.O_APPEND,
+            0o644,
+        )
+        fcntl.flock(self._index_fd, fcntl.LOCK_EX)
+        try:
+            capacity = self._read_capacity()
+            if capacity is None:
+                self._reset()
+            else:
+                self.capacity = capacity
+        finally:
+            fcntl.flock(self._index_fd, fcntl.LOCK_UN)
+        self._index = np.memmap(
+            os.fdopen(self._index_fd, "r+b", closefd=False),
+            dtype=_SLOT_DTYPE,
+            mode="r+",
+            offset=_HEADER_SIZE,
+            shape=(self.capacity,),
+        )
+
+    def _open_readonly(self) -> None:
+        try:
+            self._index_fd = os.open(
+                os.path.join(self.path, constants.PLAN_STORE_INDEX_FILE),
+                os.O_RDONLY,
+            )
+            self._data_fd = os.open(
+                os.path.join(self.path, constants.PLAN_STORE_DATA_FILE),
+                os.O_RDONLY,
+            )
+        except FileNotFoundError:
+            self.close()
+            return
+        capacity = self._read_capacity()
+        if capacity is None:
+            self.close()
+            return
+        self.capacity = capacity
+        self._index = np.memmap(
+            os.fdopen(self._index_fd, "rb", closefd=False),
+            dtype=_SLOT_DTYPE,
+            mode="r",
+            offset=_HEADER_SIZE,
+            shape=(self.capacity,),
+        )
+
+    def _read_capacity(self) -> Optional[int]:
+        """
+        :return: capacity of a valid store of the current solver version.
+        """
+        header = os.pread(self._index_fd, _HEADER.size, 0)
+        if len(header) < _HEADER.size:
+            return None
+        magic, format_version, solver_version, capacity = _HEADER.unpack(
+            header
+        )
+        size = os.fstat(self._index_fd).st_size
+        if (
+            magic != _MAGIC
+            or format_version != constants.PLAN_STORE_FORMAT_VERSION
+            or solver_version != self._solver_version
+            or size < _HEADER_SIZE + capacity * _SLOT_DTYPE.itemsize
+        ):
+            return None
+        return capacity
+
+    def _reset(self) -> None:
+        """Drop all solutions and write the header of the current version.
+
+        The index of an existing store keeps its size, because other
+        processes may still have it mapped.
+        """
+        size = os.fstat(self._index_fd).st_size
+        if size >= _HEADER_SIZE + _SLOT_DTYPE.itemsize:
+            self.capacity = (size - _HEADER_SIZE) // _SLOT_DTYPE.itemsize
+        index_size = _HEADER_SIZE + self.capacity * _SLOT_DTYPE.itemsize
+        os.ftruncate(self._index_fd, index_size)
+        os.pwrite(self._index_fd, bytes(index_size), 0)
+        os.ftruncate(self._data_fd, 0)
+        os.pwrite(
+            self._index_fd,
+            _HEADER.pack(
+                _MAGIC,
+                constants.PLAN_STORE_FORMAT_VERSION,
+                self._solver_version,
+                self.capacity,
+            ),
+            0,
+        )
+
+    def close(self) -> None:
+        """Close the store files."""
+        self._index = None
+        for fd in (self._index_fd, self._data_fd):
+            if fd is not None:
+                os.close(fd)
+        self._index_fd = None
+        self._data_fd = None
+
+    @staticmethod
+    def _get_digest(key: Hashable) -> np.ndarray:
+        """Hash a CanonicalMatrix key, a stored digest is never zero.
+
+        Every field is hashed in a fixed binary layout with its length,
+        so digests are the same in every process and Python version. Only
+        constants.PLAN_KEY_SETTINGS of the key settings are hashed, the
+        rest does not change the plan: the search result is the same with
+        any memory limit, number of workers or deduplication, and the
+        solution form and validation are applied when a plan is loaded.
+        So processes with different tuning share plans.
+        """
+        shape, labels, most_common, settings_ = key
+        fields = [
+            np.array(shape, dtype="<u8").tobytes(),
+            np.array(most_common, dtype="<u4").tobytes(),
+        ]
+        for name in constants.PLAN_KEY_SETTINGS:
+            fields += (
+                name.encode(),
+                _encode_setting(getattr(settings_, name)),
+            )
+        digest = hashlib.blake2b(
+            b"".join(_FIELD_LENGTH.pack(len(x)) + x for x in fields) + labels,
+            digest_size=16,
+        ).digest()
+        words = np.frombuffer(digest, dtype="<u8").copy()
+        words[0] |= np.uint64(1)
+        return words
+
+    def _find(self, digest: np.ndarray) -> Tuple[Optional[int], bool]:
+        """Linear probing of the index.
+
+        :return: slot of the digest or the empty slot for it, and whether
+        the digest is found.
+        """
+        start = int(digest[1] % self.capacity)
+        for step in range(self.capacity):
+            slot = (start + step) % self.capacity
+            key = self._index[slot]["key"]
+            if not key[0]:
+                return slot, False
+            if key[0] == digest[0] and key[1] == digest[1]:
+                return slot, True
+        return None, False
+
+    def _load(
+        self, digest: np.ndarray, rows: int, settings_: settings.Settings
+    ) -> Optional[Tuple[Union[Solution, CompactSolution], np.ndarray]]:
+        """
+        :param digest: digest of the canonical matrix.
+        :param rows: number of rows of the canonical matrix.
+        :param settings_: ppao settings.
+        :return: stored solution and canonical rows of its solve.
+        """
+        if self._index is None:
+            return None
+        slot, found = self._find(digest)
+        if not found:
+            return None
+        offset, length = (
+            int(self._index[slot]["offset"]),
+            int(self._index[slot]["length"]),
+        )
+        record = os.pread(self._data_fd, length, offset)
+        start = 16 + rows * _ROWS_DTYPE.itemsize
+        if len(record) < max(length, start) or record[:16] != digest.tobytes():
+            return None
+        return (
+            _decode(memoryview(record)[start:], settings_),
+            np.frombuffer(record, dtype=_ROWS_DTYPE, count=rows, offset=16),
+        )
+
+    def _save(
+        self,
+        digest: np.ndarray,
+        solution: Union[Solution, CompactSolution],
+        rows: np.ndarray,
+        settings_: settings.Settings,
+    ) -> None:
+        if self._index is None or self.readonly or not solution.optimal:
+            return
+        fcntl.flock(self._index_fd, fcntl.LOCK_EX)
+        try:
+            if self._read_capacity() != self.capacity:
+                return
+            slot, found = self._find(digest)
+            if slot is None or found:
+                return
+            record = (
+                digest.tobytes()
+                + rows.astype(_ROWS_DTYPE).tobytes()
+                + _encode(solution, settings_)
+            )
+            offset = os.lseek(self._data_fd, 0, os.SEEK_END)
+            os.write(self._data_fd, record)
+            self._index[slot]["offset"] = offset
+            self._index[slot]["length"] = len(record)
+            self._index[slot]["key"] = digest
+            self._index.flush()
+        finally:
+            fcntl.flock(self._index_fd, fcntl.LOCK_UN)
+
+    def solve(
+        self,
+        source_matrix: SourceMatrix,
+        settings_: settings.Settings,
+        solve: Callable[[SourceMatrix], Union[Solution, CompactSolution]],
+    ) -> Union[Solution, CompactSolution]:
+        """Get the solution from the store or solve and store it.
+
+        :param source_matrix: matrix to solve.
+        :param settings_: ppao settings.
+        :param solve: function solving a SourceMatrix.
+        :return: solution of the source matrix.
+        """
+        canonical_matrix = CanonicalMatrix.from_source_matrix(
+            source_matrix, settings_
+        )
+        digest = self._get_digest(canonical_matrix.key)
+        stored = self._load(digest, canonical_matrix.rows.size, settings_)
+        if stored is None:
+            self.misses += 1
+            solution = solve(source_matrix)
+            if solution.optimal:
+                self._save(
+                    digest,
+                    canonical_matrix.to_canonical(solution),
+                    canonical_matrix.rows,
+                    settings_,
+                )
+            return solution
+        self.hits += 1
+        return canonical_matrix.to_original(*stored)
+
+
+def _encode_setting(value: Union[str, int, float]) -> bytes:
+    """Typed binary encoding of a setting value."""
+    if isinstance(value, str):
+        return b"s" + value.encode()
+    if isinstance(value, float):
+        return b"f" + struct.pack("<d", value)
+    return b"i" + struct.pack("<q", value)
+
+
+def _encode(
+    solution: Union[Solution, CompactSolution], settings_: settings.Settings
+) -> bytes:
+    return bytes(wire.to_buffer(solution, settings_=settings_))
+
+
+def _decode(
+    record: memoryview, settings_: settings.Settings
+) -> Union[Solution, CompactSolution]:
+    solution = wire.from_buffer(record, settings_)
+    if settings_.compact_solutions:
+        return solution
+    return solution.to_solution()
@@ -0,0 +1,143 @@
+"""Stage-level tracing hooks.
+
+Stages of Grouper, PipelineMatrixSolver and SolutionExecutor are wrapped
+into spans. A span reports its start and its stop with the duration and
+the sizes of the stage to the tracer set by set_tracer. There is no
+tracer by default and a span is a shared no-op object, so disabled
+tracing costs one function call per stage. Tracers are per process,
+worker processes of solve_many and of the parallel scoring are not traced
+unless they set a tracer themselves.
+
+Stages:
+    grouper.add: pipelines.
+    grouper.pop: backlog, groups.
+    solve: rows, columns.
+    solve.windows: operations.
+    solve.shifts: combinations.
+    solve.search: result, skipped.
+    search.enumerate: combinations.
+    search.score: combinations.
+    solve.sequence: columns.
+    solve.optimize: columns, units.
+    execute: units.
+"""
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+
+class Tracer:
+    """Receiver of span events, the base class ignores them.
+
+    Methods are called in the thread of the traced stage, they should be
+    fast and must not raise.
+    """
+
+    __slots__ = ()
+
+    def on_start(self, stage: str, sizes: Dict[str, int]) -> None:
+        """
+        :param stage: stage name.
+        :param sizes: sizes known before the stage.
+        """
+
+    def on_stop(
+        self, stage: str, duration: float, sizes: Dict[str, int]
+    ) -> None:
+        """
+        :param stage: stage name.
+        :param duration: duration of the stage in seconds.
+        :param sizes: sizes of the stage.
+        """
+
+
+class RecordingTracer(Tracer):
+    """Tracer which keeps (stage, duration, sizes) of stopped spans.
+
+    Attributes:
+        events: stopped spans in the order of their stops.
+    """
+
+    __slots__ = ("events",)
+
+    def __init__(self) -> None:
+        self.events: List[Tuple[str, float, Dict[str, int]]] = []
+
+    def on_stop(
+        self, stage: str, duration: float, sizes: Dict[str, int]
+    ) -> None:
+        self.events.append((stage, duration, sizes))
+
+
+class Span:
+    """Context manager of a traced stage.
+
+    Attributes:
+        tracer: receiver of the events.
+        stage: stage name.
+        sizes: sizes of the stage, set() adds the ones known later.
+    """
+
+    __slots__ = ("tracer", "stage", "sizes", "_start")
+
+    def __init__(
+        self, tracer: Tracer, stage: str, sizes: Dict[str, int]
+    ) -> None:
+        self.tracer = tracer
+        self.stage = stage
+        self.sizes = sizes
+        self._start = 0.0
+
+    def set(self, **sizes: int) -> None:
+        self.sizes.update(sizes)
+
+    def __enter__(self) -> "Span":
+        self.tracer.on_start(self.stage, self.sizes)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.tracer.on_stop(
+            self.stage, time.perf_counter() - self._start, self.sizes
+        )
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(self, **sizes: int) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_tracer: Optional[Tracer] = None
+
+
+def set_tracer(tracer: Optional[Tracer]) -> Optional[Tracer]:
+    """Set the tracer of this process, None disables tracing.
+
+    :return: the previous tracer.
+    """
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def span(stage: str, **sizes: int) -> Union[Span, _NoopSpan]:
+    """
+    :param stage: stage name.
+    :param sizes: sizes known before the stage.
+    :return: a Span if tracing is enabled, otherwise a no-op span.
+    """
+    if _tracer is None:
+        return _NOOP_SPAN
+    return Span(_tracer, stage, sizes)
@@ -0,0 +1,289 @@
+"""Binary wire format of solutions and source matrices.
+
+A buffer starts with a header: magic b"PPAOWIRE", format version (u4) and
+kind (u4). All integers are little-endian, every array starts at a
+multiple of 8 bytes and keeps its own dtype.
+
+A solution (kind 1) continues with result (i8), gap (i8), number of
+execution units (u8), pipelines size (u8), shifts size (u8), optimal (u4)
+and the dtypes of operations, pipelines and shifts (4 bytes each, the
+numpy dtype string padded with zeros), followed by the offsets (i8),
+operations, pipelines and shifts arrays of CompactSolution.
+
+A source matrix (kind 2) continues with rows (u8), columns (u8), total
+operations (u8), number of most common operations (u8) and the dtype of
+the matrix, followed by the matrix and the most common operations arrays,
+both of the matrix dtype.
+
+SolveStats of a solution are not encoded.
+
+Decoding does not copy arrays, they are read-only or writable views of
+the buffer depending on the buffer, so the buffer must outlive them.
+"""
+import struct
+from multiprocessing import shared_memory
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from ppao import constants, exceptions, settings
+from ppao.custom_types import CompactSolution, Frequency, Solution
+from ppao.matrix import SourceMatrix
+
+_MAGIC = b"PPAOWIRE"
+_HEADER = struct.Struct("<8sII")
+# result, gap, units number, pipelines size, shifts size, optimal, dtypes
+_SOLUTION_HEADER = struct.Struct("<qqQQQI4s4s4s")
+# rows, columns, total operations, most common size, dtype
+_MATRIX_HEADER = struct.Struct("<QQQQ4s")
+_SOLUTION_KIND = 1
+_MATRIX_KIND = 2
+_ALIGNMENT = 8
+
+WireObject = Union[Solution, CompactSolution, SourceMatrix]
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _pack_dtype(dtype: np.dtype) -> bytes:
+    return dtype.str.encode("ascii")
+
+
+def _unpack_dtype(packed: bytes) -> np.dtype:
+    try:
+        return np.dtype(packed.rstrip(b"\0").decode("ascii"))
+    except (UnicodeDecodeError, TypeError) as e:
+        raise exceptions.WireFormatError() from e
+
+
+def _layout(
+    obj: WireObject, settings_: settings.Settings
+) -> Tuple[int, bytes, List[Tuple[int, np.ndarray]]]:
+    """
+    :return: buffer size, packed kind header and arrays with their offsets.
+    """
+    if isinstance(obj, SourceMatrix):
+        matrix = np.ascontiguousarray(obj).view(np.ndarray)
+        arrays = (matrix, obj.most_common.astype(matrix.dtype))
+        kind = _MATRIX_KIND
+        header = _MATRIX_HEADER.pack(
+            *matrix.shape,
+            int(obj.total_operations),
+            arrays[1].size,
+            _pack_dtype(matrix.dtype),
+        )
+    else:
+        if not isinstance(obj, CompactSolution):
+            obj = CompactSolution.from_solution(
+                obj, dtype=settings_.default_dtype
+            )
+        arrays = (
+            obj.offsets.astype("<i8", copy=False),
+            obj.operations,
+            obj.pipelines,
+            obj.shifts,
+        )
+        kind = _SOLUTION_KIND
+        header = _SOLUTION_HEADER.pack(
+            obj.result,
+            obj.gap,
+            obj.operations.size,
+            obj.pipelines.size,
+            obj.shifts.size,
+            obj.optimal,
+            _pack_dtype(obj.operations.dtype),
+            _pack_dtype(obj.pipelines.dtype),
+            _pack_dtype(obj.shifts.dtype),
+        )
+    header = _HEADER.pack(_MAGIC, constants.WIRE_FORMAT_VERSION, kind) + (
+        header
+    )
+    offset = _align(len(header))
+    placed = []
+    for array_ in arrays:
+        placed.append((offset, array_))
+        offset = _align(offset + array_.nbytes)
+    return offset, header, placed
+
+
+def get_buffer_size(
+    obj: WireObject, settings_: settings.Settings = settings.DEFAULT_SETTINGS
+) -> int:
+    """
+    :param obj: solution or source matrix.
+    :param settings_: ppao settings, a Solution is encoded with the
+        default dtype.
+    :return: number of bytes of the encoded object.
+    """
+    return _layout(obj, settings_)[0]
+
+
+def to_buffer(
+    obj: WireObject,
+    out: Optional[Union[bytearray, memoryview]] = None,
+    settings_: settings.Settings = settings.DEFAULT_SETTINGS,
+) -> Union[bytearray, memoryview]:
+    """Encode a solution or a source matrix.
+
+    :param obj: solution or source matrix.
+    :param out: writable buffer of at least get_buffer_size(obj) bytes to
+        encode into, a new bytearray is created if None.
+    :param settings_: ppao settings, a Solution is encoded with the
+        default dtype.
+    :return: out or the new bytearray.
+    """
+    size, header, arrays = _layout(obj, settings_)
+    if out is None:
+        out = bytearray(size)
+    elif len(out) < size:
+        raise exceptions.WireBufferSizeError(size=size)
+    out[: len(header)] = header
+    for offset, array_ in arrays:
+        np.frombuffer(
+            out, dtype=array_.dtype, count=array_.size, offset=offset
+        )[:] = array_.ravel()
+    return out
+
+
+def from_buffer(
+    buffer: Union[bytes, bytearray, memoryview],
+    settings_: settings.Settings = settings.DEFAULT_SETTINGS,
+) -> Union[CompactSolution, SourceMatrix]:
+    """Decode a solution or a source matrix without copying its arrays.
+
+    :param buffer: buffer made by to_buffer.
+    :param settings_: settings of the decoded source matrix.
+    :return: CompactSolution or SourceMatrix backed by the buffer.
+    """
+    try:
+        magic, version, kind = _HEADER.unpack_from(buffer)
+        if magic != _MAGIC or version != constants.WIRE_FORMAT_VERSION:
+            raise exceptions.WireFormatError()
+        if kind == _SOLUTION_KIND:
+            return _decode_solution(buffer)
+        if kind == _MATRIX_KIND:
+            return _decode_matrix(buffer, settings_)
+    except (struct.error, ValueError) as e:
+        raise exceptions.WireFormatError() from e
+    raise exceptions.WireFormatError()
+
+
+def _read_arrays(
+    buffer: Union[bytes, bytearray, memoryview],
+    offset: int,
+    arrays: Tuple[Tuple[np.dtype, int], ...],
+) -> List[np.ndarray]:
+    result = []
+    for dtype, size in arrays:
+        offset = _align(offset)
+        result.append(
+            np.frombuffer(buffer, dtype=dtype, count=size, offset=offset)
+        )
+        offset += result[-1].nbytes
+    return result
+
+
+def _decode_solution(
+    buffer: Union[bytes, bytearray, memoryview]
+) -> CompactSolution:
+    (
+        result,
+        gap,
+        units_number,
+        pipelines_size,
+        shifts_size,
+        optimal,
+        operations_dtype,
+        pipelines_dtype,
+        shifts_dtype,
+    ) = _SOLUTION_HEADER.unpack_from(buffer, _HEADER.size)
+    offsets, operations, pipelines, shifts = _read_arrays(
+        buffer,
+        _HEADER.size + _SOLUTION_HEADER.size,
+        (
+            (np.dtype("<i8"), units_number + 1),
+            (_unpack_dtype(operations_dtype), units_number),
+            (_unpack_dtype(pipelines_dtype), pipelines_size),
+            (_unpack_dtype(shifts_dtype), shifts_size),
+        ),
+    )
+    return CompactSolution(
+        operations=operations,
+        offsets=offsets,
+        pipelines=pipelines,
+        shifts=shifts,
+        result=result,
+        optimal=bool(optimal),
+        gap=gap,
+    )
+
+
+def _decode_matrix(
+    buffer: Union[bytes, bytearray, memoryview], settings_: settings.Settings
+) -> SourceMatrix:
+    rows, columns, total, most_common_size, dtype = _MATRIX_HEADER.unpack_from(
+        buffer, _HEADER.size
+    )
+    dtype = _unpack_dtype(dtype)
+    matrix, most_common = _read_arrays(
+        buffer,
+        _HEADER.size + _MATRIX_HEADER.size,
+        ((dtype, rows * columns), (dtype, most_common_size)),
+    )
+    return SourceMatrix(
+        from_array=matrix.reshape(rows, columns),
+        frequency=Frequency(
+            total=total, most_common=set(most_common.tolist())
+        ),
+        settings_=settings_,
+    )
+
+
+def to_shared_memory(
+    obj: WireObject,
+    name: Optional[str] = None,
+    settings_: settings.Settings = settings.DEFAULT_SETTINGS,
+) -> shared_memory.SharedMemory:
+    """Encode a solution or a source matrix into a new shared memory block.
+
+    The caller owns the block and unlinks it when it is not needed.
+
+    :param obj: solution or source matrix.
+    :param name: name of the block, a random one is used if None.
+    :param settings_: ppao settings, a Solution is encoded with the
+        default dtype.
+    :return: the shared memory block, pass its name to from_shared_memory.
+    """
+    block = shared_memory.SharedMemory(
+        name=name, create=True, size=get_buffer_size(obj, settings_)
+    )
+    try:
+        to_buffer(obj, out=block.buf, settings_=settings_)
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+    return block
+
+
+def from_shared_memory(
+    name: str,
+    settings_: settings.Settings = settings.DEFAULT_SETTINGS,
+) -> Tuple[Union[CompactSolution, SourceMatrix], shared_memory.SharedMemory]:
+    """Attach to a shared memory block made by to_shared_memory.
+
+    Decoded arrays are views of the block, release them before closing the
+    block.
+
+    :param name: name of the block.
+    :param settings_: settings of the decoded source matrix.
+    :return: the decoded object and the attached block.
+    """
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return from_buffer(block.buf, settings_), block
+    except BaseException:
+        block.close()
+        raise
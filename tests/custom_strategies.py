@@ -1,6 +1,6 @@
 from collections import Counter, defaultdict, namedtuple
 from contextlib import suppress
-from typing import Optional, Set, Type
+from typing import List, Optional, Set, Type
 
 import hypothesis.extra.numpy as np_st
 import numpy as np
@@ -56,6 +56,7 @@ def correct_settings(
         or draw(
             st.sampled_from(constants.ACCEPTABLE_DEFAULT_SHIFT_ARRAY_DTYPE)
         ),
+        debug_validation=draw(st.booleans()),
     )
     return settings_
 
@@ -223,3 +224,38 @@ def frequency(pipelines, settings_) -> Optional[Frequency]:
     return Frequency(
         most_common=most_common_operations, total=total_counter.total()
     )
+
+
+def pipelines_from_solution(solution, rows_number: int) -> List[List[int]]:
+    """Replay the solution and collect operations of every pipeline."""
+    pipelines = [[] for _ in range(rows_number)]
+    for execution_unit in solution:
+        for pipeline_id in execution_unit.pipelines:
+            pipelines[pipeline_id].append(execution_unit.operation)
+    return pipelines
+
+
+def count_operations(pipelines: np.ndarray) -> Counter:
+    """Count non-zero operations of pipelines from scratch."""
+    counter = Counter(pipelines.ravel().tolist())
+    del counter[0]
+    return counter
+
+
+def total_counter(grouper: Grouper) -> Counter:
+    """Operation frequencies of the Grouper count matrix."""
+    return Counter(
+        {
+            operation: int(grouper._totals[column])
+            for column, operation in enumerate(grouper._operations)
+            if grouper._totals[column]
+        }
+    )
+
+
+def most_common_columns(grouper: Grouper) -> np.ndarray:
+    """Columns of the most common operations of the Grouper backlog."""
+    columns = np.flatnonzero(grouper._totals)
+    if not columns.size:
+        return columns
+    return grouper._get_most_common_columns(columns)
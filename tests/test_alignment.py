@@ -0,0 +1,68 @@
+from datetime import timedelta
+
+import pytest
+from hypothesis import Verbosity, assume, given
+from hypothesis import settings as hypothesis_settings
+from hypothesis import strategies as st
+
+import ppao
+import tests.custom_strategies as custom_st
+from ppao import constants, settings
+
+
+def check_order(source_matrix, solution):
+    """Every pipeline runs its operations in its own order."""
+    operations = [[] for _ in range(source_matrix.shape[0])]
+    for execution_unit in solution:
+        for pipeline in execution_unit.pipelines.tolist():
+            operations[pipeline].append(execution_unit.operation)
+    for row, row_operations in zip(
+        source_matrix.tolist(), operations, strict=True
+    ):
+        assert [operation for operation in row if operation] == (
+            row_operations
+        )
+
+
+@given(
+    settings_=custom_st.correct_settings(),
+    pipelines=st.data(),
+    states_limit=st.sampled_from((0, constants.ALIGNMENT_STATES_LIMIT)),
+)
+@hypothesis_settings(
+    verbosity=Verbosity.verbose,
+    max_examples=300,
+    deadline=timedelta(seconds=2),
+)
+def test_supersequence_solver(
+    settings_: settings.Settings, pipelines, states_limit
+):
+    pipelines = pipelines.draw(
+        custom_st.correct_pipelines_numpy_array(
+            pipeline_size_limit=settings_.pipeline_size_limit,
+            max_rows=settings_.group_size_limit,
+        )
+    )
+    frequency = custom_st.frequency(pipelines=pipelines, settings_=settings_)
+    assume(frequency is not None)
+    source_matrix = ppao.SourceMatrix(
+        from_array=pipelines,
+        settings_=settings_,
+        frequency=frequency,
+    )
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(constants, "ALIGNMENT_STATES_LIMIT", states_limit)
+        solution = ppao.SupersequenceSolver(
+            source_matrix=source_matrix, settings_=settings_
+        ).solve()
+    check_order(source_matrix, solution)
+    assert solution.result == len(solution)
+    assert solution.optimal or solution.gap > 0
+    shift_solution = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix, settings_=settings_
+    ).solve()
+    if solution.optimal:
+        # a shift solution is one of the supersequences
+        assert solution.result <= sum(
+            1 for execution_unit in shift_solution if execution_unit.operation
+        )
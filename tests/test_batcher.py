@@ -0,0 +1,87 @@
+import asyncio
+import collections
+
+import numpy as np
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+import ppao
+from ppao import exceptions, settings
+
+
+def operations_of(placement):
+    return collections.Counter(
+        execution_unit.operation
+        for execution_unit in placement.solution
+        for pipeline in execution_unit.pipelines.tolist()
+        if pipeline == placement.pipeline and execution_unit.operation
+    )
+
+
+def test_batcher():
+    settings_ = settings.Settings(common_ops_percent_bound=0.3)
+    pipelines = [
+        [1, 3, 1, 2],
+        [1, 1, 1, 2],
+        [3, 2, 1, 1],
+        [1, 2, 2, 1],
+        [1, 3, 1, 2],
+        [7, 8, 9, 0],
+    ]
+
+    async def main():
+        batcher = ppao.Batcher(settings_=settings_, max_wait=60)
+        tasks = [
+            asyncio.create_task(batcher.submit(pipeline))
+            for pipeline in pipelines
+        ]
+        # the first group is full and does not wait for the timer
+        await asyncio.wait_for(
+            asyncio.gather(*tasks[: settings_.group_size_limit]), timeout=30
+        )
+        assert not any(
+            task.done() for task in tasks[settings_.group_size_limit :]
+        )
+        await batcher.flush()
+        return [task.result() for task in tasks]
+
+    placements = asyncio.run(main())
+    for pipeline, placement in zip(pipelines, placements, strict=True):
+        assert operations_of(placement) == collections.Counter(
+            operation for operation in pipeline if operation
+        )
+    assert len({id(placement.solution) for placement in placements}) == 2
+    # equal pipelines never share a place
+    assert len(
+        {
+            (id(placement.solution), placement.pipeline)
+            for placement in placements
+        }
+    ) == len(pipelines)
+
+
+def test_batcher_max_wait():
+    async def main():
+        batcher = ppao.Batcher(max_wait=0.01)
+        return await asyncio.wait_for(
+            batcher.submit(np.array([1, 2, 0, 0])), timeout=30
+        )
+
+    placement = asyncio.run(main())
+    assert placement.pipeline == 0
+    assert operations_of(placement) == collections.Counter((1, 2))
+
+
+def test_batcher_pipeline_fail():
+    async def main():
+        await ppao.Batcher().submit([1, 2])
+
+    with pytest.raises(exceptions.PipelinesShapeError):
+        asyncio.run(main())
+
+
+@given(max_wait=st.floats(max_value=0, exclude_max=True) | st.text())
+def test_batcher_max_wait_fail(max_wait):
+    with pytest.raises(exceptions.MaxWaitValidationError):
+        ppao.Batcher(max_wait=max_wait)
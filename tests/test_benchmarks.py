@@ -0,0 +1,37 @@
+import json
+import os
+import tempfile
+
+from benchmarks import suite
+
+
+def test_benchmark_suite():
+    with tempfile.TemporaryDirectory() as path:
+        output = os.path.join(path, "results.json")
+        assert suite.main(["--quick", "--output", output]) == 0
+        with open(output) as file:
+            report = json.load(file)
+        assert {result["benchmark"] for result in report["results"]} >= {
+            "grouper_add",
+            "grouper_pop",
+            "get_all_combinations",
+            "count_results",
+            "make_horizontal_sequence",
+            "horizontal_optimize",
+            "solve",
+        }
+        assert all(
+            result["min"] <= result["median"] and result["peak_memory"] > 0
+            for result in report["results"]
+        )
+        for result in report["results"]:
+            result["min"] *= 1000
+        with open(output, "w") as file:
+            json.dump(report, file)
+        # faster than a slow baseline
+        assert suite.main(["--quick", "--baseline", output]) == 0
+        for result in report["results"]:
+            result["min"] /= 1000000
+        with open(output, "w") as file:
+            json.dump(report, file)
+        assert suite.main(["--quick", "--baseline", output]) == 1
@@ -0,0 +1,299 @@
+import itertools
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from hypothesis import Verbosity, assume, given
+from hypothesis import settings as hypothesis_settings
+from hypothesis import strategies as st
+
+import ppao
+import tests.custom_strategies as custom_st
+from ppao import constants, exceptions, settings
+from ppao.cache import CanonicalMatrix
+
+
+@given(
+    settings_=custom_st.correct_settings(),
+    data=st.data(),
+)
+@hypothesis_settings(
+    verbosity=Verbosity.verbose,
+    max_examples=300,
+    deadline=timedelta(seconds=1),
+)
+def test_plan_cache(settings_: settings.Settings, data):
+    pipelines = data.draw(
+        custom_st.correct_pipelines_numpy_array(
+            pipeline_size_limit=settings_.pipeline_size_limit,
+            max_rows=settings_.group_size_limit,
+        )
+    ).astype(settings_.default_dtype)
+    frequency = custom_st.frequency(pipelines=pipelines, settings_=settings_)
+    assume(frequency is not None)
+    permutation = data.draw(st.permutations(range(pipelines.shape[0])))
+    operations = np.unique(pipelines)
+    relabeled = dict(
+        zip(
+            operations.tolist(),
+            data.draw(st.permutations(range(1, operations.size + 1))),
+            strict=True,
+        )
+    )
+    equivalent_pipelines = np.vectorize(relabeled.get)(
+        pipelines[list(permutation)]
+    ).astype(settings_.default_dtype)
+    equivalent_frequency = ppao.custom_types.Frequency(
+        total=frequency.total,
+        most_common={relabeled[x] for x in frequency.most_common},
+    )
+    cache = ppao.PlanCache(maxsize=2)
+    solutions = []
+    for from_array, frequency_ in (
+        (pipelines, frequency),
+        (equivalent_pipelines, equivalent_frequency),
+    ):
+        source_matrix = ppao.SourceMatrix(
+            from_array=from_array,
+            settings_=settings_,
+            frequency=frequency_,
+        )
+        solution = ppao.PipelineMatrixSolver(
+            source_matrix=source_matrix,
+            settings_=settings_,
+            cache=cache,
+        ).solve()
+        assert (
+            custom_st.pipelines_from_solution(solution, from_array.shape[0])
+            == from_array.tolist()
+        )
+        solutions.append(solution)
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert len(cache) == 1
+    assert solutions[0].result == solutions[1].result
+    assert len(solutions[0]) == len(solutions[1])
+    # the hit is optimal for its own row order only if it is proven so
+    uncached = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix, settings_=settings_
+    ).solve()
+    assert solutions[1].result - solutions[1].gap <= uncached.result
+    assert solutions[1].gap == 0 or not solutions[1].optimal
+
+
+@given(
+    settings_=custom_st.correct_settings(),
+    pipelines=st.data(),
+)
+@hypothesis_settings(
+    verbosity=Verbosity.verbose,
+    max_examples=300,
+    deadline=timedelta(seconds=1),
+)
+def test_plan_cache_uncached(settings_: settings.Settings, pipelines):
+    pipelines = pipelines.draw(
+        custom_st.correct_pipelines_numpy_array(
+            pipeline_size_limit=settings_.pipeline_size_limit,
+            max_rows=settings_.group_size_limit,
+        )
+    ).astype(settings_.default_dtype)
+    frequency = custom_st.frequency(pipelines=pipelines, settings_=settings_)
+    assume(frequency is not None)
+    source_matrix = ppao.SourceMatrix(
+        from_array=pipelines,
+        settings_=settings_,
+        frequency=frequency,
+    )
+    uncached = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix, settings_=settings_
+    ).solve()
+    cache = ppao.PlanCache()
+    # a miss and a hit of the same matrix
+    for _ in range(2):
+        cached = ppao.PipelineMatrixSolver(
+            source_matrix=source_matrix, settings_=settings_, cache=cache
+        ).solve()
+        assert cached.result == uncached.result
+        assert (cached.shifts == uncached.shifts).all()
+        assert [
+            (execution_unit.operation, execution_unit.pipelines.tolist())
+            for execution_unit in cached
+        ] == [
+            (execution_unit.operation, execution_unit.pipelines.tolist())
+            for execution_unit in uncached
+        ]
+    assert cache.misses == 1
+    assert cache.hits == len(cache) == int(uncached.optimal)
+
+
+def test_plan_cache_eviction():
+    settings_ = settings.Settings(common_ops_percent_bound=0.3)
+    cache = ppao.PlanCache(maxsize=1)
+    source_arrays = (
+        np.array([[1, 2, 3, 4], [1, 2, 3, 4]], dtype=settings_.default_dtype),
+        np.array([[1, 1, 2, 2], [2, 2, 1, 1]], dtype=settings_.default_dtype),
+    )
+    for source_array in source_arrays + source_arrays:
+        source_matrix = ppao.SourceMatrix(
+            from_array=source_array,
+            settings_=settings_,
+            frequency=custom_st.frequency(source_array, settings_),
+        )
+        ppao.PipelineMatrixSolver(
+            source_matrix=source_matrix, settings_=settings_, cache=cache
+        ).solve()
+    assert cache.hits == 0
+    assert cache.misses == 4
+    assert len(cache) == 1
+
+
+def test_canonical_matrix():
+    settings_ = settings.Settings(common_ops_percent_bound=0.3)
+    canonical_matrices = []
+    for source_array in (
+        np.array(
+            [[7, 5, 0, 0], [5, 5, 7, 0], [5, 7, 0, 0]],
+            dtype=settings_.default_dtype,
+        ),
+        np.array(
+            [[3, 9, 0, 0], [9, 3, 0, 0], [9, 9, 3, 0]],
+            dtype=settings_.default_dtype,
+        ),
+    ):
+        canonical_matrices.append(
+            CanonicalMatrix.from_source_matrix(
+                ppao.SourceMatrix(
+                    from_array=source_array,
+                    settings_=settings_,
+                    frequency=custom_st.frequency(source_array, settings_),
+                ),
+                settings_,
+            )
+        )
+    first, second = canonical_matrices
+    assert first.key == second.key
+    assert first.source_matrix.tolist() == [
+        [1, 2, 0, 0],
+        [2, 1, 0, 0],
+        [2, 2, 1, 0],
+    ]
+    assert first.rows.tolist() == [0, 2, 1]
+    assert first.operations.tolist() == [0, 7, 5]
+    assert second.rows.tolist() == [0, 1, 2]
+    assert second.operations.tolist() == [0, 3, 9]
+
+
+def get_cycles(*sizes):
+    """Rows of directed cycles of operations, one row for every edge."""
+    rows, first = [], 1
+    for size in sizes:
+        rows += [[first + x, first + (x + 1) % size] for x in range(size)]
+        first += size
+    return np.array(rows)
+
+
+def get_canonical_matrix(rows, operations, settings_):
+    source_array = operations[rows].astype(settings_.default_dtype)
+    return CanonicalMatrix.from_source_matrix(
+        ppao.SourceMatrix(
+            from_array=source_array,
+            settings_=settings_,
+            frequency=ppao.custom_types.Frequency(
+                total=source_array.size,
+                most_common=set(operations[1:].tolist()),
+            ),
+        ),
+        settings_,
+    )
+
+
+SYMMETRIC_SETTINGS = settings.Settings(
+    common_ops_percent_bound=0.3,
+    group_size_limit=18,
+    pipeline_size_limit=2,
+)
+
+
+@given(data=st.data())
+@hypothesis_settings(
+    verbosity=Verbosity.verbose,
+    max_examples=20,
+    deadline=timedelta(seconds=2),
+)
+def test_canonical_matrix_symmetric(data):
+    rows = get_cycles(9, 3, 3, 3)
+    operations = np.arange(rows.max() + 1)
+    # the group has more symmetric orders than the canonicalizer compares
+    assert (
+        sum(
+            1
+            for _ in itertools.islice(
+                CanonicalMatrix._iterate_candidates(
+                    rows,
+                    np.zeros(operations.size, dtype=bool),
+                    [(x != 0, False, x != 0) for x in operations.tolist()],
+                ),
+                constants.CANONICAL_ORDERS_LIMIT + 1,
+            )
+        )
+        > constants.CANONICAL_ORDERS_LIMIT
+    )
+    expected = get_canonical_matrix(rows, operations, SYMMETRIC_SETTINGS)
+    relabeled = np.concatenate(
+        ((0,), data.draw(st.permutations(operations[1:].tolist())))
+    )
+    permutation = data.draw(st.permutations(range(rows.shape[0])))
+    assert (
+        get_canonical_matrix(
+            rows[list(permutation)], relabeled, SYMMETRIC_SETTINGS
+        ).key
+        == expected.key
+    )
+
+
+def test_canonical_matrix_refinement():
+    # colour refinement does not tell one cycle from two
+    operations = np.arange(7)
+    assert (
+        get_canonical_matrix(get_cycles(6), operations, SYMMETRIC_SETTINGS).key
+        != get_canonical_matrix(
+            get_cycles(3, 3), operations, SYMMETRIC_SETTINGS
+        ).key
+    )
+
+
+def test_canonical_matrix_orders_limit(monkeypatch):
+    monkeypatch.setattr(constants, "CANONICAL_ORDERS_LIMIT", 1)
+    rows = get_cycles(9, 3, 3, 3)
+    random = np.random.default_rng(0)
+    cache = ppao.PlanCache()
+    for _ in range(10):
+        operations = np.concatenate(((0,), random.permutation(rows.max()) + 1))
+        source_array = operations[random.permutation(rows)].astype(
+            SYMMETRIC_SETTINGS.default_dtype
+        )
+        solution = ppao.PipelineMatrixSolver(
+            source_matrix=ppao.SourceMatrix(
+                from_array=source_array,
+                settings_=SYMMETRIC_SETTINGS,
+                frequency=ppao.custom_types.Frequency(
+                    total=source_array.size,
+                    most_common=set(operations[1:].tolist()),
+                ),
+            ),
+            settings_=SYMMETRIC_SETTINGS,
+            cache=cache,
+        ).solve()
+        assert (
+            custom_st.pipelines_from_solution(solution, rows.shape[0])
+            == source_array.tolist()
+        )
+    # equivalent groups are missed, but every plan stays correct
+    assert cache.misses > 1
+    assert cache.hits + cache.misses == 10
+
+
+@given(maxsize=st.integers(max_value=0))
+def test_plan_cache_maxsize_fail(maxsize):
+    with pytest.raises(exceptions.PlanCacheSizeValidationError):
+        ppao.PlanCache(maxsize=maxsize)
@@ -0,0 +1,131 @@
+import collections
+import concurrent.futures
+import dataclasses
+import functools
+import threading
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from hypothesis import Verbosity, assume, given
+from hypothesis import settings as hypothesis_settings
+from hypothesis import strategies as st
+
+import ppao
+import tests.custom_strategies as custom_st
+from ppao import exceptions, executor, settings
+
+
+def record(calls, lock, operation, pipelines):
+    with lock:
+        for pipeline in pipelines.tolist():
+            calls[pipeline].append(operation)
+    return operation
+
+
+def count_pipelines(pipelines):
+    return len(pipelines)
+
+
+def fail(pipelines):
+    raise ValueError(pipelines)
+
+
+@given(
+    settings_=custom_st.correct_settings(),
+    pipelines=st.data(),
+    compact_solutions=st.booleans(),
+)
+@hypothesis_settings(
+    verbosity=Verbosity.verbose,
+    max_examples=200,
+    deadline=timedelta(seconds=2),
+)
+def test_solution_executor(
+    settings_: settings.Settings, pipelines, compact_solutions
+):
+    pipelines = pipelines.draw(
+        custom_st.correct_pipelines_numpy_array(
+            pipeline_size_limit=settings_.pipeline_size_limit,
+            max_rows=settings_.group_size_limit,
+        )
+    )
+    frequency = custom_st.frequency(pipelines=pipelines, settings_=settings_)
+    assume(frequency is not None)
+    settings_ = dataclasses.replace(
+        settings_, compact_solutions=compact_solutions
+    )
+    solution = ppao.PipelineMatrixSolver(
+        source_matrix=ppao.SourceMatrix(
+            from_array=pipelines, settings_=settings_, frequency=frequency
+        ),
+        settings_=settings_,
+    ).solve()
+    calls = collections.defaultdict(list)
+    lock = threading.Lock()
+    handlers = {
+        operation: functools.partial(record, calls, lock, operation)
+        for operation in np.unique(pipelines).tolist()
+    }
+    results = ppao.SolutionExecutor(handlers, max_workers=4).run(solution)
+    assert results == [
+        execution_unit.operation or None for execution_unit in solution
+    ]
+    # every pipeline takes its operations in its own order
+    for pipeline, row in enumerate(pipelines.tolist()):
+        assert calls[pipeline] == [operation for operation in row if operation]
+    for index_, dependencies in enumerate(executor.get_dependencies(solution)):
+        assert all(dependency < index_ for dependency in dependencies)
+
+
+def test_solution_executor_overlap():
+    solution = ppao.Solution(
+        execution_units=[
+            ppao.ExecutionUnit(operation=1, pipelines=np.array([0, 1])),
+            ppao.ExecutionUnit(operation=2, pipelines=np.array([0])),
+            ppao.ExecutionUnit(operation=3, pipelines=np.array([1])),
+            ppao.ExecutionUnit(operation=1, pipelines=np.array([0, 1])),
+        ],
+        shifts=np.array([0, 0]),
+        result=4,
+    )
+    assert executor.get_dependencies(solution) == [(), (0,), (0,), (1, 2)]
+    # units 1 and 2 deadlock unless they run at the same time
+    barrier = threading.Barrier(2, timeout=30)
+    handlers = {
+        1: count_pipelines,
+        2: lambda pipelines: barrier.wait() + 2,
+        3: lambda pipelines: barrier.wait() + 3,
+    }
+    results = ppao.SolutionExecutor(handlers, max_workers=2).run(solution)
+    assert results[0] == results[3] == 2
+    assert {results[1], results[2]} == {2, 4}
+    with concurrent.futures.ProcessPoolExecutor(2) as pool:
+        assert ppao.SolutionExecutor(
+            {operation: count_pipelines for operation in (1, 2, 3)},
+            executor=pool,
+        ).run(solution) == [2, 1, 1, 2]
+
+
+def test_solution_executor_fail():
+    solution = ppao.Solution(
+        execution_units=[
+            ppao.ExecutionUnit(operation=1, pipelines=np.array([0, 1])),
+            ppao.ExecutionUnit(operation=2, pipelines=np.array([0])),
+            ppao.ExecutionUnit(operation=3, pipelines=np.array([0])),
+        ],
+        shifts=np.array([0, 0]),
+        result=3,
+    )
+    calls = []
+    with pytest.raises(exceptions.HandlerNotFoundError):
+        ppao.SolutionExecutor({1: calls.append, 2: calls.append}).run(solution)
+    assert not calls
+    with pytest.raises(exceptions.UnitExecutionError) as error:
+        ppao.SolutionExecutor({1: calls.append, 2: fail, 3: calls.append}).run(
+            solution
+        )
+    assert error.value.index == 1
+    assert isinstance(error.value.__cause__, ValueError)
+    # units after the failed one are not run
+    assert len(calls) == 1
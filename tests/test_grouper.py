@@ -1,11 +1,18 @@
+import dataclasses
+import math
+
+import hypothesis.extra.numpy as np_st
 import numpy as np
 import pytest
 from hypothesis import Verbosity, example, given
 from hypothesis import settings as hypothesis_settings
 from hypothesis import strategies as st
 
+import ppao
 import tests.custom_strategies as custom_st
-from ppao import Grouper, exceptions, settings
+from ppao import Grouper, constants, exceptions
+from ppao import grouper as grouper_module
+from ppao import settings
 
 
 @given(
@@ -95,7 +102,9 @@ def test_grouper_success(
                 assert group.shape[1] == grouper.settings.pipeline_size_limit
                 pipelines_length -= group.shape[0]
                 iterations += 1
-                assert not grouper._total_counter
+                assert custom_st.total_counter(
+                    grouper
+                ) == custom_st.count_operations(grouper.pipelines)
         if iterations == 0:
             if isinstance(pipelines, np.ndarray):
                 if (
@@ -110,9 +119,9 @@ def test_grouper_success(
                 ):
                     pipelines_length += len(pipelines)
             assert grouper.pipelines.shape[0] >= pipelines_length
-            assert grouper._counters
+            assert grouper._alive_number
             assert (
-                not grouper._get_most_common_operations()
+                not custom_st.most_common_columns(grouper).size
                 or grouper.pipelines.shape[0] < 2
             )
 
@@ -182,7 +191,9 @@ def test_grouper_fail(
                 assert group.shape[1] == grouper.settings.pipeline_size_limit
                 pipelines_length -= group.shape[0]
                 iterations += 1
-                assert not grouper._total_counter
+                assert custom_st.total_counter(
+                    grouper
+                ) == custom_st.count_operations(grouper.pipelines)
 
         if iterations == 0:
             if isinstance(pipelines, np.ndarray):
@@ -199,12 +210,12 @@ def test_grouper_fail(
                     pipelines_length += len(pipelines)
             assert grouper.pipelines.shape[0] >= pipelines_length
             if (
-                len(grouper._total_counter) == 1
-                and grouper._total_counter.most_common(1)[0] == 0
+                len(custom_st.total_counter(grouper)) == 1
+                and custom_st.total_counter(grouper).most_common(1)[0] == 0
             ):
-                assert grouper._counters
+                assert grouper._alive_number
             assert (
-                not grouper._get_most_common_operations()
+                not custom_st.most_common_columns(grouper).size
                 or grouper.pipelines.shape[0] < 2
             )
 
@@ -243,15 +254,32 @@ def test_grouper_remaining():
     assert grouper.pop() is None
     assert (grouper.pipelines == [[1, 1, 3, 4, 5], [6, 7, 8, 9, 0]]).all()
     grouper.add([[1, 0, 0, 0, 0]])
-    assert grouper.pop() is None
-    grouper.add([[1, 1, 1, 1, 0]])
+    # frequencies are not counted twice after a pop which returned None
     expected = [
-        [1, 1, 1, 1, 0],
         [1, 1, 3, 4, 5],
         [1, 0, 0, 0, 0],
         [6, 7, 8, 9, 0],
     ]
     assert (grouper.pop() == expected).all()
+    grouper.add([[1, 1, 1, 1, 0]])
+    assert grouper.pop() is None
+    assert (grouper.pipelines == [[1, 1, 1, 1, 0]]).all()
+
+
+def test_grouper_most_common_ties():
+    settings_ = settings.Settings(
+        pipeline_size_limit=4,
+        group_size_limit=2,
+        common_ops_bound=1,
+        common_ops_percent_bound=0.2,
+    )
+    grouper = Grouper(settings_=settings_)
+    grouper.add([[3, 1, 1, 1], [1, 1, 1, 0], [2, 0, 0, 0], [3, 0, 0, 0]])
+    assert (grouper.pop() == [[3, 1, 1, 1], [1, 1, 1, 0]]).all()
+    # 2 and 3 are equally frequent, 2 is the first one of the backlog
+    group = grouper.pop()
+    assert (group == [[2, 0, 0, 0], [3, 0, 0, 0]]).all()
+    assert group.most_common.tolist() == [2]
 
 
 def test_grouper_example_case():
@@ -289,3 +317,218 @@ def test_grouper_example_case():
     ).all()
     assert grouper.pop() is None
     assert not grouper.pipelines.size
+
+
+def test_grouper_incremental_counters():
+    settings_ = settings.Settings(pipeline_size_limit=5)
+    grouper = Grouper(settings_=settings_)
+    grouper.add([[1, 1, 3, 4, 5], [6, 7, 8, 9, 0]])
+    assert grouper.pop() is None
+    assert grouper.pop() is None
+    assert custom_st.total_counter(grouper) == custom_st.count_operations(
+        grouper.pipelines
+    )
+    grouper.add([[1, 1, 1, 1, 0], [1, 0, 0, 0, 0]])
+    assert custom_st.total_counter(grouper) == custom_st.count_operations(
+        grouper.pipelines
+    )
+    assert grouper.pop().shape[0] == 4
+    assert not custom_st.total_counter(grouper)
+    assert not grouper._alive_number
+
+
+def test_grouper_backlog_growth():
+    settings_ = settings.Settings(pipeline_size_limit=2, group_size_limit=2)
+    grouper = Grouper(settings_=settings_)
+    expected = []
+    for index in range(1, 3 * constants.GROUPER_INITIAL_CAPACITY):
+        pipeline = [1, index + 1]
+        grouper.add([pipeline])
+        expected.append(pipeline)
+        if index % 5 == 0:
+            for pipeline in grouper.pop().tolist():
+                expected.remove(pipeline)
+        assert grouper.pipelines.tolist() == expected
+        assert grouper._alive_number == len(expected)
+        assert not grouper._counts[~grouper._alive].any()
+        assert custom_st.total_counter(grouper) == custom_st.count_operations(
+            grouper.pipelines
+        )
+    assert grouper._buffer.shape[0] < 4 * len(expected)
+
+
+@given(settings_=custom_st.correct_settings(), data=st.data())
+@hypothesis_settings(max_examples=200)
+def test_grouper_pop_many(settings_: settings.Settings, data):
+    groupers = Grouper(settings_=settings_), Grouper(settings_=settings_)
+    popped = [], []
+    for _ in range(data.draw(st.integers(min_value=1, max_value=3))):
+        pipelines = data.draw(
+            np_st.arrays(
+                dtype=settings_.default_dtype,
+                shape=st.tuples(
+                    st.integers(min_value=1, max_value=40),
+                    st.just(settings_.pipeline_size_limit),
+                ),
+                elements=st.integers(min_value=0, max_value=12),
+            )
+        )
+        for grouper in groupers:
+            grouper.add(pipelines)
+        while (group := groupers[0].pop()) is not None:
+            popped[0].append(group.tolist())
+        popped[1].extend(group.tolist() for group in groupers[1].pop_many())
+    assert popped[0] == popped[1]
+    assert groupers[0].pipelines.tolist() == groupers[1].pipelines.tolist()
+    assert groupers[1].pop_many() == []
+
+
+def test_grouper_pop_many_max_groups():
+    settings_ = settings.Settings(pipeline_size_limit=2, group_size_limit=2)
+    grouper = Grouper(settings_=settings_)
+    grouper.add([[1, index] for index in range(2, 12)])
+    groups = grouper.pop_many(max_groups=2)
+    assert [group.tolist() for group in groups] == [
+        [[1, 2], [1, 3]],
+        [[1, 4], [1, 5]],
+    ]
+    assert all(group.most_common.tolist() == [1] for group in groups)
+    assert len(grouper.pop_many()) == 3
+    assert not grouper.pipelines.size
+
+
+def test_grouper_stats(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(grouper_module.time, "monotonic", lambda: clock[0])
+    settings_ = settings.Settings(pipeline_size_limit=2, group_size_limit=2)
+    grouper = Grouper(settings_=settings_)
+    stats = grouper.stats()
+    assert (stats.backlog, stats.max_wait, stats.hit_rate) == (0, 0.0, 0.0)
+    assert set(stats.wait_percentiles.values()) == {0.0}
+    assert grouper.pop() is None
+    # the buffer is compacted and grown, arrival times move with slots
+    for index in range(2 * constants.GROUPER_INITIAL_CAPACITY):
+        clock[0] = float(index)
+        grouper.add([[1, index + 2]])
+        if index % 4 == 3:
+            grouper.pop()
+    clock[0] = 200.0
+    stats = grouper.stats(top_operations=2)
+    assert stats.backlog == constants.GROUPER_INITIAL_CAPACITY
+    assert stats.added == 2 * constants.GROUPER_INITIAL_CAPACITY
+    assert stats.popped == constants.GROUPER_INITIAL_CAPACITY
+    assert stats.groups == constants.GROUPER_INITIAL_CAPACITY // 2
+    assert (stats.pop_hits, stats.pop_misses) == (stats.groups, 1)
+    assert stats.ungroupable == 0
+    waits = sorted(
+        200.0 - index
+        for index in range(2 * constants.GROUPER_INITIAL_CAPACITY)
+        if [1, index + 2] in grouper.pipelines.tolist()
+    )
+    assert stats.max_wait == waits[-1]
+    for percentile, wait in stats.wait_percentiles.items():
+        assert wait == waits[math.ceil(percentile * len(waits) / 100) - 1]
+    assert stats.top_operations[0] == (1, constants.GROUPER_INITIAL_CAPACITY)
+    assert len(stats.top_operations) == 2
+    grouper.pop_many()
+    grouper.add([[3, 0]])
+    assert grouper.pop() is None
+    stats = grouper.stats()
+    assert stats.ungroupable == stats.backlog == 1
+    assert stats.hit_rate == stats.pop_hits / (stats.pop_hits + 2)
+
+
+@given(
+    steps=st.lists(
+        st.tuples(st.integers(min_value=0, max_value=4), st.booleans()),
+        max_size=200,
+    )
+)
+@hypothesis_settings(verbosity=Verbosity.verbose, max_examples=200)
+def test_grouper_stats_waits(steps):
+    clock = [0.0]
+    settings_ = settings.Settings(pipeline_size_limit=2, group_size_limit=3)
+    grouper = Grouper(settings_=settings_)
+    arrivals = dict()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(grouper_module.time, "monotonic", lambda: clock[0])
+        for index, (rows_number, pop) in enumerate(steps):
+            clock[0] = float(index)
+            # every pipeline has its own second operation
+            pipelines = [
+                [index % 3 + 1, len(arrivals) + x + 4]
+                for x in range(rows_number)
+            ]
+            for pipeline in pipelines:
+                arrivals[pipeline[1]] = clock[0]
+            if pipelines:
+                grouper.add(pipelines)
+            if pop:
+                grouper.pop_many(max_groups=index % 2 + 1)
+        clock[0] = float(len(steps))
+        stats = grouper.stats()
+    waits = sorted(
+        clock[0] - arrivals[pipeline[1]]
+        for pipeline in grouper.pipelines.tolist()
+    )
+    assert stats.backlog == len(waits)
+    assert stats.max_wait == (waits[-1] if waits else 0.0)
+    for percentile, wait in stats.wait_percentiles.items():
+        assert wait == (
+            waits[max(math.ceil(percentile * len(waits) / 100), 1) - 1]
+            if waits
+            else 0.0
+        )
+
+
+def test_grouper_overdue(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr(grouper_module.time, "monotonic", lambda: clock[0])
+    settings_ = settings.Settings(
+        pipeline_size_limit=2, group_size_limit=3, pipeline_max_wait=10.0
+    )
+    grouper = Grouper(settings_=settings_)
+    grouper.add([[5, 6]])
+    assert grouper.pop() is None
+    clock[0] = 5.0
+    grouper.add([[1, 2], [1, 3], [1, 4], [1, 5]])
+    grouper.add([[7, 8]], deadlines=[7.0])
+    with pytest.raises(exceptions.DeadlinesShapeError):
+        grouper.add([[1, 1]], deadlines=[1.0, 2.0])
+    with pytest.raises(exceptions.DeadlinesShapeError):
+        grouper.add([[1, 1]], deadlines=[float("nan")])
+    assert grouper.stats().backlog == 6
+    clock[0] = 6.0
+    group = grouper.pop()
+    assert group.tolist() == [[1, 5], [1, 2], [1, 3]]
+    # the overdue pipeline goes first, the best scored ones fill its group
+    clock[0] = 8.0
+    groups = grouper.pop_many(max_groups=1)
+    assert [group.tolist() for group in groups] == [[[7, 8], [5, 6], [1, 4]]]
+    assert grouper.pop() is None
+    # an overdue pipeline which can't be grouped is popped alone
+    clock[0] = 18.0
+    grouper.add([[3, 4]])
+    assert grouper.pop() is None
+    clock[0] = 28.0
+    group = grouper.pop()
+    assert group.tolist() == [[3, 4]]
+    assert group.most_common.tolist() == [3]
+    assert grouper.pop() is None
+    stats = grouper.stats()
+    assert (stats.backlog, stats.groups, stats.overdue_groups) == (0, 3, 2)
+    solution = ppao.PipelineMatrixSolver(
+        source_matrix=group, settings_=settings_
+    ).solve()
+    assert solution.result == 2
+    # without most common operations, the group has its own ones
+    grouper = Grouper(
+        settings_=dataclasses.replace(settings_, common_ops_percent_bound=0.9)
+    )
+    grouper.add([[3, 4], [5, 6]])
+    assert grouper.pop() is None
+    clock[0] = 40.0
+    group = grouper.pop()
+    assert group.tolist() == [[3, 4], [5, 6]]
+    assert set(group.most_common.tolist()) == {3, 4, 5}
+    assert grouper.pop() is None
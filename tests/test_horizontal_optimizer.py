@@ -1,11 +1,14 @@
+import dataclasses
 import random
 from datetime import timedelta
 
+import pytest
 from hypothesis import Verbosity, given
 from hypothesis import settings as hypothesis_settings
 
 import ppao
 import tests.custom_strategies as custom_st
+from ppao import exceptions
 
 
 @given(
@@ -59,6 +62,18 @@ def test_register(data):
         assert key in optimizer.sorted_keys
 
 
+@given(
+    data=custom_st.correct_horizontal_sequence(),
+)
+def test_register_fail(data):
+    optimizer = ppao.solver.HorizontalOptimizer(
+        source_sequence=data.sequence,
+        settings_=dataclasses.replace(data.settings, debug_validation=True),
+    )
+    with pytest.raises(exceptions.IndexValidationError):
+        optimizer._register(key=0, index_before=-1, index_after=1)
+
+
 @given(
     data=custom_st.correct_horizontal_sequence(),
 )
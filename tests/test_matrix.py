@@ -1,8 +1,9 @@
 from datetime import timedelta
 
+import hypothesis.extra.numpy as np_st
 import numpy as np
 import pytest
-from hypothesis import Verbosity, given
+from hypothesis import Verbosity, assume, given
 from hypothesis import settings as hypothesis_settings
 from hypothesis import strategies as st
 
@@ -65,3 +66,91 @@ def test_incorrect_dtype_or_shape_fail(
                 settings_=settings_,
                 frequency=frequency,
             )
+
+
+@given(
+    settings_=custom_st.correct_settings(),
+    data=st.data(),
+)
+@hypothesis_settings(
+    verbosity=Verbosity.verbose,
+    max_examples=300,
+    deadline=timedelta(seconds=1),
+)
+def test_count_results(settings_: settings.Settings, data):
+    pipelines = data.draw(
+        custom_st.correct_pipelines_numpy_array(
+            pipeline_size_limit=settings_.pipeline_size_limit,
+            max_rows=settings_.group_size_limit,
+        )
+    )
+    frequency = custom_st.frequency(pipelines=pipelines, settings_=settings_)
+    assume(frequency is not None)
+    source_matrix = ppao.SourceMatrix(
+        from_array=pipelines,
+        settings_=settings_,
+        frequency=frequency,
+    )
+    combinations = data.draw(
+        np_st.arrays(
+            dtype=settings_.default_shift_array_dtype,
+            shape=st.tuples(
+                st.integers(min_value=1, max_value=10),
+                st.just(pipelines.shape[0]),
+            ),
+            elements=st.integers(min_value=-4, max_value=4),
+        )
+    )
+    results = source_matrix.count_results(combinations)
+    for combination, result in zip(combinations, results, strict=True):
+        best_result = {"result": np.inf}
+        source_matrix.count_result(combination, best_result)
+        assert best_result["result"] == result
+
+
+@given(
+    settings_=custom_st.correct_settings(),
+    possible_shifts=st.lists(
+        st.lists(
+            st.integers(min_value=-3, max_value=3),
+            min_size=1,
+            max_size=4,
+            unique=True,
+        ).map(tuple),
+        min_size=1,
+        max_size=5,
+    ),
+    chunk_size=st.integers(min_value=1, max_value=50),
+)
+@hypothesis_settings(
+    verbosity=Verbosity.verbose,
+    max_examples=300,
+    deadline=timedelta(seconds=1),
+)
+def test_iter_combinations(
+    settings_: settings.Settings, possible_shifts, chunk_size
+):
+    source_matrix = ppao.SourceMatrix(
+        from_array=np.ones(
+            (len(possible_shifts), settings_.pipeline_size_limit),
+            dtype=settings_.default_dtype,
+        ),
+        settings_=settings_,
+        frequency=Frequency(total=10, most_common={1}),
+    )
+    chunks = tuple(
+        source_matrix.iter_combinations(possible_shifts, chunk_size)
+    )
+    assert all(chunk.shape[0] <= chunk_size for chunk in chunks)
+    all_combinations = source_matrix.get_all_combinations(possible_shifts)
+    assert (np.concatenate(chunks) == all_combinations).all()
+    start, stop = len(all_combinations) // 3, len(all_combinations) // 2
+    chunks = tuple(
+        source_matrix.iter_combinations(
+            possible_shifts, chunk_size, start, stop
+        )
+    )
+    assert (
+        np.concatenate(chunks + (all_combinations[:0],))
+        == all_combinations[start:stop]
+    ).all()
@@ -120,3 +120,86 @@ def test_settings_validation_bad_types_fail(
             default_array_type_code=default_array_type_code,
             default_shift_array_dtype=default_shift_array_dtype,
         )
+
+
+@given(
+    solver_engine=st.text().filter(
+        lambda solver_engine: solver_engine
+        not in constants.ACCEPTABLE_SOLVER_ENGINES
+    ),
+)
+@hypothesis_settings(verbosity=Verbosity.verbose, max_examples=50)
+def test_settings_solver_engine_fail(solver_engine):
+    with pytest.raises(exceptions.SolverEngineValidationError):
+        settings.Settings(solver_engine=solver_engine)
+
+
+@given(combinations_memory_limit=st.integers(max_value=0))
+@hypothesis_settings(verbosity=Verbosity.verbose, max_examples=50)
+def test_settings_combinations_memory_limit_fail(combinations_memory_limit):
+    with pytest.raises(exceptions.CombinationsMemoryLimitValidationError):
+        settings.Settings(combinations_memory_limit=combinations_memory_limit)
+
+
+@given(scoring_workers=st.integers(max_value=0))
+@hypothesis_settings(verbosity=Verbosity.verbose, max_examples=50)
+def test_settings_scoring_workers_fail(scoring_workers):
+    with pytest.raises(exceptions.ScoringWorkersValidationError):
+        settings.Settings(scoring_workers=scoring_workers)
+
+
+@given(
+    group_size_limit=st.integers(
+        min_value=constants.EXACT_GROUP_SIZE_LIMIT + 1,
+        max_value=constants.HEURISTIC_GROUP_SIZE_LIMIT,
+    ),
+    pipeline_size_limit=st.integers(
+        min_value=constants.EXACT_PIPELINE_SIZE_LIMIT + 1,
+        max_value=constants.HEURISTIC_PIPELINE_SIZE_LIMIT,
+    ),
+    solver_engine=st.sampled_from(constants.HEURISTIC_SOLVER_ENGINES),
+)
+@hypothesis_settings(verbosity=Verbosity.verbose, max_examples=50)
+def test_settings_heuristic_engine_limits(
+    group_size_limit, pipeline_size_limit, solver_engine
+):
+    settings.Settings(
+        group_size_limit=group_size_limit,
+        pipeline_size_limit=pipeline_size_limit,
+        solver_engine=solver_engine,
+    )
+    with pytest.raises(exceptions.GroupSizeLimitValidationError):
+        settings.Settings(group_size_limit=group_size_limit)
+    with pytest.raises(exceptions.PipelineSizeLimitValidationError):
+        settings.Settings(pipeline_size_limit=pipeline_size_limit)
+
+
+@given(
+    pipeline_max_wait=st.floats(max_value=0, exclude_max=True)
+    | st.just(float("nan"))
+)
+@hypothesis_settings(verbosity=Verbosity.verbose, max_examples=50)
+def test_settings_pipeline_max_wait_fail(pipeline_max_wait):
+    with pytest.raises(exceptions.PipelineMaxWaitValidationError):
+        settings.Settings(pipeline_max_wait=pipeline_max_wait)
+
+
+@given(
+    group_size_limit=st.integers(
+        min_value=257, max_value=constants.HEURISTIC_GROUP_SIZE_LIMIT
+    ),
+    solver_engine=st.sampled_from(constants.HEURISTIC_SOLVER_ENGINES),
+)
+@hypothesis_settings(verbosity=Verbosity.verbose, max_examples=50)
+def test_settings_group_size_limit_dtype_fail(group_size_limit, solver_engine):
+    with pytest.raises(exceptions.GroupSizeLimitDtypeValidationError):
+        settings.Settings(
+            group_size_limit=group_size_limit,
+            solver_engine=solver_engine,
+            default_dtype="uint8",
+        )
+    settings.Settings(
+        group_size_limit=group_size_limit,
+        solver_engine=solver_engine,
+        default_dtype="uint16",
+    )
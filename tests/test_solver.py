@@ -1,14 +1,19 @@
+import concurrent.futures
+import dataclasses
+import pickle
+import time
+from collections import defaultdict
 from datetime import timedelta
 
 import numpy as np
 import pytest
-from hypothesis import Verbosity, given
+from hypothesis import Verbosity, assume, given
 from hypothesis import settings as hypothesis_settings
 from hypothesis import strategies as st
 
 import ppao
 import tests.custom_strategies as custom_st
-from ppao import ExecutionUnit, exceptions, settings
+from ppao import ExecutionUnit, constants, engines, exceptions, settings
 
 
 @given(
@@ -130,7 +135,9 @@ def test_solver_and_grouper(
                 assert group.shape[1] == grouper.settings.pipeline_size_limit
                 pipelines_length -= group.shape[0]
                 iterations += 1
-                assert not grouper._total_counter
+                assert custom_st.total_counter(
+                    grouper
+                ) == custom_st.count_operations(grouper.pipelines)
                 solver = ppao.PipelineMatrixSolver(
                     source_matrix=group,
                     settings_=grouper.settings,
@@ -158,9 +165,9 @@ def test_solver_and_grouper(
                 ):
                     pipelines_length += len(pipelines)
             assert grouper.pipelines.shape[0] >= pipelines_length
-            assert grouper._counters
+            assert grouper._alive_number
             assert (
-                not grouper._get_most_common_operations()
+                not custom_st.most_common_columns(grouper).size
                 or grouper.pipelines.shape[0] < 2
             )
 
@@ -222,3 +229,615 @@ def test_solver_example_case():
     assert (
         sum(array_.pipelines.size for array_ in solution) == source_matrix.size
     )
+
+
+@given(
+    settings_=custom_st.correct_settings(),
+    pipelines=st.data(),
+)
+@hypothesis_settings(
+    verbosity=Verbosity.verbose,
+    max_examples=300,
+    deadline=timedelta(seconds=1),
+)
+def test_branch_and_bound_engine(settings_: settings.Settings, pipelines):
+    pipelines = pipelines.draw(
+        custom_st.correct_pipelines_numpy_array(
+            pipeline_size_limit=settings_.pipeline_size_limit,
+            max_rows=settings_.group_size_limit,
+        )
+    )
+    frequency = custom_st.frequency(pipelines=pipelines, settings_=settings_)
+    assume(frequency is not None)
+    source_matrix = ppao.SourceMatrix(
+        from_array=pipelines,
+        settings_=settings_,
+        frequency=frequency,
+    )
+    exhaustive = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix,
+        settings_=dataclasses.replace(settings_, solver_engine="exhaustive"),
+    ).solve()
+    branch_and_bound = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix,
+        settings_=dataclasses.replace(
+            settings_, solver_engine="branch_and_bound"
+        ),
+    ).solve()
+    assert branch_and_bound.result == exhaustive.result
+    assert (branch_and_bound.shifts == exhaustive.shifts).all()
+    assert len(branch_and_bound) == len(exhaustive)
+
+
+@given(
+    settings_=custom_st.correct_settings(),
+    pipelines=st.data(),
+)
+@hypothesis_settings(
+    verbosity=Verbosity.verbose,
+    max_examples=300,
+    deadline=timedelta(seconds=1),
+)
+def test_local_search_engine(settings_: settings.Settings, pipelines):
+    pipelines = pipelines.draw(
+        custom_st.correct_pipelines_numpy_array(
+            pipeline_size_limit=settings_.pipeline_size_limit,
+            max_rows=settings_.group_size_limit,
+        )
+    )
+    frequency = custom_st.frequency(pipelines=pipelines, settings_=settings_)
+    assume(frequency is not None)
+    source_matrix = ppao.SourceMatrix(
+        from_array=pipelines,
+        settings_=settings_,
+        frequency=frequency,
+    )
+    exhaustive = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix,
+        settings_=dataclasses.replace(settings_, solver_engine="exhaustive"),
+    ).solve()
+    local_search = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix,
+        settings_=dataclasses.replace(settings_, solver_engine="local_search"),
+    ).solve()
+    assert local_search.result >= exhaustive.result
+    assert (
+        local_search.result
+        == source_matrix.count_results(local_search.shifts[None])[0]
+    )
+    assert sum(unit.pipelines.size for unit in local_search) == (
+        source_matrix.size
+    )
+
+
+@pytest.mark.filterwarnings("error::DeprecationWarning")
+def test_local_search_engine_large_group():
+    settings_ = settings.Settings(
+        solver_engine="local_search",
+        group_size_limit=200,
+        pipeline_size_limit=12,
+        common_ops_percent_bound=0.3,
+    )
+    rng = np.random.default_rng(0)
+    pipelines = np.tile(rng.integers(1, 20, size=12), (400, 1))
+    mask = rng.random(pipelines.shape) < 0.3
+    pipelines[mask] = rng.integers(1, 20, size=int(mask.sum()))
+    grouper = ppao.Grouper(settings_=settings_)
+    grouper.add(pipelines)
+    source_matrix = grouper.pop()
+    assert source_matrix.shape == (200, 12)
+    solution = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix, settings_=settings_
+    ).solve()
+    unshifted = source_matrix.count_results(
+        np.zeros((1, source_matrix.shape[0]), dtype=np.int8)
+    )[0]
+    assert solution.result <= unshifted
+    assert (
+        solution.result
+        == source_matrix.count_results(solution.shifts[None])[0]
+    )
+    for pipeline_id, pipeline in enumerate(np.asarray(source_matrix)):
+        operations = [
+            unit.operation
+            for unit in solution
+            for x in unit.pipelines.tolist()
+            if x == pipeline_id and unit.operation
+        ]
+        # every pipeline takes its operations in its own order
+        assert operations == pipeline[pipeline != 0].tolist()
+
+
+@given(
+    settings_=custom_st.correct_settings(),
+    pipelines=st.data(),
+    solver_engine=st.sampled_from(constants.ACCEPTABLE_SOLVER_ENGINES),
+)
+@hypothesis_settings(
+    verbosity=Verbosity.verbose,
+    max_examples=300,
+    deadline=timedelta(seconds=1),
+)
+def test_solver_deadline(
+    settings_: settings.Settings, pipelines, solver_engine
+):
+    settings_ = dataclasses.replace(settings_, solver_engine=solver_engine)
+    pipelines = pipelines.draw(
+        custom_st.correct_pipelines_numpy_array(
+            pipeline_size_limit=settings_.pipeline_size_limit,
+            max_rows=settings_.group_size_limit,
+        )
+    )
+    frequency = custom_st.frequency(pipelines=pipelines, settings_=settings_)
+    assume(frequency is not None)
+    source_matrix = ppao.SourceMatrix(
+        from_array=pipelines,
+        settings_=settings_,
+        frequency=frequency,
+    )
+    optimal = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix,
+        settings_=dataclasses.replace(settings_, solver_engine="exhaustive"),
+    ).solve()
+    lower_bound = source_matrix.get_lower_bound()
+    assert optimal.optimal and optimal.gap == 0
+    assert lower_bound <= optimal.result
+    cache = ppao.PlanCache()
+    solver = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix, settings_=settings_, cache=cache
+    )
+    expired = solver.solve(deadline=time.monotonic() - 1)
+    assert expired.result >= optimal.result
+    # the cache solves the caller's matrix, not a reordered one
+    uncached = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix, settings_=settings_
+    ).solve(deadline=time.monotonic() - 1)
+    assert expired.result == uncached.result
+    assert (expired.shifts == uncached.shifts).all()
+    assert (
+        expired.result == source_matrix.count_results(expired.shifts[None])[0]
+    )
+    assert sum(unit.pipelines.size for unit in expired) == source_matrix.size
+    # a result reaching the lower bound is optimal even if the search stops
+    assert expired.optimal or expired.result > lower_bound
+    if expired.optimal:
+        assert expired.gap == 0
+    else:
+        assert expired.gap == expired.result - lower_bound
+        assert not len(cache)
+    if solver_engine in constants.HEURISTIC_SOLVER_ENGINES:
+        return
+    solution = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix, settings_=settings_
+    ).solve(deadline=time.monotonic() + 60)
+    assert solution.optimal and solution.gap == 0
+    assert solution.result == optimal.result
+    assert (solution.shifts == optimal.shifts).all()
+
+
+def get_baseline_shifts(source_matrix):
+    """Best shifts found as the first solver version did."""
+    possible_shifts = defaultdict(set)
+    for common_operation in source_matrix.most_common:
+        delta_offset = source_matrix.get_window_sizes_delta_sequence(
+            source_matrix.get_windows(common_operation)
+        )
+        for i, shifts in enumerate(
+            source_matrix.get_possible_shifts(delta_offset)
+        ):
+            possible_shifts[i].update(shifts)
+    best_result = {"result": np.inf}
+    for combination in source_matrix.get_all_combinations(
+        tuple(shifts) for shifts in possible_shifts.values()
+    ):
+        source_matrix.count_result(combination, best_result)
+    return best_result["result"], best_result["shifts"]
+
+
+@given(
+    settings_=custom_st.correct_settings(),
+    pipelines=st.data(),
+    solver_engine=st.sampled_from(
+        sorted(set(engines.ENGINES) - set(constants.HEURISTIC_SOLVER_ENGINES))
+    ),
+    deduplicate_combinations=st.booleans(),
+)
+@hypothesis_settings(
+    verbosity=Verbosity.verbose,
+    max_examples=300,
+    deadline=timedelta(seconds=2),
+)
+def test_solver_baseline_shifts(
+    settings_: settings.Settings,
+    pipelines,
+    solver_engine,
+    deduplicate_combinations,
+):
+    pipelines = pipelines.draw(
+        custom_st.correct_pipelines_numpy_array(
+            pipeline_size_limit=settings_.pipeline_size_limit,
+            max_rows=settings_.group_size_limit,
+        )
+    )
+    frequency = custom_st.frequency(pipelines=pipelines, settings_=settings_)
+    assume(frequency is not None)
+    settings_ = dataclasses.replace(
+        settings_,
+        solver_engine=solver_engine,
+        deduplicate_combinations=deduplicate_combinations,
+    )
+    source_matrix = ppao.SourceMatrix(
+        from_array=pipelines,
+        settings_=settings_,
+        frequency=frequency,
+    )
+    result, shifts = get_baseline_shifts(source_matrix)
+    solution = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix, settings_=settings_
+    ).solve()
+    # ties are broken as before, not only the result is the same
+    assert solution.result == result
+    assert solution.shifts.tolist() == shifts.tolist()
+
+
+def test_solver_deadline_cache():
+    settings_ = settings.Settings(
+        common_ops_percent_bound=0.25,
+        common_ops_bound=1,
+        group_size_limit=4,
+        pipeline_size_limit=2,
+        default_dtype="uint8",
+    )
+    pipelines = np.array(
+        [[2, 1], [3, 2], [2, 1], [3, 3]], dtype=settings_.default_dtype
+    )
+    source_matrix = ppao.SourceMatrix(
+        from_array=pipelines,
+        settings_=settings_,
+        frequency=custom_st.frequency(pipelines, settings_),
+    )
+    optimal = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix, settings_=settings_
+    ).solve()
+    # the row-sorted matrix has better possible shifts than this one
+    expired = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix,
+        settings_=settings_,
+        cache=ppao.PlanCache(),
+    ).solve(deadline=time.monotonic() - 1)
+    assert optimal.result == expired.result == 5
+    assert optimal.shifts.tolist() == expired.shifts.tolist() == [0, -1, 0, 0]
+
+
+def units_of(solution):
+    return [
+        (execution_unit.operation, execution_unit.pipelines.tolist())
+        for execution_unit in solution
+    ]
+
+
+@given(
+    settings_=custom_st.correct_settings(),
+    pipelines=st.data(),
+)
+@hypothesis_settings(
+    verbosity=Verbosity.verbose,
+    max_examples=300,
+    deadline=timedelta(seconds=2),
+)
+def test_compact_solution(settings_: settings.Settings, pipelines):
+    pipelines = pipelines.draw(
+        custom_st.correct_pipelines_numpy_array(
+            pipeline_size_limit=settings_.pipeline_size_limit,
+            max_rows=settings_.group_size_limit,
+        )
+    )
+    frequency = custom_st.frequency(pipelines=pipelines, settings_=settings_)
+    assume(frequency is not None and frequency.most_common)
+    compact_settings = dataclasses.replace(settings_, compact_solutions=True)
+    for cache_type in (lambda: None, ppao.PlanCache):
+        solution, compact_solution = (
+            ppao.PipelineMatrixSolver(
+                source_matrix=ppao.SourceMatrix(
+                    from_array=pipelines,
+                    settings_=solver_settings,
+                    frequency=frequency,
+                ),
+                settings_=solver_settings,
+                cache=cache_type(),
+            ).solve()
+            for solver_settings in (settings_, compact_settings)
+        )
+        assert isinstance(compact_solution, ppao.CompactSolution)
+        assert compact_solution.result == solution.result
+        assert compact_solution.shifts.tolist() == solution.shifts.tolist()
+        assert units_of(compact_solution) == units_of(solution)
+        assert units_of(compact_solution[::-1]) == units_of(solution)[::-1]
+        assert units_of(compact_solution.to_solution()) == units_of(solution)
+        assert units_of(
+            ppao.CompactSolution.from_solution(
+                solution, dtype=settings_.default_dtype
+            )
+        ) == units_of(solution)
+        assert units_of(pickle.loads(pickle.dumps(compact_solution))) == (
+            units_of(solution)
+        )
+
+
+def test_compact_solution_fail():
+    with pytest.raises(exceptions.CustomTypeAttributeTypeValidationError):
+        ppao.CompactSolution(
+            operations=np.array([1, 2]),
+            offsets=np.array([0, 1]),
+            pipelines=np.array([0]),
+            shifts=np.array([0]),
+            result=2,
+        )
+    with pytest.raises(exceptions.CustomTypeEmptyArrayError):
+        ppao.CompactSolution(
+            operations=np.array([1, 2]),
+            offsets=np.array([0, 1, 1]),
+            pipelines=np.array([0]),
+            shifts=np.array([0]),
+            result=2,
+        )
+    with pytest.raises(exceptions.CustomTypeEmptyArrayError):
+        ppao.CompactSolution.trusted(
+            operations=np.array([1, 2]),
+            offsets=np.array([0, 1, 1]),
+            pipelines=np.array([0]),
+            shifts=np.array([0]),
+            result=2,
+            validate=True,
+        )
+    with pytest.raises(exceptions.CustomTypeEmptyArrayError):
+        ExecutionUnit.trusted(
+            operation=1, pipelines=np.array([]), validate=True
+        )
+
+
+@given(
+    settings_=custom_st.correct_settings(),
+    pipelines=st.data(),
+)
+@hypothesis_settings(
+    verbosity=Verbosity.verbose,
+    max_examples=300,
+    deadline=timedelta(seconds=1),
+)
+def test_deduplicate_combinations(settings_: settings.Settings, pipelines):
+    pipelines = pipelines.draw(
+        custom_st.correct_pipelines_numpy_array(
+            pipeline_size_limit=settings_.pipeline_size_limit,
+            max_rows=settings_.group_size_limit,
+        )
+    )
+    pipelines = np.concatenate((pipelines, pipelines[:1]))
+    frequency = custom_st.frequency(pipelines=pipelines, settings_=settings_)
+    assume(frequency is not None)
+    source_matrix = ppao.SourceMatrix(
+        from_array=pipelines,
+        settings_=settings_,
+        frequency=frequency,
+    )
+    all_combinations = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix,
+        settings_=dataclasses.replace(
+            settings_,
+            deduplicate_combinations=False,
+            combinations_memory_limit=4096,
+        ),
+    ).solve()
+    deduplicating_solver = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix,
+        settings_=dataclasses.replace(
+            settings_, deduplicate_combinations=True
+        ),
+    )
+    canonical_combinations = deduplicating_solver.solve()
+    assert canonical_combinations.result == all_combinations.result
+    assert (canonical_combinations.shifts == all_combinations.shifts).all()
+    possible_shifts = ppao.PipelineMatrixSolver.get_possible_shifts(
+        source_matrix
+    )
+    combinations = source_matrix.get_all_combinations(possible_shifts)
+    # combinations of a class are equal up to a translation and
+    # permutations of shifts between equal rows
+    equal_rows = defaultdict(list)
+    for row_index, shifts in enumerate(possible_shifts):
+        equal_rows[(pipelines[row_index].tobytes(), shifts)].append(row_index)
+    relative = combinations - combinations.min(axis=1, keepdims=True)
+    for rows in equal_rows.values():
+        relative[:, rows] = np.sort(relative[:, rows], axis=1)
+    classes = np.unique(relative, axis=0).shape[0]
+    # the duplicated row never takes a shift before the original one
+    order = source_matrix.get_rows_order(pipelines.shape[0])
+    first, duplicate = sorted((0, pipelines.shape[0] - 1), key=order.index)
+    unsorted = np.count_nonzero(
+        combinations[:, first] > combinations[:, duplicate]
+    )
+    assert (
+        unsorted
+        <= deduplicating_solver.skipped_combinations
+        <= combinations.shape[0] - classes
+    )
+    if len(possible_shifts[0]) > 1:
+        assert deduplicating_solver.skipped_combinations > 0
+
+
+@given(
+    settings_=custom_st.correct_settings(),
+    pipelines=st.data(),
+    solver_engine=st.sampled_from(sorted(engines.ENGINES)),
+)
+@hypothesis_settings(
+    verbosity=Verbosity.verbose,
+    max_examples=300,
+    deadline=timedelta(seconds=1),
+)
+def test_solve_stats(settings_: settings.Settings, pipelines, solver_engine):
+    pipelines = pipelines.draw(
+        custom_st.correct_pipelines_numpy_array(
+            pipeline_size_limit=settings_.pipeline_size_limit,
+            max_rows=settings_.group_size_limit,
+        )
+    )
+    frequency = custom_st.frequency(pipelines=pipelines, settings_=settings_)
+    assume(frequency is not None)
+    settings_ = dataclasses.replace(settings_, solver_engine=solver_engine)
+    source_matrix = ppao.SourceMatrix(
+        from_array=pipelines,
+        settings_=settings_,
+        frequency=frequency,
+    )
+    solution = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix, settings_=settings_
+    ).solve()
+    stats = solution.stats
+    assert isinstance(stats, ppao.SolveStats)
+    assert len(stats.possible_shifts) == pipelines.shape[0]
+    assert stats.combinations == np.prod(stats.possible_shifts)
+    assert stats.scored_combinations >= 1
+    if solver_engine == "exhaustive":
+        assert (
+            stats.scored_combinations + stats.skipped_combinations
+            == stats.combinations
+        )
+        assert stats.pruned_combinations == 0
+    if solver_engine == "local_search":
+        # the greedy combination and the one-row moves of complete passes
+        moves = sum(shifts - 1 for shifts in stats.possible_shifts)
+        passes, rest = divmod(stats.scored_combinations - 1, moves or 1)
+        assert not rest
+        assert passes <= constants.LOCAL_SEARCH_PASSES_LIMIT
+    assert stats.total_operations == np.count_nonzero(pipelines)
+    assert stats.execution_units == len(solution)
+    assert stats.handler_calls == sum(
+        bool(execution_unit.operation) for execution_unit in solution
+    )
+    assert 0 <= stats.saved_calls < stats.total_operations
+    assert tuple(stats.timings) == constants.SOLVE_PHASES
+    assert all(timing >= 0 for timing in stats.timings.values())
+    alignment = ppao.SupersequenceSolver(
+        source_matrix=source_matrix, settings_=settings_
+    ).solve()
+    assert alignment.stats.total_operations == stats.total_operations
+    assert alignment.stats.execution_units == len(alignment)
+
+
+def test_parallel_scoring(monkeypatch):
+    monkeypatch.setattr(constants, "PARALLEL_SCORING_MIN_COMBINATIONS", 1)
+    settings_ = settings.Settings(
+        group_size_limit=6,
+        pipeline_size_limit=4,
+        common_ops_percent_bound=0.3,
+        combinations_memory_limit=4096,
+    )
+    rng = np.random.default_rng(0)
+    for _ in range(3):
+        pipelines = rng.integers(
+            1, 4, size=(6, 4), dtype=settings_.default_dtype
+        )
+        source_matrix = ppao.SourceMatrix(
+            from_array=pipelines,
+            settings_=settings_,
+            frequency=custom_st.frequency(pipelines, settings_),
+        )
+        serial_solver = ppao.PipelineMatrixSolver(
+            source_matrix=source_matrix, settings_=settings_
+        )
+        parallel_solver = ppao.PipelineMatrixSolver(
+            source_matrix=source_matrix,
+            settings_=dataclasses.replace(settings_, scoring_workers=3),
+        )
+        serial, parallel = serial_solver.solve(), parallel_solver.solve()
+        assert parallel.result == serial.result
+        assert (parallel.shifts == serial.shifts).all()
+        assert (
+            parallel_solver.skipped_combinations
+            == serial_solver.skipped_combinations
+        )
+        assert (
+            parallel.stats.scored_combinations
+            == serial.stats.scored_combinations
+        )
+
+
+def test_solve_many():
+    settings_ = settings.Settings(common_ops_percent_bound=0.3)
+    rng = np.random.default_rng(0)
+    matrices = []
+    while len(matrices) < 12:
+        pipelines = rng.integers(
+            1, 5, size=(4, 4), dtype=settings_.default_dtype
+        )
+        frequency = custom_st.frequency(pipelines, settings_)
+        if frequency is not None:
+            matrices.append(
+                ppao.SourceMatrix(
+                    from_array=pipelines,
+                    settings_=settings_,
+                    frequency=frequency,
+                )
+            )
+    expected = [
+        ppao.PipelineMatrixSolver(
+            source_matrix=matrix, settings_=settings_
+        ).solve()
+        for matrix in matrices
+    ]
+    solutions = list(
+        ppao.solve_many(
+            matrices, settings_=settings_, max_workers=2, chunksize=5
+        )
+    )
+    assert [solution.result for solution in solutions] == [
+        solution.result for solution in expected
+    ]
+    for solution, expected_solution in zip(solutions, expected, strict=True):
+        assert solution.shifts.tolist() == expected_solution.shifts.tolist()
+        assert [
+            (unit.operation, unit.pipelines.tolist()) for unit in solution
+        ] == [
+            (unit.operation, unit.pipelines.tolist())
+            for unit in expected_solution
+        ]
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        indexed = dict(
+            ppao.solve_many(
+                matrices, settings_=settings_, executor=executor, ordered=False
+            )
+        )
+    assert sorted(indexed) == list(range(len(matrices)))
+    assert [indexed[x].result for x in sorted(indexed)] == [
+        solution.result for solution in expected
+    ]
+
+
+def test_solve_many_group_error():
+    settings_ = settings.Settings(common_ops_percent_bound=0.3)
+    matrices = []
+    for source_array in (
+        np.array([[1, 2, 3, 4], [1, 2, 3, 4]], dtype=settings_.default_dtype),
+        np.array([[1, 1, 2, 2], [2, 2, 1, 1]], dtype=settings_.default_dtype),
+    ):
+        matrices.append(
+            ppao.SourceMatrix(
+                from_array=source_array,
+                settings_=settings_,
+                frequency=custom_st.frequency(source_array, settings_),
+            )
+        )
+    matrices[1].most_common = matrices[1].most_common[:0]
+    solutions = ppao.solve_many(matrices, settings_=settings_, max_workers=1)
+    assert next(solutions).result == 4
+    with pytest.raises(exceptions.GroupSolveError) as error:
+        next(solutions)
+    assert error.value.index == 1
+    assert isinstance(error.value.__cause__, exceptions.MostCommonIsEmptyError)
+
+
+@given(chunksize=st.integers(max_value=0))
+def test_solve_many_chunksize_fail(chunksize):
+    with pytest.raises(exceptions.ChunksizeValidationError):
+        next(ppao.solve_many([], chunksize=chunksize))
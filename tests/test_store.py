@@ -0,0 +1,203 @@
+import dataclasses
+import os
+import tempfile
+
+import numpy as np
+import pytest
+from hypothesis import given
+from hypothesis import strategies as st
+
+import ppao
+import tests.custom_strategies as custom_st
+from ppao import constants, exceptions, settings
+
+
+def solve(source_array, settings_, store):
+    source_matrix = ppao.SourceMatrix(
+        from_array=source_array,
+        settings_=settings_,
+        frequency=custom_st.frequency(source_array, settings_),
+    )
+    return ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix, settings_=settings_, cache=store
+    ).solve()
+
+
+def test_plan_store():
+    settings_ = settings.Settings(common_ops_percent_bound=0.3)
+    source_array = np.array(
+        [[1, 3, 1, 2], [1, 1, 1, 2], [3, 2, 1, 1], [1, 2, 2, 1]],
+        dtype=settings_.default_dtype,
+    )
+    with tempfile.TemporaryDirectory() as path:
+        store = ppao.PlanStore(path)
+        solution = solve(source_array, settings_, store)
+        assert (store.hits, store.misses) == (0, 1)
+        store.close()
+        # a new process opens the same store
+        for readonly in (False, True):
+            store = ppao.PlanStore(path, readonly=readonly)
+            stored_solution = solve(source_array, settings_, store)
+            assert (store.hits, store.misses) == (1, 0)
+            store.close()
+            assert stored_solution.result == solution.result
+            assert stored_solution.shifts.tolist() == solution.shifts.tolist()
+            assert [
+                (unit.operation, unit.pipelines.tolist())
+                for unit in stored_solution
+            ] == [
+                (unit.operation, unit.pipelines.tolist()) for unit in solution
+            ]
+
+
+def test_plan_store_compact_solutions():
+    settings_ = settings.Settings(
+        common_ops_percent_bound=0.3, compact_solutions=True
+    )
+    source_array = np.array(
+        [[1, 3, 1, 2], [1, 1, 1, 2], [3, 2, 1, 1], [1, 2, 2, 1]],
+        dtype=settings_.default_dtype,
+    )
+    with tempfile.TemporaryDirectory() as path:
+        store = ppao.PlanStore(path)
+        solution = solve(source_array, settings_, store)
+        stored_solution = solve(source_array, settings_, store)
+        assert (store.hits, store.misses) == (1, 1)
+        store.close()
+        assert isinstance(stored_solution, ppao.CompactSolution)
+        assert stored_solution.shifts.tolist() == solution.shifts.tolist()
+        assert [
+            (unit.operation, unit.pipelines.tolist())
+            for unit in stored_solution
+        ] == [(unit.operation, unit.pipelines.tolist()) for unit in solution]
+
+
+def test_plan_store_settings():
+    settings_ = settings.Settings(common_ops_percent_bound=0.3)
+    source_array = np.array(
+        [[1, 3, 1, 2], [1, 1, 1, 2], [3, 2, 1, 1], [1, 2, 2, 1]],
+        dtype=settings_.default_dtype,
+    )
+    with tempfile.TemporaryDirectory() as path:
+        store = ppao.PlanStore(path)
+        solution = solve(source_array, settings_, store)
+        # settings which do not change solutions share stored plans
+        stored_solution = solve(
+            source_array,
+            dataclasses.replace(
+                settings_,
+                deduplicate_combinations=False,
+                combinations_memory_limit=4096,
+                scoring_workers=2,
+                compact_solutions=True,
+                debug_validation=True,
+                pipeline_max_wait=1.0,
+            ),
+            store,
+        )
+        assert (store.hits, store.misses) == (1, 1)
+        assert stored_solution.shifts.tolist() == solution.shifts.tolist()
+        solve(
+            source_array,
+            dataclasses.replace(settings_, solver_engine="branch_and_bound"),
+            store,
+        )
+        assert (store.hits, store.misses) == (1, 2)
+        store.close()
+
+
+def test_plan_store_row_order():
+    settings_ = settings.Settings(common_ops_percent_bound=0.3)
+    source_array = np.array(
+        [[1, 3, 3, 3], [2, 2, 1, 0], [3, 2, 3, 0]],
+        dtype=settings_.default_dtype,
+    )
+    with tempfile.TemporaryDirectory() as path:
+        store = ppao.PlanStore(path)
+        solution = solve(source_array, settings_, store)
+        store.close()
+        store = ppao.PlanStore(path)
+        same_order = solve(source_array, settings_, store)
+        # the stored plan is worse than the best one of these rows
+        other_order = solve(source_array[[1, 2, 0]], settings_, store)
+        assert (store.hits, store.misses) == (2, 0)
+        store.close()
+    uncached = solve(source_array[[1, 2, 0]], settings_, None)
+    assert solution.optimal and same_order.optimal and uncached.optimal
+    assert same_order.result == solution.result == other_order.result == 10
+    assert uncached.result == 8
+    assert not other_order.optimal
+    assert other_order.gap == 3
+
+
+def test_plan_store_digest():
+    settings_ = settings.Settings(common_ops_percent_bound=0.3)
+    source_array = np.array(
+        [[1, 3, 3, 3], [2, 2, 1, 0], [3, 2, 3, 0]],
+        dtype=settings_.default_dtype,
+    )
+    canonical_matrix = ppao.cache.CanonicalMatrix.from_source_matrix(
+        ppao.SourceMatrix(
+            from_array=source_array,
+            settings_=settings_,
+            frequency=custom_st.frequency(source_array, settings_),
+        ),
+        settings_,
+    )
+    # digests of stored plans do not depend on the process
+    assert ppao.PlanStore._get_digest(canonical_matrix.key).tolist() == [
+        12248031794607156631,
+        4485837508639422355,
+    ]
+
+
+def test_plan_store_version(monkeypatch):
+    settings_ = settings.Settings(common_ops_percent_bound=0.3)
+    source_array = np.array(
+        [[1, 2, 3, 4], [1, 2, 3, 4]], dtype=settings_.default_dtype
+    )
+    with tempfile.TemporaryDirectory() as path:
+        store = ppao.PlanStore(path)
+        solve(source_array, settings_, store)
+        monkeypatch.setattr(
+            constants, "SOLVER_VERSION", constants.SOLVER_VERSION + 1
+        )
+        readonly_store = ppao.PlanStore(path, readonly=True)
+        solve(source_array, settings_, readonly_store)
+        assert readonly_store.misses == 1
+        new_store = ppao.PlanStore(path)
+        solve(source_array, settings_, new_store)
+        solve(source_array, settings_, new_store)
+        assert (new_store.hits, new_store.misses) == (1, 1)
+        # the store of the old version does not write anymore
+        data_path = os.path.join(path, constants.PLAN_STORE_DATA_FILE)
+        data_size = os.path.getsize(data_path)
+        solve(np.flip(source_array, axis=1), settings_, store)
+        assert os.path.getsize(data_path) == data_size
+        for store_ in (store, readonly_store, new_store):
+            store_.close()
+
+
+def test_plan_store_full_and_missing():
+    settings_ = settings.Settings(common_ops_percent_bound=0.3)
+    source_arrays = (
+        np.array([[1, 2, 3, 4], [1, 2, 3, 4]], dtype=settings_.default_dtype),
+        np.array([[1, 1, 2, 2], [2, 2, 1, 1]], dtype=settings_.default_dtype),
+    )
+    with tempfile.TemporaryDirectory() as path:
+        missing_path = os.path.join(path, "missing")
+        readonly_store = ppao.PlanStore(missing_path, readonly=True)
+        solve(source_arrays[0], settings_, readonly_store)
+        assert readonly_store.misses == 1
+        assert not os.path.exists(missing_path)
+        store = ppao.PlanStore(path, capacity=1)
+        for source_array in source_arrays + source_arrays:
+            solve(source_array, settings_, store)
+        assert (store.hits, store.misses) == (1, 3)
+        store.close()
+
+
+@given(capacity=st.integers(max_value=0))
+def test_plan_store_capacity_fail(capacity):
+    with pytest.raises(exceptions.PlanStoreCapacityValidationError):
+        ppao.PlanStore(os.devnull, capacity=capacity)
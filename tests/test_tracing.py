@@ -0,0 +1,46 @@
+import numpy as np
+
+import ppao
+from ppao import settings, tracing
+
+
+def test_tracing():
+    settings_ = settings.Settings(common_ops_percent_bound=0.3)
+    pipelines = np.array(
+        [[1, 3, 1, 2], [1, 1, 1, 2], [3, 2, 1, 1], [1, 2, 2, 1]],
+        dtype=settings_.default_dtype,
+    )
+    tracer = tracing.RecordingTracer()
+    assert tracing.set_tracer(tracer) is None
+    try:
+        grouper = ppao.Grouper(settings_=settings_)
+        grouper.add(pipelines)
+        source_matrix = grouper.pop()
+        solution = ppao.PipelineMatrixSolver(
+            source_matrix=source_matrix, settings_=settings_
+        ).solve()
+    finally:
+        assert tracing.set_tracer(None) is tracer
+    events = {stage: sizes for stage, _, sizes in tracer.events}
+    assert [stage for stage, _, _ in tracer.events] == [
+        "grouper.add",
+        "grouper.pop",
+        "solve.windows",
+        "solve.shifts",
+        "search.enumerate",
+        "search.score",
+        "search.enumerate",
+        "solve.search",
+        "solve.sequence",
+        "solve.optimize",
+        "solve",
+    ]
+    assert all(duration >= 0 for _, duration, _ in tracer.events)
+    assert events["grouper.add"] == {"pipelines": 4}
+    assert events["grouper.pop"] == {"backlog": 4, "groups": 1}
+    assert events["solve"] == {"rows": 4, "columns": 4}
+    assert events["solve.search"]["result"] == solution.result
+    assert events["solve.optimize"]["units"] == len(solution)
+    # disabled tracing does not record
+    grouper.add(pipelines)
+    assert len(tracer.events) == 11
@@ -0,0 +1,124 @@
+import concurrent.futures
+import dataclasses
+from datetime import timedelta
+
+import numpy as np
+import pytest
+from hypothesis import Verbosity, assume, given
+from hypothesis import settings as hypothesis_settings
+from hypothesis import strategies as st
+
+import ppao
+import tests.custom_strategies as custom_st
+from ppao import constants, exceptions, settings, wire
+from ppao.custom_types import Frequency
+
+
+def units_of(solution):
+    return [
+        (execution_unit.operation, execution_unit.pipelines.tolist())
+        for execution_unit in solution
+    ]
+
+
+def count_operations(name):
+    source_matrix, block = wire.from_shared_memory(name)
+    total = int(np.count_nonzero(source_matrix))
+    del source_matrix
+    block.close()
+    return total
+
+
+@given(
+    settings_=custom_st.correct_settings(),
+    pipelines=st.data(),
+    compact_solutions=st.booleans(),
+)
+@hypothesis_settings(
+    verbosity=Verbosity.verbose,
+    max_examples=300,
+    deadline=timedelta(seconds=2),
+)
+def test_wire(settings_: settings.Settings, pipelines, compact_solutions):
+    pipelines = pipelines.draw(
+        custom_st.correct_pipelines_numpy_array(
+            pipeline_size_limit=settings_.pipeline_size_limit,
+            max_rows=settings_.group_size_limit,
+        )
+    )
+    frequency = custom_st.frequency(pipelines=pipelines, settings_=settings_)
+    assume(frequency is not None and frequency.most_common)
+    settings_ = dataclasses.replace(
+        settings_, compact_solutions=compact_solutions
+    )
+    source_matrix = ppao.SourceMatrix(
+        from_array=pipelines, settings_=settings_, frequency=frequency
+    )
+    buffer = wire.to_buffer(source_matrix)
+    assert len(buffer) == wire.get_buffer_size(source_matrix)
+    decoded_matrix = wire.from_buffer(bytes(buffer), settings_)
+    assert isinstance(decoded_matrix, ppao.SourceMatrix)
+    assert (decoded_matrix == source_matrix).all()
+    assert decoded_matrix.total_operations == source_matrix.total_operations
+    assert set(decoded_matrix.most_common.tolist()) == frequency.most_common
+    solution = ppao.PipelineMatrixSolver(
+        source_matrix=source_matrix, settings_=settings_
+    ).solve()
+    buffer = wire.to_buffer(solution, settings_=settings_)
+    decoded = wire.from_buffer(buffer)
+    assert isinstance(decoded, ppao.CompactSolution)
+    assert units_of(decoded) == units_of(solution)
+    assert decoded.shifts.tolist() == solution.shifts.tolist()
+    assert (decoded.result, decoded.optimal, decoded.gap) == (
+        solution.result,
+        solution.optimal,
+        solution.gap,
+    )
+    # arrays are views of the buffer
+    assert np.shares_memory(
+        decoded.pipelines, np.frombuffer(buffer, dtype=np.uint8)
+    )
+
+
+def test_wire_shared_memory():
+    settings_ = settings.Settings(common_ops_percent_bound=0.3)
+    source_matrix = ppao.SourceMatrix(
+        from_array=np.array(
+            [[1, 3, 1, 2], [1, 1, 1, 2], [3, 2, 1, 1], [1, 2, 0, 0]],
+            dtype=settings_.default_dtype,
+        ),
+        frequency=Frequency(total=14, most_common={1}),
+        settings_=settings_,
+    )
+    block = wire.to_shared_memory(source_matrix)
+    try:
+        with concurrent.futures.ProcessPoolExecutor(1) as executor:
+            assert executor.submit(count_operations, block.name).result() == (
+                14
+            )
+    finally:
+        block.close()
+        block.unlink()
+
+
+def test_wire_fail():
+    solution = ppao.CompactSolution(
+        operations=np.array([1], dtype=np.uint16),
+        offsets=np.array([0, 1], dtype=np.int64),
+        pipelines=np.array([0], dtype=np.uint16),
+        shifts=np.array([0], dtype=np.int64),
+        result=1,
+    )
+    buffer = wire.to_buffer(solution)
+    with pytest.raises(exceptions.WireBufferSizeError):
+        wire.to_buffer(solution, out=bytearray(len(buffer) - 1))
+    for broken in (
+        buffer[: len(buffer) - 1],
+        b"PPAOPLAN" + buffer[8:],
+        buffer[:8]
+        + (constants.WIRE_FORMAT_VERSION + 1).to_bytes(4, "little")
+        + buffer[12:],
+        b"",
+    ):
+        with pytest.raises(exceptions.WireFormatError):
+            wire.from_buffer(broken)